@@ -0,0 +1,111 @@
+"""Online control of the GA's operator rates.
+
+    Once per generation the controller looks at the sorted population's diversity (the ratio of
+    distinct effective genomes) and at how long the best score has stalled. A converging population
+    gets more mutation and crossover and less selection pressure, a diverse one that keeps improving
+    drifts back towards the configured rates. A run that stalls for stagnation_limit generations is
+    partially restarted, keeping its elites and reseeding everything else.
+"""
+
+from typing import Dict, List, NamedTuple
+
+from dsecffxiv.algo.types import Individual, Population
+
+LOW_DIVERSITY = 0.3
+HIGH_DIVERSITY = 0.7
+
+
+class ControllerState(NamedTuple):
+    """One generation of controller history."""
+
+    generation: int
+    best_score: float
+    diversity: float
+    mutation_chance: float
+    crossover_points: int
+    tournament_size: int
+    restarted: bool
+
+
+def genome_key(indiv: Individual) -> tuple:
+    """The actions an individual actually uses, identical crafts share a key."""
+    return tuple(gene[0] for gene in indiv.effective_value())
+
+
+def distinct_ratio(population: Population) -> float:
+    """Fraction of the population that is a distinct craft, 1 when every craft is different."""
+    if not population:
+        return 1.0
+    return len({genome_key(indiv) for indiv in population}) / len(population)
+
+
+class AdaptiveController():
+    """Adapt mutation, crossover and tournament size from diversity and progress.
+
+    Configured from the GA config: adaptive_stagnation_limit (generations without improvement before
+    a restart, default 50), adaptive_restart_elites (individuals kept by a restart, default 10% of
+    the population) and adaptive_max_mutation (default 0.2). The configured mutation_chance,
+    crossover_points and tournament_size are the rates it starts from and returns to.
+    """
+
+    def __init__(self, config: Dict):
+        """Record the configured rates as the baseline."""
+        self.base_mutation = config['mutation_chance']
+        self.base_crossover = config['crossover_points']
+        self.base_tournament = config['tournament_size']
+        self.max_mutation = max(config.get('adaptive_max_mutation', 0.2), self.base_mutation)
+        self.max_crossover = max(config['individual_size'] // 2, self.base_crossover)
+        self.max_tournament = max(config['population_size'] // 2, self.base_tournament)
+        self.stagnation_limit = config.get('adaptive_stagnation_limit', 50)
+        self.restart_elites = config.get('adaptive_restart_elites',
+                                         max(config['population_size'] // 10, 1))
+
+        self.best_score = None
+        self.stalled = 0
+        self.restarts = 0
+        self.history: List[ControllerState] = list()
+
+    def update(self, config: Dict, population: Population, best_score: float) -> bool:
+        """Adjust the rates in config for the next generation, True if the run should restart.
+
+        population must be sorted best first.
+        """
+        if self.best_score is None or best_score > self.best_score:
+            self.best_score = best_score
+            self.stalled = 0
+        else:
+            self.stalled += 1
+
+        diversity = distinct_ratio(population)
+        restart = self.stalled >= self.stagnation_limit
+        if restart:
+            # Fresh genomes bring their own diversity, start them off with the configured rates
+            self.restarts += 1
+            self.stalled = 0
+            config['mutation_chance'] = self.base_mutation
+            config['crossover_points'] = self.base_crossover
+            config['tournament_size'] = self.base_tournament
+        elif diversity < LOW_DIVERSITY or self.stalled > self.stagnation_limit // 2:
+            # Converging, explore more and select less greedily
+            config['mutation_chance'] = min(config['mutation_chance'] * 1.5, self.max_mutation)
+            config['crossover_points'] = min(config['crossover_points'] + 1, self.max_crossover)
+            config['tournament_size'] = max(int(config['tournament_size'] * 0.8), 2)
+        elif diversity > HIGH_DIVERSITY:
+            # Diverse and improving, exploit more
+            config['mutation_chance'] = max(config['mutation_chance'] * 0.9, self.base_mutation / 4)
+            config['crossover_points'] = max(config['crossover_points'] - 1, 1)
+            config['tournament_size'] = min(int(config['tournament_size'] * 1.25) + 1,
+                                            self.max_tournament)
+        else:
+            # Settle back towards the configured rates
+            config['mutation_chance'] += (self.base_mutation - config['mutation_chance']) * 0.2
+            config['crossover_points'] += (self.base_crossover > config['crossover_points']) - \
+                (self.base_crossover < config['crossover_points'])
+            # A fifth of the gap, but at least one step so small gaps close from either side
+            gap = self.base_tournament - config['tournament_size']
+            config['tournament_size'] += int(gap / 5) or (gap > 0) - (gap < 0)
+
+        self.history.append(ControllerState(len(self.history) + 1, best_score, diversity,
+                                            config['mutation_chance'], config['crossover_points'],
+                                            config['tournament_size'], restart))
+        return restart
@@ -0,0 +1,163 @@
+"""Bounded elite archive that keeps distinct strategy families apart.
+
+    The archive uses clearing: it holds at most capacity niches, each with one champion, and two
+    genomes are in the same niche when they are within radius of each other. Distance is the
+    Hamming distance between their action ids over the steps actually used, plus the difference in
+    length. A new individual replaces the champion of the niche it falls in if it is better. Outside
+    every niche it opens a new one, evicting the worst champion once the archive is full. Survivors
+    are offered every generation, so families that truncation would cull keep a champion as long
+    as they stay among the best capacity families, and the GA draws some parents from the champions.
+
+    Lookups are sublinear by pigeonhole. Two genomes within radius r of each other differ in at most
+    r of the first (longer length - r) steps, which both have. So if those steps are cut into r + 1
+    segments, at least one segment is identical. Champions are indexed by their length, the longer
+    length of a pair (one of the r + 1 that can be within radius), segment index and segment
+    contents. A lookup only probes the 2r + 1 lengths that can be within radius and compares the
+    champions sharing a segment. Genomes of at most r steps are always compared.
+"""
+
+import heapq
+from typing import Dict, List, Optional, Set, Tuple
+
+from dsecffxiv.algo.encoding import ACTION_IDS
+from dsecffxiv.algo.types import Individual, Population
+from dsecffxiv.utils.rng import Rng
+
+DEFAULT_CAPACITY = 64
+DEFAULT_RADIUS = 4
+DEFAULT_SELECTION = 0.2
+DEFAULT_TOURNAMENT_SIZE = 2
+
+Genome = Tuple[int, ...]
+
+
+def genome_key(indiv: Individual) -> Genome:
+    """Action ids of the steps an individual actually uses."""
+    return tuple(ACTION_IDS[gene[0]] for gene in indiv.effective_value())
+
+
+def genome_distance(left: Genome, right: Genome) -> int:
+    """Hamming distance over the shorter genome plus the difference in length."""
+    return sum(a != b for a, b in zip(left, right)) + abs(len(left) - len(right))
+
+
+def _segments(genome: Genome, length: int, radius: int) -> List[Tuple[int, Genome]]:
+    """The radius + 1 (index, contents) segments of genome's first length - radius steps.
+
+    The boundaries only depend on length, the length of the longer genome of a compared pair.
+    """
+    prefix = length - radius
+    return [(index, genome[prefix * index // (radius + 1):prefix * (index + 1) // (radius + 1)])
+            for index in range(radius + 1)]
+
+
+class EliteArchive():
+    """Niche champions of a run, see the module docstring."""
+
+    def __init__(self, capacity: int = DEFAULT_CAPACITY, radius: int = DEFAULT_RADIUS):
+        """Start empty."""
+        self.capacity = capacity
+        self.radius = radius
+        # niche id -> (genome, score, individual)
+        self.champions: Dict[int, Tuple[Genome, float, Individual]] = dict()
+        # (length, longer length of a pair, segment index, segment contents) -> niche ids
+        self._index: Dict[Tuple[int, int, int, Genome], Set[int]] = dict()
+        # Niches whose genome is too short to segment, always compared
+        self._short: Set[int] = set()
+        # (score, niche id) of every champion, stale entries are skipped when popped
+        self._worst: List[Tuple[float, int]] = list()
+        self._next_id = 0
+        self._ranked: Optional[Population] = None
+        self.comparisons = 0
+
+    def __len__(self) -> int:
+        """Number of niches."""
+        return len(self.champions)
+
+    def nearest(self, genome: Genome) -> Optional[Tuple[int, int]]:
+        """(distance, niche id) of the closest champion within radius, None if there is none."""
+        radius = self.radius
+        candidates = set(self._short)
+        for length in range(max(len(genome) - radius, radius + 1), len(genome) + radius + 1):
+            longest = max(length, len(genome))
+            for index, contents in _segments(genome, longest, radius):
+                candidates.update(self._index.get((length, longest, index, contents), ()))
+        best = None
+        for niche in candidates:
+            self.comparisons += 1
+            distance = genome_distance(genome, self.champions[niche][0])
+            if distance <= radius and (best is None or distance < best[0]):
+                best = (distance, niche)
+        return best
+
+    def offer(self, indiv: Individual, score: float) -> bool:
+        """Offer an individual, returning whether it became a champion."""
+        genome = genome_key(indiv)
+        found = self.nearest(genome)
+        if found is not None:
+            niche = found[1]
+            if score <= self.champions[niche][1]:
+                return False
+            self._remove(niche)
+        elif len(self.champions) >= self.capacity:
+            worst = self._peek_worst()
+            if score <= self.champions[worst][1]:
+                return False
+            self._remove(worst)
+        self._add(genome, score, indiv)
+        return True
+
+    def ranked(self) -> Population:
+        """Champions best first."""
+        if self._ranked is None:
+            self._ranked = [entry[2] for entry in sorted(self.champions.values(),
+                                                         key=lambda entry: entry[1], reverse=True)]
+        return self._ranked
+
+    def _keys(self, genome: Genome) -> List[Tuple[int, int, int, Genome]]:
+        """Index keys of a champion, segmented for every longer length within radius of it."""
+        length = len(genome)
+        return [(length, longest, index, contents)
+                for longest in range(length, length + self.radius + 1)
+                for index, contents in _segments(genome, longest, self.radius)]
+
+    def _add(self, genome: Genome, score: float, indiv: Individual) -> None:
+        """Open a niche."""
+        niche = self._next_id
+        self._next_id += 1
+        self.champions[niche] = (genome, score, indiv)
+        heapq.heappush(self._worst, (score, niche))
+        if len(self._worst) > 4 * max(self.capacity, 16):
+            # Drop the stale entries before they outgrow the archive
+            self._worst = [(entry[1], champion) for champion, entry in self.champions.items()]
+            heapq.heapify(self._worst)
+        if len(genome) <= self.radius:
+            self._short.add(niche)
+        else:
+            for key in self._keys(genome):
+                self._index.setdefault(key, set()).add(niche)
+        self._ranked = None
+
+    def _remove(self, niche: int) -> None:
+        """Close a niche, its heap entry goes stale."""
+        genome = self.champions.pop(niche)[0]
+        if len(genome) <= self.radius:
+            self._short.discard(niche)
+        else:
+            for key in self._keys(genome):
+                bucket = self._index[key]
+                bucket.discard(niche)
+                if not bucket:
+                    del self._index[key]
+        self._ranked = None
+
+    def _peek_worst(self) -> int:
+        """Niche id of the worst champion."""
+        while self._worst[0][1] not in self.champions:
+            heapq.heappop(self._worst)
+        return self._worst[0][1]
+
+
+def select_from_archive(archive: Population, tournament_size: int, rng: Rng) -> Individual:
+    """Tournament select a champion from an archive's ranked champions."""
+    return archive[min(rng.integers(0, len(archive), tournament_size), default=len(archive) - 1)]
@@ -1,42 +1,105 @@
 """Crossover Functions."""
 
-from random import randint
-from typing import Any, Tuple
+from typing import Any, Optional, Tuple
 
-from dsecffxiv.algo.types import Individual
+from dsecffxiv.algo.types import Individual, SharedPopulation
+from dsecffxiv.utils.rng import Rng, default_rng
 
 Crossover = Any
 # Crossover = Callable[[
 #     Tuple[Individual, Individual], Dict], Tuple[Individual, Individual]]
 
 
-def crossover_n_point(parents: Tuple[Individual, Individual], crossover_points: int) -> Tuple[Individual, Individual]:
-    """Splice together two parents to make two children using n point crossover."""
+def crossover_n_point(parents: Tuple[Individual, Individual], crossover_points: int,
+                      rng: Optional[Rng] = None) -> Tuple[Individual, Individual]:
+    """Splice together two parents to make two children using n point crossover.
+
+    The left child starts on the right parent and the children swap sides at every point. Points
+    are only placed inside the shorter parent, past that both children inherit the longer parent's
+    tail, so trimmed parents of different lengths can still be crossed.
+    """
     _left, _right = parents
-    size = len(_left.value)
-    points = list()
-    for _ in range(crossover_points):
-        new_point = randint(0, size)
-        while new_point in points:
-            new_point = randint(0, size)
-        points.append(new_point)
+    size = min(len(_left.value), len(_right.value))
+    points = default_rng(rng).sample(range(0, size + 1), min(crossover_points, size + 1))
     points.sort()
+    bounds = [0] + points + [size]
 
     _new_left, _new_right = list(), list()
-    pick_direction = False
+    for segment in range(len(bounds) - 1):
+        start, stop = bounds[segment], bounds[segment + 1]
+        if segment % 2:
+            _new_left.extend(_left.value[start:stop])
+            _new_right.extend(_right.value[start:stop])
+        else:
+            _new_left.extend(_right.value[start:stop])
+            _new_right.extend(_left.value[start:stop])
+
+    tail = (_left if len(_left.value) > size else _right).value[size:]
+    _new_left.extend(tail)
+    _new_right.extend(tail)
+
+    return (Individual(_new_left), Individual(_new_right))
+
 
-    for i in range(size):
-        if i in points:
-            pick_direction = not pick_direction
+def crossover_n_point_into(parents: Tuple[Individual, Individual],
+                           children: Tuple[Individual, Individual], crossover_points: int,
+                           rng: Optional[Rng] = None) -> Tuple[Individual, Individual]:
+    """Like crossover_n_point, but overwrite the genomes of two recycled individuals.
 
-        if pick_direction:
-            _new_left.append(_left.value[i])
-            _new_right.append(_right.value[i])
+    Draws the same points as crossover_n_point, so a seeded run breeds the same children either way.
+    The children must not be either parent.
+    """
+    _left, _right = parents
+    size = min(len(_left.value), len(_right.value))
+    points = default_rng(rng).sample(range(0, size + 1), min(crossover_points, size + 1))
+    points.sort()
+    bounds = [0] + points + [size]
+
+    longer = (_left if len(_left.value) > size else _right).value
+    _new_left, _new_right = children[0].value, children[1].value
+    # Cut the recycled genomes to length, the segments are written in order so a shorter one
+    # just grows
+    del _new_left[len(longer):]
+    del _new_right[len(longer):]
+    for segment in range(len(bounds) - 1):
+        start, stop = bounds[segment], bounds[segment + 1]
+        if segment % 2:
+            _new_left[start:stop] = _left.value[start:stop]
+            _new_right[start:stop] = _right.value[start:stop]
         else:
-            _new_left.append(_right.value[i])
-            _new_right.append(_left.value[i])
+            _new_left[start:stop] = _right.value[start:stop]
+            _new_right[start:stop] = _left.value[start:stop]
 
-    return (Individual(_new_left), Individual(_new_right))
+    _new_left[size:] = longer[size:]
+    _new_right[size:] = longer[size:]
+    for child in children:
+        child.effective_length = None
+        child.objectives = None
+    return children
+
+
+def crossover_n_point_rows(shared: SharedPopulation, parents: Tuple[int, int],
+                           children: Tuple[int, int], crossover_points: int,
+                           rng: Optional[Rng] = None) -> None:
+    """N point crossover between two rows of a shared population, into two other rows.
+
+    Matches crossover_n_point, the left child starts on the right parent and swaps at every point.
+    """
+    width = shared.width
+    points = default_rng(rng).sample(range(0, width + 1), min(crossover_points, width + 1))
+    points.sort()
+    bounds = [0] + points + [width]
+
+    left = bytes(shared.row(parents[0]))
+    right = bytes(shared.row(parents[1]))
+    genomes = shared.genomes
+    new_left = children[0] * width
+    new_right = children[1] * width
+    for segment in range(len(bounds) - 1):
+        start, stop = bounds[segment], bounds[segment + 1]
+        first, second = (left, right) if segment % 2 else (right, left)
+        genomes[new_left + start:new_left + stop] = first[start:stop]
+        genomes[new_right + start:new_right + stop] = second[start:stop]
 
 
 Default_Crossover = crossover_n_point
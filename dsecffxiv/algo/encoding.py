@@ -0,0 +1,43 @@
+"""Compact integer encoding of crafting genomes.
+
+    Each gene of an individual is an (Action, success roll, material condition) tuple. The rolls and
+    conditions are fixed per step for a whole run, so a genome is fully described by its action ids
+    and can be stored as one byte per step.
+"""
+
+from typing import Dict, Iterable, List, Sequence, Tuple
+
+import dsecffxiv.sim_resources.ActionClasses as action
+from dsecffxiv.algo.types.individual import Individual
+
+# Ids are part of the stored/transported format, only ever append to this tuple
+ACTIONS: Tuple[type, ...] = (
+    action.MuscleMemory, action.Reflect, action.TricksoftheTrade, action.RapidSynthesis,
+    action.HastyTouch, action.BasicSynthesis, action.FocusedSynthesis, action.IntensiveSynthesis,
+    action.PatientTouch, action.BrandoftheElements, action.CarefulSynthesis, action.Observe,
+    action.Veneration, action.Innovation, action.BasicTouch, action.PreciseTouch,
+    action.FocusedTouch, action.InnerQuiet, action.Groundwork, action.ByregotsBlessing,
+    action.PrudentTouch, action.NameoftheElements, action.DelicateSynthesis, action.StandardTouch,
+    action.GreatStrides, action.PreparatoryTouch, action.WasteNot, action.MastersMend,
+    action.Manipulation, action.WasteNot2, action.FinalAppraisal,
+)
+ACTION_IDS: Dict[type, int] = {which: action_id for action_id, which in enumerate(ACTIONS)}
+ACTION_NAMES: Dict[str, type] = {which.__name__: which for which in ACTIONS}
+
+
+def encode_actions(indiv: Individual) -> bytes:
+    """Encode an individual's actions as one byte per step, without a scored craft's dead tail."""
+    return bytes([ACTION_IDS[gene[0]] for gene in indiv.effective_value()])
+
+
+def decode_actions(action_ids: Iterable[int], success_rolls: Sequence[int],
+                   material_conditions: Sequence[int]) -> Individual:
+    """Rebuild an individual from its action ids and the run's per step rolls and conditions."""
+    return Individual(genes_from_ids(action_ids, success_rolls, material_conditions))
+
+
+def genes_from_ids(action_ids: Iterable[int], success_rolls: Sequence[int],
+                   material_conditions: Sequence[int]) -> List[tuple]:
+    """Rebuild only the gene list of an individual from its action ids."""
+    return [(ACTIONS[action_id], success_rolls[step], material_conditions[step])
+            for step, action_id in enumerate(action_ids)]
@@ -0,0 +1,85 @@
+"""Exact expected score of a craft over the success rolls of its stochastic actions.
+
+    A genome fixes the material condition of every step, and its success rolls only matter to the
+    few actions that can fail (see sim_resources/Stochastic.py). Instead of trusting one sampled
+    roll per step, the evaluator walks the craft as a weighted set of states. It branches into a
+    success and a failure state at each stochastic step and merges states that have become identical
+    again, so the set stays small. Crafts that end on a branch add their score times the branch's
+    probability to the expectation.
+"""
+
+from typing import Dict, NamedTuple, Sequence, Tuple
+
+from dsecffxiv.sim_resources.Profile import DEFAULT_PROFILE, StatProfile
+from dsecffxiv.sim_resources.State import State
+from dsecffxiv.sim_resources.Stochastic import success_probability
+
+# Success rolls that make a stochastic action succeed or fail whatever its threshold
+SUCCESS_ROLL = 0
+FAILURE_ROLL = 99
+# Attributes that are set before every step or shared, and never tell two states apart
+_UNMERGED = frozenset(('constants', 'success_val', 'material_condition'))
+
+
+class Expectation(NamedTuple):
+    """Expected score of a craft and how much branching it took to compute."""
+
+    score: float
+    # Chance that the craft ends with a score above 0
+    success_chance: float
+    # Largest number of distinct states live at one step
+    peak_states: int
+    # Steps of the longest branch before its craft ended
+    effective_length: int
+
+
+def _state_key(state: State) -> Tuple:
+    """Hashable snapshot of everything that decides how a state goes on."""
+    return tuple(value for name, value in state.__dict__.items() if name not in _UNMERGED)
+
+
+def expected_craft(genes: Sequence[tuple], profile: StatProfile = DEFAULT_PROFILE) -> Expectation:
+    """Walk every roll outcome of a genome's stochastic steps and return the exact expectation."""
+    live: Dict[Tuple, Tuple[State, float]] = {None: (State(profile), 1.0)}
+    expected = success_chance = 0.0
+    peak_states = 1
+    effective_length = len(genes)
+    for step, (which, _, material_condition) in enumerate(genes):
+        following: Dict[Tuple, Tuple[State, float]] = dict()
+        for state, chance in live.values():
+            state.update_condition(material_condition)
+            success = success_probability(which, state)
+            if success >= 1.0:
+                outcomes = ((state, SUCCESS_ROLL, chance),)
+            else:
+                outcomes = ((state.copy(), SUCCESS_ROLL, chance * success),
+                            (state, FAILURE_ROLL, chance * (1.0 - success)))
+            for branch, roll, branch_chance in outcomes:
+                branch.update_success(roll)
+                branch = which.execute(branch)
+                branch.step()
+                score = branch.evaluate()
+                if score != 0:  # The branch broke, ran out of CP or completed the craft
+                    expected += branch_chance * score
+                    if score > 0:
+                        success_chance += branch_chance
+                    continue
+                key = _state_key(branch)
+                merged = following.get(key)
+                following[key] = (branch, branch_chance + merged[1] if merged else branch_chance)
+        live = following
+        if not live:
+            effective_length = step + 1
+            break
+        peak_states = max(peak_states, len(live))
+    return Expectation(expected, success_chance, peak_states, effective_length)
+
+
+def score_expected(individual, profile: StatProfile = DEFAULT_PROFILE) -> float:
+    """Score an individual by its expected score, a drop in replacement for score_craft.
+
+    Records the length of the individual's longest branch as its effective length.
+    """
+    expectation = expected_craft(individual.value, profile)
+    individual.effective_length = expectation.effective_length
+    return expectation.score
@@ -1,14 +1,23 @@
 """Utility methods for creating new populations."""
 
-from random import randint
+from bisect import bisect_left
 from math import ceil
+from typing import List, Optional, Sequence
 
+from dsecffxiv.algo.encoding import ACTIONS
 from dsecffxiv.algo.types import Domain, Individual, Population
 from dsecffxiv.sim_resources import TestResources, ActionClasses
+from dsecffxiv.sim_resources.Profile import DEFAULT_PROFILE, StatProfile
+from dsecffxiv.utils.rng import Rng, default_rng
 
 
-def generate_new_individual(domain: Domain, size: int, material_conditions, success_rolls) -> Individual:
+def generate_new_individual(domain: Domain, size: int, material_conditions, success_rolls,
+                            rng: Optional[Rng] = None,
+                            profile: StatProfile = DEFAULT_PROFILE) -> Individual:
     """Generate a random new Individual of the give size and domain."""
+    rng = default_rng(rng)
+    max_cp = profile.crafter.cp
+    max_durability = profile.recipe.durability
     indiv = list()  # List of action from domain
     # We get to manage heuristics based on buff/CP states in here, because we can't access actual states
     waste_not = 0
@@ -18,12 +27,12 @@ def generate_new_individual(domain: Domain, size: int, material_conditions, succ
     great_strides = 0
     innovation = 0
     manipulation = 0
-    cp = 572
-    durability = 50
+    cp = max_cp
+    durability = max_durability
     for i in range(0, size):
         random_action = TestResources.get_random_action(i, material_conditions[i], waste_not, inner_quiet,
                                                         name_elements, veneration, great_strides, innovation,
-                                                        manipulation, cp, durability)
+                                                        manipulation, cp, durability, rng, max_cp)
         if random_action is ActionClasses.WasteNot:  # Track turns to avoid using Prudent Touch while it is invalid
             waste_not = 5  # Extra turn because of decrement
         elif random_action is ActionClasses.WasteNot2:
@@ -44,8 +53,8 @@ def generate_new_individual(domain: Domain, size: int, material_conditions, succ
             manipulation = 6  # Extra turn because of decrement
         elif random_action is ActionClasses.MastersMend:
             durability += 30
-            if durability > 50:
-                durability = 50
+            if durability > max_durability:
+                durability = max_durability
         if material_conditions[i] == "pliant":
             cp -= ceil(random_action.CP_COST / 2)
         else:
@@ -71,21 +80,137 @@ def generate_new_individual(domain: Domain, size: int, material_conditions, succ
         if manipulation > 0:
             manipulation -= 1
             durability += 5
-            if durability > 50:
-                durability = 50
+            if durability > max_durability:
+                durability = max_durability
     return Individual(indiv)
 
 
-def generate_new_population(population_size: int, domain: Domain, size: int, material_conditions, success_rolls)\
-        -> Population:
+def generate_new_population(population_size: int, domain: Domain, size: int, material_conditions,
+                            success_rolls, rng: Optional[Rng] = None,
+                            profile: StatProfile = DEFAULT_PROFILE) -> Population:
     """Generate a new population give a population size, domain, and individual size."""
-    new_population = list()
-    for _ in range(0, population_size):
-        new_population.append(
-            generate_new_individual(domain, size, material_conditions, success_rolls))
-    return new_population
+    return generate_population_bulk(population_size, size, material_conditions, success_rolls, rng,
+                                    profile)
 
 
-def new_value_from_domain(domain: Domain):
+# Actions that get_random_action never picks while the matching buff is up, in mask bit order:
+# waste_not, inner_quiet, name_elements, veneration, great_strides, innovation, manipulation
+_BLOCKED_BY_BUFF = (ActionClasses.PrudentTouch, ActionClasses.InnerQuiet,
+                    ActionClasses.NameoftheElements, ActionClasses.Veneration,
+                    ActionClasses.GreatStrides, ActionClasses.Innovation,
+                    ActionClasses.Manipulation)
+# Buff (mask bit) each buff action starts and for how many turns, as counted by
+# generate_new_individual
+_BUFF_TURNS = {ActionClasses.WasteNot: (0, 5), ActionClasses.WasteNot2: (0, 9),
+               ActionClasses.NameoftheElements: (2, 4), ActionClasses.Veneration: (3, 5),
+               ActionClasses.GreatStrides: (4, 4), ActionClasses.Innovation: (5, 5),
+               ActionClasses.Manipulation: (6, 6)}
+
+
+def _allowed_tables(candidates: Sequence) -> List[List[int]]:
+    """For every buff mask, the sorted indices of the candidates that mask does not block."""
+    blocked_index = [candidates.index(which) if which in candidates else None
+                     for which in _BLOCKED_BY_BUFF]
+    tables = list()
+    for mask in range(1 << len(_BLOCKED_BY_BUFF)):
+        blocked = {index for bit, index in enumerate(blocked_index)
+                   if mask >> bit & 1 and index is not None}
+        tables.append([index for index in range(len(candidates)) if index not in blocked])
+    return tables
+
+
+_NORMAL_ALLOWED = _allowed_tables(TestResources.actions)
+_GOOD_ALLOWED = _allowed_tables(TestResources.good_condition_actions)
+
+
+def _step_table(success_roll, condition) -> dict:
+    """Every action's gene at this step, CP cost and durability cost without and with Waste Not.
+
+    Genes are immutable tuples, so every individual that picks the same action at a step shares one.
+    """
+    table = dict()
+    for which in ACTIONS:
+        cp_cost = ceil(which.CP_COST / 2) if condition == "pliant" else which.CP_COST
+        if condition == "sturdy":
+            durability_costs = (ceil(which.DURABILITY_COST / 2), ceil(which.DURABILITY_COST / 4))
+        else:
+            durability_costs = (which.DURABILITY_COST, ceil(which.DURABILITY_COST / 2))
+        table[which] = ((which, success_roll, condition), cp_cost) + durability_costs
+    return table
+
+
+def generate_population_bulk(population_size: int, size: int, material_conditions, success_rolls,
+                             rng: Optional[Rng] = None, profile: StatProfile = DEFAULT_PROFILE,
+                             prefixes: Optional[Sequence[Sequence]] = None) -> Population:
+    """Generate a whole population at once with the heuristics of generate_new_individual.
+
+    Works step by step across the population: the random draws for a step come in one batch, buffs
+    are tracked as the step they expire on, action costs are looked up per material condition, and
+    get_random_action's rejection loop is replaced by tables of the actions each buff mask allows,
+    so every pick is one draw. The crafts follow the same distribution as calling
+    generate_new_individual population_size times. If prefixes is given, individual j starts with
+    the actions in prefixes[j] (tracked by the same heuristics) and only the rest is random.
+    """
+    rng = default_rng(rng)
+    max_cp = profile.crafter.cp
+    max_durability = profile.recipe.durability
+    mend, manipulation_action = TestResources.low_durability_actions
+    reflect, inner_quiet_action = ActionClasses.Reflect, ActionClasses.InnerQuiet
+    byregot = ActionClasses.ByregotsBlessing
+
+    genes: List[list] = [list() for _ in range(population_size)]
+    # Per individual, the step each buff (in mask bit order) expires on. Bit 1, Inner Quiet, is
+    # on or off.
+    expires = [[0] * 7 for _ in range(population_size)]
+    cp = [max_cp] * population_size
+    durability = [max_durability] * population_size
+
+    for step in range(size):
+        condition = material_conditions[step]
+        draws = rng.uniforms(population_size)
+        step_table = _step_table(success_rolls[step], condition)
+        if condition == "good":
+            candidates, tables = TestResources.good_condition_actions, _GOOD_ALLOWED
+        else:
+            candidates, tables = TestResources.actions, _NORMAL_ALLOWED
+        count = len(candidates)
+        for j in range(population_size):
+            buffs = expires[j]
+            if prefixes is not None and step < len(prefixes[j]):
+                random_action = prefixes[j][step]
+            elif step == 0:  # Opening actions should always be used and can only be used now
+                random_action = TestResources.first_step_actions[int(draws[j] * 2)]
+            elif durability[j] <= 25 and mend.CP_COST > cp[j] and \
+                    manipulation_action.CP_COST <= cp[j]:
+                random_action = manipulation_action
+            else:
+                # low CP ratio will result in lower CP skills being chosen
+                limit = ceil(count * (cp[j] / max_cp)) if cp[j] < max_cp else count
+                allowed = tables[(buffs[0] > step) | buffs[1] << 1 | (buffs[2] > step) << 2
+                                 | (buffs[3] > step) << 3 | (buffs[4] > step) << 4
+                                 | (buffs[5] > step) << 5 | (buffs[6] > step) << 6]
+                # Never empty, the cheapest action is never blocked
+                draw = int(draws[j] * max(bisect_left(allowed, limit), 1))
+                random_action = candidates[allowed[draw]]
+
+            buff = _BUFF_TURNS.get(random_action)
+            if buff is not None:
+                buffs[buff[0]] = step + buff[1]
+            elif random_action is reflect or random_action is inner_quiet_action:
+                buffs[1] = 1
+            elif random_action is byregot:
+                buffs[1] = 0
+            elif random_action is mend:
+                durability[j] = min(durability[j] + 30, max_durability)
+            gene, cp_cost, durability_cost, waste_not_cost = step_table[random_action]
+            cp[j] -= cp_cost
+            durability[j] -= waste_not_cost if buffs[0] > step else durability_cost
+            genes[j].append(gene)
+            if buffs[6] > step:
+                durability[j] = min(durability[j] + 5, max_durability)
+    return [Individual(value) for value in genes]
+
+
+def new_value_from_domain(domain: Domain, rng: Optional[Rng] = None):
     """Generate a new key value randomly from the domain."""
-    return domain[randint(0, len(domain)-1)]
+    return domain[default_rng(rng).randint(0, len(domain)-1)]
@@ -1,17 +1,42 @@
 """Interface and implimentations for a Genetic Algorithm."""
 
 
-from concurrent.futures import ThreadPoolExecutor
-from typing import Dict, Tuple, Union
-
-from dsecffxiv.algo.crossover import Crossover, Default_Crossover
-from dsecffxiv.algo.generation import generate_new_population
-from dsecffxiv.algo.mutation import Default_Mutation, Mutation
-from dsecffxiv.algo.score import Default_Score, Score
-from dsecffxiv.algo.selection import Default_Selection, Selection
+import heapq
+import os
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from functools import partial
+from time import perf_counter
+from typing import Deque, Dict, Iterable, List, Optional, Tuple, Union
+
+from dsecffxiv.algo.adaptive import AdaptiveController
+from dsecffxiv.algo.archive import (DEFAULT_RADIUS, DEFAULT_SELECTION, DEFAULT_TOURNAMENT_SIZE,
+                                    EliteArchive, select_from_archive)
+from dsecffxiv.algo.crossover import (Crossover, Default_Crossover, crossover_n_point,
+                                      crossover_n_point_into, crossover_n_point_rows)
+from dsecffxiv.algo.expected import score_expected
+from dsecffxiv.algo.local_search import hill_climb
+from dsecffxiv.algo.mutation import Default_Mutation, Mutation, mutate_each_row
+from dsecffxiv.algo.pareto import environmental_selection
+from dsecffxiv.algo.pipeline import DEFAULT_CHUNK, init_worker, score_encoded
+from dsecffxiv.algo.problem import CraftingProblem
+from dsecffxiv.algo.seeding import SeedingContext, seed_population
+from dsecffxiv.algo.score import Default_Score, Score, score_craft
+from dsecffxiv.algo.selection import Default_Selection, Selection, selection_tournament_index
+from dsecffxiv.algo.surrogate import SurrogateScreen
+from dsecffxiv.algo.trace import DEFAULT_CAPACITY, TraceBuffer, trace_population
 from dsecffxiv.algo.types.individual import Individual
+from dsecffxiv.algo.types.individual_pool import IndividualPool
 from dsecffxiv.algo.types.population import Population
+from dsecffxiv.algo.types.shared_population import SharedPopulation, score_shared_rows
+from dsecffxiv.sim_resources.Profile import DEFAULT_PROFILE
 from dsecffxiv.sim_resources.TestResources import generate_material_conditions, generate_success_values
+from dsecffxiv.utils.rng import Rng
+
+
+# Config keys that need a CraftingProblem
+CRAFTING_ONLY = ('archive_size', 'surrogate', 'seeding', 'local_search_elites', 'trace_elites',
+                 'adaptive')
 
 
 class GeneticAlgorithm():
@@ -19,59 +44,293 @@ class GeneticAlgorithm():
 
     def __init__(self, config: Dict):
         """Initialize with a config."""
-        self.config: Dict = config
+        # The adaptive controller retunes the operator rates in self.config, work on a copy so the
+        # caller's config keeps the rates that were asked for
+        self.config: Dict = dict(config) if config.get('adaptive', False) else config
 
         self.selection_func: Selection = Default_Selection
         self.mutation_func: Mutation = Default_Mutation
         self.crossover_func: Crossover = Default_Crossover
         self.score_func: Score = Default_Score
+        # Crafter and recipe stats to solve for, config['profile'] is a StatProfile
+        self.profile = config.get('profile', DEFAULT_PROFILE)
+        if self.profile != DEFAULT_PROFILE:
+            self.score_func = partial(score_craft, profile=self.profile)
+        # With config['objective'] set to 'expected' crafts are scored by their exact expected score
+        # over the success rolls, see algo/expected.py
+        if config.get('objective', 'score') == 'expected':
+            self.score_func = partial(score_expected, profile=self.profile)
+
+        # Every random draw of the run comes from this stream, so a seeded config is reproducible
+        self.rng = Rng(config.get('seed'))
 
         self.material_conditions = generate_material_conditions(
-            config['population_size'])
-        self.success_rolls = generate_success_values(config['population_size'])
+            config['population_size'], self.rng)
+        self.success_rolls = generate_success_values(config['population_size'], self.rng)
+        # What is being solved, config['problem'] or else crafting for the config's crafter and
+        # recipe, see algo/problem.py. Scoring goes through it for other problems, mutation always
+        # does, so new actions are drawn for the problem's own crafter and recipe, and seeding does
+        # for other problems.
+        self.problem = config.get('problem') or CraftingProblem(
+            config['individual_size'], self.material_conditions, self.success_rolls, self.profile,
+            self.score_func)
+        if not isinstance(self.problem, CraftingProblem):
+            used = [key for key in CRAFTING_ONLY if config.get(key)]
+            if config.get('objective', 'score') != 'score':
+                used.append('objective')
+            if used:
+                raise ValueError('Only the crafting problem supports {0}'.format(', '.join(used)))
+            self.score_func = self.problem.score
+        self.mutation_func = self.problem.mutate
 
         self.population: Union[Population, None] = None
+        # Scores of the population as last ranked, aligned with it. None under the pareto objective.
+        self.scores: Optional[List[float]] = None
+        self.local_search_evaluations = 0
+        # Individuals to start from instead of random ones, see warm_start
+        self.seed_individuals: Population = list()
+        # With config['adaptive'] set the operator rates in self.config are retuned every generation
+        self.controller = AdaptiveController(config) if config.get('adaptive', False) else None
+        # With config['surrogate'] set more children are bred than simulated, see algo/surrogate.py
+        if config.get('surrogate', False) and config.get('objective', 'score') == 'pareto':
+            raise ValueError(
+                'The surrogate learns a scalar score, it does not support the pareto objective')
+        self.surrogate = SurrogateScreen(config, self.profile) \
+            if config.get('surrogate', False) else None
+        # With config['trace_elites'] set that many elites are traced step by step when they
+        # change, see algo/trace.py
+        self.traces = TraceBuffer(config.get('trace_capacity', DEFAULT_CAPACITY)) \
+            if config.get('trace_elites', 0) > 0 else None
+        self.generation = 0
+        # With config['archive_size'] set niche champions are kept apart from the population and
+        # config['archive_selection'] of the parents are drawn from them, see algo/archive.py
+        if config.get('archive_size', 0) > 0 and config.get('objective', 'score') == 'pareto':
+            raise ValueError(
+                'The elite archive needs a scalar score, it does not support the pareto objective')
+        self.archive = EliteArchive(config['archive_size'],
+                                    config.get('archive_radius', DEFAULT_RADIUS)) \
+            if config.get('archive_size', 0) > 0 else None
+        self.archive_parents: Population = list()
+        self._archive_offered: Dict[int, Individual] = dict()
+        # Culled individuals are recycled as the next children unless config['pool_individuals'] is
+        # False, see algo/types/individual_pool.py. Only the default crossover breeds into them.
+        self.pool = IndividualPool(2 * config['selection_size'], self.problem.size) \
+            if config.get('pool_individuals', True) else None
 
     def step(self):
         """Perform one generation of the GA."""
         # Init population
         if self.population is None:
-            self.population = generate_new_population(
-                self.config['population_size'],
-                self.config['domain'],
-                self.config['individual_size'],
-                self.material_conditions,
-                self.success_rolls)
+            self.population = self.new_population()
 
-        # Score population
-        self.population.sort(key=self.score_func, reverse=True)
+        # Score population and cull population down to size
+        self.rank_and_cull()
 
-        # Cull population down to size
-        self.population = self.population[slice(
-            0, self.config['population_size'])]
+        self.polish_elites()
+        self.trim_population()
+        self.update_archive()
+        self.trace_elites()
+        self.adapt()
 
         # Selection
+        children = self.screen_children(self.make_children(self.pairs_to_breed(), self.rng))
+        if self.config['replace_pop']:
+            self.recycle(self.population)
+            self.population = children
+        else:
+            self.population = self.population + children
+
+    def update_archive(self):
+        """Offer the ranked survivors to the archive and snapshot its champions for selection."""
+        if self.archive is None or self.scores is None:
+            return
+        # Survivors offered last generation already had their chance, holding on to them keeps
+        # their ids unique
+        offered = self._archive_offered
+        for indiv, score in zip(self.population, self.scores):
+            if offered.get(id(indiv)) is not indiv:
+                self.archive.offer(indiv, score)
+        self._archive_offered = {id(indiv): indiv for indiv in self.population}
+        self.archive_parents = self.archive.ranked()
+
+    def trace_elites(self):
+        """Trace the top trace_elites of the sorted population, counting generations."""
+        if self.traces is not None:
+            trace_population(self.traces, self.population, self.generation,
+                             self.config['trace_elites'], self.profile)
+        self.generation += 1
+
+    def reconfigure(self, config: Dict):
+        """Switch to a new config between generations.
+
+        The adaptive controller is rebuilt from it, so new operator rates become the ones it returns
+        to and config['adaptive'] can be switched on or off mid run.
+        """
+        adaptive = config.get('adaptive', False)
+        if adaptive and not isinstance(self.problem, CraftingProblem):
+            raise ValueError('Only the crafting problem supports adaptive')
+        self.config = dict(config) if adaptive else config
+        self.controller = AdaptiveController(config) if adaptive else None
+
+    def adapt(self):
+        """Let the adaptive controller retune the operators, partially restarting a stalled run."""
+        if self.controller is None:
+            return
+        if self.controller.update(self.config, self.population,
+                                  self.score_func(self.population[0])):
+            self.restart()
+
+    def restart(self):
+        """Keep the controller's number of elites and reseed the rest of the population."""
+        elites = self.population[:self.controller.restart_elites]
+        self.population = elites + self.seed(self.config['population_size'] - len(elites), elites)
+        # Selection expects the population sorted best first
+        self.rank_and_cull()
+
+    def warm_start(self, population: Population):
+        """Start the first generation from these individuals, filling the rest of it randomly.
+
+        Only takes effect before the first step. The individuals must use this run's success rolls
+        and material conditions.
+        """
+        self.seed_individuals = list(population[:self.config['population_size']])
+
+    def new_population(self) -> Population:
+        """Build the first generation, the warm start individuals followed by seeded ones."""
+        return self.seed_individuals + self.seed(
+            self.config['population_size'] - len(self.seed_individuals), self.seed_individuals)
+
+    def seed(self, count: int, elites: Population) -> Population:
+        """Create count new individuals with the config['seeding'] strategies, or randomly."""
+        if not isinstance(self.problem, CraftingProblem):
+            return self.problem.random_population(count, self.rng)
+        context = SeedingContext(self.config['individual_size'], self.material_conditions,
+                                 self.success_rolls, self.profile, self.rng, elites)
+        return seed_population(context, count, self.config.get('seeding', dict()))
+
+    def pairs_to_breed(self) -> int:
+        """Pairs of children to breed, more than selection_size while a surrogate screens them."""
+        factor = self.surrogate.pool_factor() if self.surrogate is not None else 1
+        return self.config['selection_size'] * factor
+
+    def screen_children(self, children: Population) -> Population:
+        """Keep the 2 * selection_size children worth simulating, all without a surrogate."""
+        if self.surrogate is None:
+            return children
+        kept = self.surrogate.screen(children, 2 * self.config['selection_size'], self.rng)
+        kept_ids = {id(indiv) for indiv in kept}
+        self.recycle(indiv for indiv in children if id(indiv) not in kept_ids)
+        return kept
+
+    def recycle(self, culled: Iterable[Individual]):
+        """Hand culled individuals back to the pool, but not archive champions, still parents."""
+        if self.pool is None:
+            return
+        if self.archive is not None:
+            held = {id(entry[2]) for entry in self.archive.champions.values()}
+            culled = [indiv for indiv in culled if id(indiv) not in held]
+        self.pool.release(culled)
+
+    def select_parent(self, rng: Rng) -> Individual:
+        """Select a parent from the population, or now and then from the archive's champions."""
+        config = self.config
+        if self.archive_parents and rng.random() < config.get('archive_selection',
+                                                              DEFAULT_SELECTION):
+            return select_from_archive(self.archive_parents,
+                                       config.get('archive_tournament_size',
+                                                  DEFAULT_TOURNAMENT_SIZE), rng)
+        return self.selection_func(self.population, self.config['tournament_size'], rng)
+
+    def make_children(self, pair_count: int, rng: Rng) -> List[Individual]:
+        """Select, crossover and mutate pair_count pairs of children, drawing only from rng."""
         children = list()
-        for _ in range(self.config['selection_size']):
-            left = self.selection_func(
-                self.population, self.config['tournament_size'])
-            right = self.selection_func(
-                self.population, self.config['tournament_size'])
+        for _ in range(pair_count):
+            left = self.select_parent(rng)
+            right = self.select_parent(rng)
 
-            new_left, new_right = self.crossover_func(
-                (left, right), self.config['crossover_points'])
+            if self.pool is not None and self.crossover_func is crossover_n_point:
+                new_left, new_right = crossover_n_point_into(
+                    (left, right), (self.pool.acquire(), self.pool.acquire()),
+                    self.config['crossover_points'], rng)
+            else:
+                new_left, new_right = self.crossover_func(
+                    (left, right), self.config['crossover_points'], rng)
 
             self.mutation_func(
-                new_left, self.config['mutation_chance'], self.config['domain'])
+                new_left, self.config['mutation_chance'], self.config['domain'], rng)
             self.mutation_func(
-                new_right, self.config['mutation_chance'], self.config['domain'])
+                new_right, self.config['mutation_chance'], self.config['domain'], rng)
 
             children.append(new_left)
             children.append(new_right)
-        if self.config['replace_pop']:
-            self.population = children
-        else:
-            self.population = self.population + children
+        return children
+
+    def rank_and_cull(self):
+        """Sort the population best first and cull it down to population_size.
+
+        With config['objective'] set to 'pareto' the population is ranked by non-dominated front and
+        crowding distance instead of by score_func.
+        """
+        if self.config.get('objective', 'score') == 'pareto':
+            self.population = environmental_selection(self.population,
+                                                      self.config['population_size'], self.profile)
+            self.scores = None
+            return
+
+        # Score each individual once and keep the scores of the survivors for stats
+        start = perf_counter()
+        scores = self.problem.score_batch(self.population)
+        if self.surrogate is not None:
+            self.surrogate.observe(self.population, scores, perf_counter() - start)
+        ranking = sorted(range(len(scores)), key=scores.__getitem__, reverse=True)
+        order = ranking[:self.config['population_size']]
+        self.recycle(self.population[index] for index in ranking[self.config['population_size']:])
+        self.population = [self.population[index] for index in order]
+        self.scores = [scores[index] for index in order]
+
+    def generation_stats(self) -> Tuple[float, float, float]:
+        """Min, max and mean score of the population as of its last ranking."""
+        scores = self.scores
+        if scores is None:
+            scores = [self.score_func(indiv) for indiv in self.population]
+        return min(scores), max(scores), sum(scores) / len(scores)
+
+    def trim_population(self):
+        """If truncate_genomes is set, drop the dead tail of every scored survivor.
+
+        Crossover and mutation then only touch the steps the crafts actually used. truncate_slack
+        steps are kept past the end, a child can outlast both parents and needs genes to do it with,
+        trimming to the exact end stops the population from ever growing longer crafts.
+        """
+        if self.config.get('truncate_genomes', False):
+            slack = self.config.get('truncate_slack', 10)
+            for indiv in self.population:
+                indiv.trim(slack)
+
+    def polish_elites(self):
+        """Run memetic local search on the top local_search_elites of the sorted population.
+
+        local_search_budget neighbor evaluations are shared between the elites each generation.
+        """
+        elite_count = min(self.config.get('local_search_elites', 0), len(self.population))
+        # Local search climbs the scalar score, it would pull a Pareto front towards one corner
+        if elite_count <= 0 or self.config.get('objective', 'score') == 'pareto':
+            return
+        budget_each = self.config.get('local_search_budget', 200) // elite_count
+        # Climb the score the population is ranked by, or elites could fall below the ones
+        # after them
+        expected = self.config.get('objective', 'score') == 'expected'
+        climb_score = self.score_func if expected else None
+        for index in range(elite_count):
+            polished, _, evaluations = hill_climb(self.population[index], budget_each, self.rng,
+                                                  self.profile, climb_score)
+            self.population[index] = polished
+            self.local_search_evaluations += evaluations
+        # Elites only ever improve, so re-sorting them keeps the whole population sorted
+        elite_scores = [self.score_func(indiv) for indiv in self.population[0:elite_count]]
+        order = sorted(range(elite_count), key=elite_scores.__getitem__, reverse=True)
+        self.population[0:elite_count] = [self.population[index] for index in order]
+        self.scores[0:elite_count] = [elite_scores[index] for index in order]
 
 
 class ThreadedGeneticAlgorithm(GeneticAlgorithm):
@@ -81,56 +340,295 @@ class ThreadedGeneticAlgorithm(GeneticAlgorithm):
         """Initialize with a config."""
         super().__init__(config)
 
-        self.thread_pool = ThreadPoolExecutor(64)
+        worker_count = config.get('worker_count', 64)
+        self.thread_pool = ThreadPoolExecutor(worker_count)
+        # One independent stream per worker, no two threads ever draw from the same generator
+        self.worker_rngs = self.rng.spawn(worker_count)
 
     def step(self):
         """Perform one generation of the GA."""
         # Init population
         if self.population is None:
-            self.population = generate_new_population(
-                self.config['population_size'],
-                self.config['domain'],
-                self.config['individual_size'],
-                self.material_conditions,
-                self.success_rolls)
+            self.population = self.new_population()
 
             # Score init population
-            self.population.sort(key=self.score_func, reverse=True)
+            self.rank_and_cull()
 
-        def do_selection_crossover_mutate() -> Tuple[Individual, Individual]:
-            left = self.selection_func(
-                self.population, self.config['tournament_size'])
-            right = self.selection_func(
-                self.population, self.config['tournament_size'])
+        # Selection, split evenly over the workers. Each worker always gets the same stream and the
+        # results are gathered in submission order, so a seeded run does not depend on thread
+        # timing.
+        worker_count = len(self.worker_rngs)
+        pairs_each, remainder = divmod(self.pairs_to_breed(), worker_count)
+        futures = [self.thread_pool.submit(self.make_children,
+                                           pairs_each + (1 if i < remainder else 0), rng)
+                   for i, rng in enumerate(self.worker_rngs)]
 
-            new_left, new_right = self.crossover_func(
-                (left, right), self.config['crossover_points'])
+        children = list()
+        for future in futures:
+            children.extend(future.result())
+        children = self.screen_children(children)
+        if self.config['replace_pop']:
+            self.recycle(self.population)
+            self.population = children
+        else:
+            self.population = self.population + children
 
-            self.mutation_func(
-                new_left, self.config['mutation_chance'], self.config['domain'])
-            self.mutation_func(
-                new_right, self.config['mutation_chance'], self.config['domain'])
+        # Score population and cull population down to size
+        self.rank_and_cull()
 
-            return (new_left, new_right)
+        self.polish_elites()
+        self.trim_population()
+        self.update_archive()
+        self.trace_elites()
+        self.adapt()
 
-        # Selection
-        children = list()
-        # for _ in range(self.config['selection_size']):
-        futures = {self.thread_pool.submit(
-            do_selection_crossover_mutate): i for i in range(self.config['selection_size'])}
 
+class SharedMemoryGeneticAlgorithm(GeneticAlgorithm):
+    """Genetic Algorithm with its population in shared memory, scored in worker processes.
+
+    Parents and children live as rows of one SharedPopulation, workers attach to it and write their
+    scores in place, so nothing but row ranges crosses the process boundary. Selection, crossover
+    and mutation use the row based versions of the default operators.
+    """
+
+    def __init__(self, config: Dict):
+        """Initialize with a config."""
+        if config.get('objective', 'score') != 'score':
+            raise ValueError(
+                'SharedMemoryGeneticAlgorithm only supports the scalar score objective')
+        if config.get('archive_size', 0) > 0:
+            raise ValueError('SharedMemoryGeneticAlgorithm does not support the elite archive')
+        if config.get('surrogate', False):
+            raise ValueError('SharedMemoryGeneticAlgorithm does not support surrogate screening')
+        if config.get('problem') is not None and not isinstance(config['problem'], CraftingProblem):
+            raise ValueError('SharedMemoryGeneticAlgorithm only solves the crafting problem')
+        self._population_cache: Union[Population, None] = None
+        self.shared: Union[SharedPopulation, None] = None
+        super().__init__(config)
+        # Children are bred into shared memory rows, never into Individuals
+        self.pool = None
+
+        self.worker_count = config.get('worker_count', os.cpu_count() or 1)
+        self.process_pool = ProcessPoolExecutor(self.worker_count)
+        self.shared = SharedPopulation.create(
+            config['population_size'] + 2 * config['selection_size'], config['individual_size'],
+            self.success_rolls, self.material_conditions)
+
+    @property
+    def population(self) -> Union[Population, None]:
+        """Decode the current (sorted) population, only done when someone asks for it."""
+        if self._population_cache is None and self.shared is not None and len(self.shared) > 0:
+            self._population_cache = self.shared.to_population()
+        return self._population_cache
+
+    @population.setter
+    def population(self, value: Union[Population, None]):
+        """Replace the population, writing the individuals into shared memory and scoring them."""
+        self._population_cache = None
+        if value is None or self.shared is None:
+            return
+        for index, indiv in enumerate(value):
+            self.shared.set_individual(index, indiv, self.rng, self.profile)
+        self.shared.size = len(value)
+        self._score_rows(0, len(value))
+        self._sort_and_cull(range(len(value)))
+
+    def step(self):
+        """Perform one generation of the GA."""
+        shared = self.shared
+        config = self.config
+        if len(shared) + 2 * config['selection_size'] > shared.capacity:
+            raise ValueError('Shared population holds {0} rows, {1} parents and {2} pairs do not '
+                             'fit'.format(shared.capacity, len(shared), config['selection_size']))
+
+        # Init population
+        if len(shared) == 0:
+            self.population = self.new_population()
+
+        # Selection, writing children straight into the rows after the parents
+        parent_count = len(shared)
+        for pair in range(config['selection_size']):
+            left = selection_tournament_index(parent_count, config['tournament_size'], self.rng)
+            right = selection_tournament_index(parent_count, config['tournament_size'], self.rng)
+            children = (parent_count + 2 * pair, parent_count + 2 * pair + 1)
+            crossover_n_point_rows(shared, (left, right), children, config['crossover_points'],
+                                   self.rng)
+            mutate_each_row(shared, children[0], config['mutation_chance'], self.rng, self.profile)
+            mutate_each_row(shared, children[1], config['mutation_chance'], self.rng, self.profile)
+        shared.size = parent_count + 2 * config['selection_size']
+
+        # Score children in the worker processes
+        self._score_rows(parent_count, len(shared))
+
+        # Sort and cull population down to size
+        first = parent_count if config['replace_pop'] else 0
+        candidates = range(first, len(shared))
+        self._sort_and_cull(candidates)
+        self._population_cache = None
+
+        self.polish_elites()
+        self.trace_elites()
+        self.adapt()
+
+    def polish_elites(self):
+        """Run memetic local search on the top rows, writing improvements back to shared memory."""
+        elite_count = min(self.config.get('local_search_elites', 0), len(self.shared))
+        if elite_count <= 0:
+            return
+        budget_each = self.config.get('local_search_budget', 200) // elite_count
+        for index in range(elite_count):
+            polished, score, evaluations = hill_climb(self.shared.individual(index), budget_each,
+                                                      self.rng, self.profile)
+            self.local_search_evaluations += evaluations
+            if score > self.shared.scores[index]:
+                self.shared.set_individual(index, polished, self.rng, self.profile)
+                self.shared.scores[index] = score
+        self._sort_and_cull(range(len(self.shared)))
+        self._population_cache = None
+
+    def generation_stats(self) -> Tuple[float, float, float]:
+        """Min, max and mean score of the population, read straight from the shared score vector."""
+        scores = self.shared.scores[:len(self.shared)].tolist()
+        return min(scores), max(scores), sum(scores) / len(scores)
+
+    def _score_rows(self, start: int, stop: int):
+        """Score rows [start, stop) in place, split evenly over the worker processes."""
+        chunk = max(-(-(stop - start) // self.worker_count), 1)
+        futures = [self.process_pool.submit(score_shared_rows, self.shared.handle, chunk_start,
+                                            min(chunk_start + chunk, stop), self.score_func)
+                   for chunk_start in range(start, stop, chunk)]
         for future in futures:
-            new_left, new_right = future.result()
-            children.append(new_left)
-            children.append(new_right)
+            future.result()
+
+    def _sort_and_cull(self, candidates: Iterable[int]):
+        """Keep the best population_size candidate rows, best first."""
+        scores = self.shared.scores
+        order = sorted(candidates, key=scores.__getitem__, reverse=True)
+        self.shared.reorder(order[:self.config['population_size']])
+
+    def close(self):
+        """Stop the worker processes and free the shared memory."""
+        self.process_pool.shutdown()
+        if self.shared is not None:
+            self.shared.close()
+            self.shared = None
+
+
+class PipelinedGeneticAlgorithm(GeneticAlgorithm):
+    """Genetic Algorithm that overlaps breeding, scoring and culling.
+
+    The main thread breeds config['pipeline_chunk'] children at a time and hands every chunk
+    straight to a pool of scoring processes, with at most config['pipeline_depth'] chunks in flight.
+    Once that many are in flight breeding waits for the oldest one, and each scored chunk is culled
+    into a heap of the best population_size candidates as soon as it is collected. A generation
+    then takes about as long as its slowest stage instead of the sum of them. Chunks are collected
+    in the order they were submitted, so a seeded run does not depend on process timing.
+    """
+
+    def __init__(self, config: Dict):
+        """Initialize with a config."""
+        if config.get('objective', 'score') == 'pareto':
+            raise ValueError('PipelinedGeneticAlgorithm does not support the pareto objective')
+        if config.get('surrogate', False):
+            raise ValueError('PipelinedGeneticAlgorithm does not support surrogate screening')
+        super().__init__(config)
+
+        self.worker_count = config.get('worker_count', os.cpu_count() or 1)
+        self.chunk_size = max(config.get('pipeline_chunk', DEFAULT_CHUNK), 1)
+        self.depth = max(config.get('pipeline_depth', 2 * self.worker_count), 1)
+        self.process_pool = ProcessPoolExecutor(self.worker_count, initializer=init_worker,
+                                                initargs=(self.problem,))
+        # Deepest the queue got and how long breeding waited on it, for tuning pipeline_depth
+        self.max_in_flight = 0
+        self.stall_seconds = 0.0
+
+    def step(self):
+        """Perform one generation of the GA."""
+        # Init population
+        if self.population is None:
+            population = self.new_population()
+            chunks = (population[start:start + self.chunk_size]
+                      for start in range(0, len(population), self.chunk_size))
+            self._pipeline(chunks, list(), list())
+
+        # Breed, score and cull in one pass, parents compete with their cached scores
         if self.config['replace_pop']:
-            self.population = children
+            parents = self.population
+            self._pipeline(self._bred_chunks(), list(), list())
+            self.recycle(parents)
         else:
-            self.population = self.population + children
+            self._pipeline(self._bred_chunks(), self.population, self.scores)
+
+        self.polish_elites()
+        self.trim_population()
+        self.update_archive()
+        self.trace_elites()
+        self.adapt()
+
+    def _bred_chunks(self) -> Iterable[Population]:
+        """Breed this generation's children a chunk at a time, drawing from self.rng in order."""
+        remaining = self.pairs_to_breed()
+        pairs_each = max(self.chunk_size // 2, 1)
+        while remaining > 0:
+            count = min(pairs_each, remaining)
+            remaining -= count
+            yield self.make_children(count, self.rng)
+
+    def _pipeline(self, chunks: Iterable[Population], parents: Population,
+                  parent_scores: List[float]):
+        """Score chunks in the workers as they are bred, keeping the population_size best ones.
+
+        Ties go to the earlier candidate, parents before children, like the stable sort of
+        rank_and_cull.
+        """
+        size = self.config['population_size']
+        # (score, -arrival, individual), the worst candidate on top
+        heap: List[Tuple[float, int, Individual]] = list()
+        arrival = 0
+        # Culled parents may still be selected by chunks not yet bred, so they are only recycled
+        # at the end
+        culled: Population = list()
+
+        def offer(indiv: Individual, score: float):
+            nonlocal arrival
+            entry = (score, -arrival, indiv)
+            arrival += 1
+            if len(heap) < size:
+                heapq.heappush(heap, entry)
+            elif entry[:2] > heap[0][:2]:
+                culled.append(heapq.heapreplace(heap, entry)[2])
+            else:
+                culled.append(indiv)
+
+        def collect():
+            chunk, future = in_flight.popleft()
+            for indiv, (score, length) in zip(chunk, future.result()):
+                indiv.effective_length = length
+                offer(indiv, score)
+
+        for indiv, score in zip(parents, parent_scores):
+            offer(indiv, score)
+        in_flight: Deque[Tuple[Population, Future]] = deque()
+        for chunk in chunks:
+            genomes = [self.problem.encode(indiv) for indiv in chunk]
+            in_flight.append((chunk, self.process_pool.submit(score_encoded, genomes)))
+            self.max_in_flight = max(self.max_in_flight, len(in_flight))
+            # Backpressure, wait for the oldest chunk once the queue is full
+            if len(in_flight) >= self.depth:
+                start = perf_counter()
+                collect()
+                self.stall_seconds += perf_counter() - start
+            # Cull whatever has already come back
+            while in_flight and in_flight[0][1].done():
+                collect()
+        while in_flight:
+            collect()
 
-        # Score population
-        self.population.sort(key=self.score_func, reverse=True)
+        self.recycle(culled)
+        heap.sort(reverse=True)
+        self.population = [entry[2] for entry in heap]
+        self.scores = [entry[0] for entry in heap]
 
-        # Cull population down to size
-        self.population = self.population[slice(
-            0, self.config['population_size'])]
+    def close(self):
+        """Stop the worker processes."""
+        self.process_pool.shutdown()
@@ -0,0 +1,83 @@
+"""Rolling per generation history of an interactive run.
+
+    A session only keeps a summary (min, max and mean score, and how long the step took) of its
+    most recent generations, never the populations themselves. Once the window is full the oldest
+    summary is dropped, or first appended to a stats directory (see algo/report.py) when the
+    history spills to disk. Plots read the spilled generations back, so they still cover the whole
+    run.
+"""
+
+from collections import deque
+from typing import Deque, List, NamedTuple, Optional
+
+from dsecffxiv.algo.report import StatsWriter, read_stats
+
+HISTORY_WINDOW = 1000
+
+
+class GenerationSummary(NamedTuple):
+    """Scores and timing of one generation."""
+
+    generation: int
+    min: float
+    max: float
+    mean: float
+    nanoseconds: int
+
+
+class RollingHistory():
+    """The last window generation summaries, older ones are dropped or spilled to a directory."""
+
+    def __init__(self, window: int = HISTORY_WINDOW, spill_directory: Optional[str] = None):
+        """Start an empty history, replacing any stats already in spill_directory."""
+        self.window = max(window, 1)
+        self.spill_directory = spill_directory
+        self.summaries: Deque[GenerationSummary] = deque()
+        self.generations = 0
+        self.spilled = 0
+        self._writer = StatsWriter(spill_directory) if spill_directory else None
+
+    def append(self, min_score: float, max_score: float, mean_score: float,
+               nanoseconds: int) -> None:
+        """Record the next generation, dropping or spilling the oldest one if the window is full."""
+        self.summaries.append(GenerationSummary(self.generations, min_score, max_score, mean_score,
+                                                nanoseconds))
+        self.generations += 1
+        self._evict()
+
+    def resize(self, window: int) -> None:
+        """Change the window size, dropping or spilling what no longer fits."""
+        self.window = max(window, 1)
+        self._evict()
+
+    def _evict(self) -> None:
+        """Drop or spill summaries until the window fits."""
+        while len(self.summaries) > self.window:
+            oldest = self.summaries.popleft()
+            if self._writer is not None:
+                self._writer.append(0, oldest.generation, oldest.min, oldest.max, oldest.mean,
+                                    oldest.nanoseconds / 1e9)
+                self.spilled += 1
+
+    def series(self, column: str) -> List[float]:
+        """One of min, max, mean or seconds for every generation still known, spilled ones first."""
+        values: List[float] = list()
+        if self._writer is not None and self.spilled:
+            self._writer.flush()
+            values.extend(read_stats(self.spill_directory, (column,))[column])
+        if column == 'seconds':
+            values.extend(summary.nanoseconds / 1e9 for summary in self.summaries)
+        else:
+            values.extend(getattr(summary, column) for summary in self.summaries)
+        return values
+
+    def first_generation(self) -> int:
+        """Generation number of the first value series returns."""
+        if self.spilled:
+            return 0
+        return self.summaries[0].generation if self.summaries else self.generations
+
+    def close(self) -> None:
+        """Flush the spilled summaries."""
+        if self._writer is not None:
+            self._writer.close()
@@ -0,0 +1,122 @@
+"""Memetic local search for polishing elite crafts.
+
+    A first improvement hill climber over single gene swaps, insertions and deletions. The state
+    before every step of the current genome is cached, so each neighbor is only re-simulated from
+    the first step it changed. With a score_func, e.g. the expected score, neighbors are judged by
+    it instead and simulated in full.
+"""
+
+from typing import List, Optional, Tuple
+
+from dsecffxiv.algo.score import Score, score_craft_from
+from dsecffxiv.algo.types import Individual
+from dsecffxiv.sim_resources.Profile import DEFAULT_PROFILE, StatProfile
+from dsecffxiv.sim_resources.State import State
+from dsecffxiv.sim_resources.TestResources import get_random_action
+from dsecffxiv.utils.rng import Rng, default_rng
+
+SWAP, INSERT, DELETE = range(3)
+
+
+def prefix_states(genes: List[tuple], cached: Optional[List[State]] = None, start: int = 0,
+                  profile: StatProfile = DEFAULT_PROFILE) -> Tuple[List[State], float, int]:
+    """Simulate genes, returning the state before each step, the score and how many steps ran.
+
+    If cached states for a genome that only differs from step start onward are given, the steps
+    before start are reused instead of being simulated again.
+    """
+    if cached:
+        states = cached[:start]
+        state = cached[start].copy()
+    else:
+        states = list()
+        state = State(profile)
+        start = 0
+    score = 0
+    for step in range(start, len(genes)):
+        which, success_roll, material_condition = genes[step]
+        states.append(state.copy())
+        state.update_success(success_roll)
+        state.update_condition(material_condition)
+        state = which.execute(state)
+        state.step()
+        score = state.evaluate()
+        if score != 0:
+            return states, score, step + 1
+    return states, score, len(genes)
+
+
+def _neighbor(genes: List[tuple], move: int, index: int, state: State,
+              rng: Rng) -> Optional[List[tuple]]:
+    """Apply a move at index, keeping the per step rolls and conditions. None for a no-op."""
+    actions = [gene[0] for gene in genes]
+    if move == SWAP:
+        if index + 1 >= len(actions) or actions[index] is actions[index + 1]:
+            return None
+        actions[index], actions[index + 1] = actions[index + 1], actions[index]
+    elif move == INSERT:
+        # The cached state knows the real CP and durability at this step, so the new action fits
+        # them. Keep at least 1 CP in the heuristic so it can still fall back on the free actions.
+        actions.insert(index, get_random_action(index, genes[index][2], 0, False, 0, 0, 0, 0, 0,
+                                                max(state.cp, 1), state.durability, rng,
+                                                state.constants.max_cp))
+        actions.pop()
+    else:
+        del actions[index]
+        last = len(genes) - 1
+        constants = state.constants
+        actions.append(get_random_action(last, genes[last][2], 0, False, 0, 0, 0, 0, 0,
+                                         constants.max_cp, constants.max_durability, rng,
+                                         constants.max_cp))
+    return [(which, gene[1], gene[2]) for which, gene in zip(actions, genes)]
+
+
+def hill_climb(indiv: Individual, budget: int, rng: Optional[Rng] = None,
+               profile: StatProfile = DEFAULT_PROFILE,
+               score_func: Optional[Score] = None) -> Tuple[Individual, float, int]:
+    """Polish an individual with first improvement local search.
+
+    Tries at most budget neighbors and returns the best individual found (the original if nothing
+    beat it), its score and how many neighbors were evaluated. Scores are the sampled roll score
+    unless score_func is given.
+    """
+    rng = default_rng(rng)
+    genes = list(indiv.value)
+    states, best_score, steps_run = prefix_states(genes, profile=profile)
+    if score_func is not None:
+        best_score = score_func(Individual(genes))
+    best_length = None
+    improved = False
+    evaluations = 0
+
+    while evaluations < budget:
+        # The first step must stay an opener, and moves past the end of the craft change nothing
+        moves = [(move, index) for index in range(1, steps_run) for move in (SWAP, INSERT, DELETE)]
+        rng.shuffle(moves)
+        accepted = False
+        for move, index in moves:
+            if evaluations >= budget:
+                break
+            candidate = _neighbor(genes, move, index, states[index], rng)
+            if candidate is None:
+                continue
+            evaluations += 1
+            if score_func is not None:
+                judged = Individual(candidate)
+                score = score_func(judged)
+            else:
+                score = score_craft_from(states[index].copy(), candidate, index)
+            if score > best_score:
+                genes, best_score, improved, accepted = candidate, score, True, True
+                if score_func is not None:
+                    best_length = judged.effective_length
+                states, _, steps_run = prefix_states(genes, states, index, profile)
+                break
+        if not accepted:
+            break  # Local optimum, or out of budget
+
+    if not improved:
+        return indiv, best_score, evaluations
+    polished = Individual(genes)
+    polished.effective_length = steps_run if best_length is None else best_length
+    return polished, best_score, evaluations
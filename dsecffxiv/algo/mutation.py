@@ -1,23 +1,48 @@
 """Methods for mutation operations in a GA."""
-from typing import Any
+from typing import Any, Optional
 
-from dsecffxiv.algo.generation import generate_new_individual
-from dsecffxiv.algo.types import Domain, Individual
-from dsecffxiv.utils.chance import chance
+from dsecffxiv.algo.encoding import ACTION_IDS
+from dsecffxiv.algo.types import Domain, Individual, SharedPopulation
+from dsecffxiv.sim_resources.Profile import DEFAULT_PROFILE, StatProfile
 from dsecffxiv.sim_resources.TestResources import get_random_action
+from dsecffxiv.utils.rng import Rng, default_rng
 
 Mutation = Any
 # Mutation = Callable[[Individual, Dict], Individual]
 
 
-def mutate_each(_indiv: Individual, percent_chance: float, domain: Domain):
-    """Iterate over all values in the indiv and possibly mutate them."""
-    for i in range(len(_indiv.value)):
-        if chance(percent_chance):
-            success_roll = _indiv.value[i][1]
-            material_condition = _indiv.value[i][2]
-            random_action = get_random_action(i, material_condition, 0, False, 0, 0, 0, 0, 0, 570, 50)
-            _indiv.value[i] = (random_action, success_roll, material_condition)
+def mutate_each(_indiv: Individual, percent_chance: float, domain: Domain,
+                rng: Optional[Rng] = None, profile: StatProfile = DEFAULT_PROFILE):
+    """Iterate over all values in the indiv and possibly mutate them.
+
+    New actions are drawn by the generation heuristics as if at full CP and durability for profile.
+    """
+    rng = default_rng(rng)
+    max_cp = profile.crafter.cp
+    max_durability = profile.recipe.durability
+    _indiv.objectives = None
+    # Genes past the end of an already scored craft are dead, only mutate the effective region
+    size = len(_indiv.value) if _indiv.effective_length is None else _indiv.effective_length
+    # Only draw for the genes that actually mutate instead of rolling a chance for every gene
+    for i in rng.bernoulli_indices(size, percent_chance):
+        success_roll = _indiv.value[i][1]
+        material_condition = _indiv.value[i][2]
+        random_action = get_random_action(i, material_condition, 0, False, 0, 0, 0, 0, 0, max_cp,
+                                          max_durability, rng, max_cp)
+        _indiv.value[i] = (random_action, success_roll, material_condition)
+
+
+def mutate_each_row(shared: SharedPopulation, index: int, percent_chance: float,
+                    rng: Optional[Rng] = None, profile: StatProfile = DEFAULT_PROFILE):
+    """Mutate a row of a shared population in place, with the odds and actions of mutate_each."""
+    rng = default_rng(rng)
+    max_cp = profile.crafter.cp
+    max_durability = profile.recipe.durability
+    row = shared.row(index)
+    for i in rng.bernoulli_indices(shared.width, percent_chance):
+        random_action = get_random_action(i, shared.material_conditions[i], 0, False, 0, 0, 0, 0, 0,
+                                          max_cp, max_durability, rng, max_cp)
+        row[i] = ACTION_IDS[random_action]
 
 
 Default_Mutation = mutate_each
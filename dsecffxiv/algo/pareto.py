@@ -0,0 +1,162 @@
+"""Multi-objective (NSGA-II style) ranking of crafts.
+
+    Instead of collapsing a craft into one score, each craft is judged on quality, CP left unused,
+    number of steps (macro length) and the chance that one of its stochastic actions fails. The
+    population is ranked into non-dominated fronts and ordered by (front, -crowding distance), so
+    the index based tournament selection doubles as NSGA-II's crowded comparison.
+"""
+
+from typing import Dict, List, NamedTuple, Sequence, Tuple
+
+from dsecffxiv.algo.types import Individual, Population
+from dsecffxiv.sim_resources.Profile import DEFAULT_PROFILE, StatProfile
+from dsecffxiv.sim_resources.State import State
+from dsecffxiv.sim_resources.Stochastic import success_probability
+
+
+class CraftObjectives(NamedTuple):
+    """Objective values of one craft."""
+
+    quality: int
+    cp_unused: int
+    steps: int
+    failure_risk: float
+    finished: bool
+
+    def maximize(self) -> Tuple[float, ...]:
+        """The objectives as a vector where bigger is always better."""
+        return (self.quality, -self.cp_unused, -self.steps, -self.failure_risk)
+
+
+def craft_objectives(indiv: Individual, profile: StatProfile = DEFAULT_PROFILE) -> CraftObjectives:
+    """Simulate a craft and compute its objectives, cached on the individual."""
+    if indiv.objectives is not None:
+        return indiv.objectives
+
+    state = State(profile)
+    success_chance = 1.0
+    steps = len(indiv.value)
+    for step, (which, success_roll, material_condition) in enumerate(indiv.value):
+        state.update_success(success_roll)
+        state.update_condition(material_condition)
+        success_chance *= success_probability(which, state)
+        state = which.execute(state)
+        state.step()
+        if state.evaluate() != 0:
+            steps = step + 1
+            break
+
+    finished = state.evaluate() > 0
+    indiv.effective_length = steps
+    indiv.objectives = CraftObjectives(state.quality, max(state.cp, 0), steps, 1 - success_chance,
+                                       finished)
+    return indiv.objectives
+
+
+def _dominates(left: Sequence[float], right: Sequence[float]) -> bool:
+    """Whether left is at least as good everywhere and better somewhere (maximizing)."""
+    better = False
+    for left_value, right_value in zip(left, right):
+        if left_value < right_value:
+            return False
+        if left_value > right_value:
+            better = True
+    return better
+
+
+def non_dominated_sort(vectors: Sequence[Tuple[float, ...]]) -> List[int]:
+    """Return the front rank (0 is best) of every vector.
+
+    Efficient non-dominated sort with binary search over the fronts: identical vectors are ranked
+    once, the unique vectors are presorted lexicographically (so only earlier vectors can dominate
+    later ones) and each is placed in the first front where nothing dominates it. Worst case
+    O(MN^2), usually far fewer comparisons.
+    """
+    unique = sorted(set(vectors), reverse=True)
+    fronts: List[List[Tuple[float, ...]]] = list()
+    rank_of: Dict[Tuple[float, ...], int] = dict()
+    for vector in unique:
+        low, high = 0, len(fronts)
+        while low < high:
+            middle = (low + high) // 2
+            # Newest members are the most likely to dominate, check them first
+            if any(_dominates(member, vector) for member in reversed(fronts[middle])):
+                low = middle + 1
+            else:
+                high = middle
+        if low == len(fronts):
+            fronts.append(list())
+        fronts[low].append(vector)
+        rank_of[vector] = low
+    return [rank_of[vector] for vector in vectors]
+
+
+def crowding_distances(vectors: Sequence[Tuple[float, ...]]) -> List[float]:
+    """Crowding distance of every vector within its front, the boundary vectors get infinity."""
+    size = len(vectors)
+    distances = [0.0] * size
+    if size <= 2:
+        return [float('inf')] * size
+    for objective in range(len(vectors[0])):
+        order = sorted(range(size),
+                       key=lambda index, objective=objective: vectors[index][objective])
+        low, high = vectors[order[0]][objective], vectors[order[-1]][objective]
+        distances[order[0]] = distances[order[-1]] = float('inf')
+        if high == low:
+            continue
+        for position in range(1, size - 1):
+            distances[order[position]] += \
+                (vectors[order[position + 1]][objective]
+                 - vectors[order[position - 1]][objective]) / (high - low)
+    return distances
+
+
+def rank_population(population: Population,
+                    profile: StatProfile = DEFAULT_PROFILE) -> List[Tuple[int, float]]:
+    """Compute the (front, crowding distance) of every individual.
+
+    Finished crafts always outrank unfinished ones, the unfinished are ranked in fronts of their own
+    after every finished front.
+    """
+    objectives = [craft_objectives(indiv, profile) for indiv in population]
+    ranks: List[Tuple[int, float]] = [(0, 0.0)] * len(population)
+    front_offset = 0
+    for finished in (True, False):
+        members = [index for index, values in enumerate(objectives) if values.finished is finished]
+        if not members:
+            continue
+        vectors = [objectives[index].maximize() for index in members]
+        fronts = non_dominated_sort(vectors)
+        by_front: Dict[int, List[int]] = dict()
+        for position, front in enumerate(fronts):
+            by_front.setdefault(front, list()).append(position)
+        for front, in_front in by_front.items():
+            distances = crowding_distances([vectors[position] for position in in_front])
+            for position, distance in zip(in_front, distances):
+                ranks[members[position]] = (front_offset + front, distance)
+        front_offset += len(by_front)
+    return ranks
+
+
+def environmental_selection(population: Population, size: int,
+                            profile: StatProfile = DEFAULT_PROFILE) -> Population:
+    """Sort the population best first by (front, -crowding distance) and keep the best size."""
+    ranks = rank_population(population, profile)
+    order = sorted(range(len(population)), key=lambda index: (ranks[index][0], -ranks[index][1]))
+    return [population[index] for index in order[:size]]
+
+
+def pareto_front(population: Population, profile: StatProfile = DEFAULT_PROFILE) -> Population:
+    """The finished, non-dominated crafts of a population, one per distinct objective vector."""
+    finished = [indiv for indiv in population if craft_objectives(indiv, profile).finished]
+    if not finished:
+        return list()
+    vectors = [indiv.objectives.maximize() for indiv in finished]
+    fronts = non_dominated_sort(vectors)
+    seen = set()
+    front = list()
+    for indiv, vector, rank in zip(finished, vectors, fronts):
+        if rank == 0 and vector not in seen:
+            seen.add(vector)
+            front.append(indiv)
+    return sorted(front, key=lambda indiv: indiv.objectives.maximize(), reverse=True)
@@ -0,0 +1,28 @@
+"""Worker side of the pipelined GA, see PipelinedGeneticAlgorithm.
+
+    Children cross the process boundary as bytes, encoded by the run's Problem (see
+    algo/problem.py). Each worker is handed the problem once, when the pool starts, and decodes and
+    scores every chunk with it.
+"""
+
+from typing import List, Optional, Sequence, Tuple
+
+from dsecffxiv.algo.problem import Problem
+
+DEFAULT_CHUNK = 32
+
+# Set in every worker process by init_worker
+_problem: Optional[Problem] = None
+
+
+def init_worker(problem: Problem) -> None:
+    """Keep the run's problem for score_encoded."""
+    global _problem  # pylint: disable=global-statement
+    _problem = problem
+
+
+def score_encoded(genomes: Sequence[bytes]) -> List[Tuple[float, Optional[int]]]:
+    """Score encoded genomes as one batch, returning the score and effective length of each."""
+    population = [_problem.decode(genome) for genome in genomes]
+    scores = _problem.score_batch(population)
+    return [(score, indiv.effective_length) for score, indiv in zip(scores, population)]
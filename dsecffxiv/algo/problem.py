@@ -0,0 +1,122 @@
+"""Interface between the GA engine and the problem it solves.
+
+    A Problem says how genomes of a fixed maximum size are randomly initialized, mutated, scored,
+    checked for legality and encoded to bytes. The GA itself only selects, crosses over and culls,
+    so any Problem can be plugged into it with config['problem']. Without one the GA builds a
+    CraftingProblem from its config, the crafting simulator it was written for.
+
+    Scoring is batched: score_batch gets a whole chunk of the population at once and returns its
+    scores in order, so a problem can score a batch faster than one genome at a time. It may record
+    an individual's effective_length, the leading genes that actually mattered. Crafting specific
+    features (the archive, the surrogate, seeding strategies, local search, traces and the pareto
+    and expected objectives) need a CraftingProblem.
+
+    Synthetic problems for stress testing the engine at other genome sizes live in
+    algo/synthetic.py.
+"""
+
+from typing import Any, List, Optional, Sequence
+
+from dsecffxiv.algo.encoding import ACTION_IDS, genes_from_ids
+from dsecffxiv.algo.generation import generate_population_bulk
+from dsecffxiv.algo.mutation import mutate_each
+from dsecffxiv.algo.score import Default_Score, Score
+from dsecffxiv.algo.types import Domain, Individual, Population
+from dsecffxiv.sim_resources.Profile import DEFAULT_PROFILE, StatProfile
+from dsecffxiv.utils.rng import Rng
+
+
+class Problem():
+    """Generic Problem interface, implementations override at least one of score and score_batch."""
+
+    name = 'problem'
+
+    def __init__(self, size: int):
+        """Construct a problem whose genomes have at most size genes."""
+        self.size = size
+
+    def random_population(self, count: int, rng: Rng) -> Population:
+        """Create count random individuals."""
+        raise NotImplementedError
+
+    def mutate(self, indiv: Individual, percent_chance: float, domain: Optional[Domain],
+               rng: Rng) -> None:
+        """Mutate an individual in place, with the Mutation signature of the GA's mutation_func."""
+        raise NotImplementedError
+
+    def score(self, indiv: Individual) -> Any:
+        """Score one individual, higher is better."""
+        return self.score_batch([indiv])[0]
+
+    def score_batch(self, population: Sequence[Individual]) -> List[Any]:
+        """Score a batch of individuals, in order."""
+        return [self.score(indiv) for indiv in population]
+
+    def is_legal(self, indiv: Individual) -> bool:
+        """Whether an individual is a genome this problem could have produced."""
+        raise NotImplementedError
+
+    def encode(self, indiv: Individual) -> bytes:
+        """Encode an individual's genes as bytes, see decode."""
+        raise NotImplementedError
+
+    def decode(self, data: bytes) -> Individual:
+        """Rebuild an unscored individual from encode's bytes."""
+        raise NotImplementedError
+
+
+class CraftingProblem(Problem):
+    """Find the best craft for a crafter and recipe, the problem the GA was written for.
+
+    Genes are (Action, success roll, material condition) tuples, where the rolls and conditions are
+    fixed per step for the whole run, so a genome encodes to one action id byte per step.
+    """
+
+    name = 'crafting'
+
+    def __init__(self, size: int, material_conditions: Sequence[int], success_rolls: Sequence[int],
+                 profile: StatProfile = DEFAULT_PROFILE, score_func: Score = Default_Score):
+        """Construct the problem for a run's rolls and conditions, scored with score_func."""
+        super().__init__(size)
+        self.material_conditions = material_conditions
+        self.success_rolls = success_rolls
+        self.profile = profile
+        self.score_func = score_func
+
+    def random_population(self, count: int, rng: Rng) -> Population:
+        """Random crafts from the generation heuristics."""
+        return generate_population_bulk(count, self.size, self.material_conditions,
+                                        self.success_rolls, rng, self.profile)
+
+    def mutate(self, indiv: Individual, percent_chance: float, domain: Optional[Domain],
+               rng: Rng) -> None:
+        """Swap random steps for other actions drawn for this problem's profile, see mutate_each."""
+        mutate_each(indiv, percent_chance, domain, rng, self.profile)
+
+    def score(self, indiv: Individual) -> Any:
+        """Simulate the craft, recording its effective length."""
+        return self.score_func(indiv)
+
+    def score_batch(self, population: Sequence[Individual]) -> List[Any]:
+        """Simulate every craft of the batch."""
+        score_func = self.score_func
+        return [score_func(indiv) for indiv in population]
+
+    def is_legal(self, indiv: Individual) -> bool:
+        """Known actions with this run's roll and condition at every step, at most size steps."""
+        if not 0 < len(indiv.value) <= self.size:
+            return False
+        for step, gene in enumerate(indiv.value):
+            if len(gene) != 3 or gene[0] not in ACTION_IDS or \
+                    gene[1] != self.success_rolls[step] or \
+                    gene[2] != self.material_conditions[step]:
+                return False
+        return True
+
+    def encode(self, indiv: Individual) -> bytes:
+        """One action id byte per step, including any dead tail."""
+        return bytes([ACTION_IDS[gene[0]] for gene in indiv.value])
+
+    def decode(self, data: bytes) -> Individual:
+        """Rebuild the genes from the action ids and this run's rolls and conditions."""
+        return Individual(genes_from_ids(data, self.success_rolls, self.material_conditions))
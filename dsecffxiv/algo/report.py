@@ -0,0 +1,152 @@
+"""Incremental stats files and headless plots of GA runs.
+
+    Stats are appended to a directory with one flat binary file per column (see COLUMNS) plus a
+    meta.json describing them, so a run can record every generation as it goes for a few dozen
+    bytes each and a reader can load one column without parsing the rest. Summaries across many
+    jobs are drawn as percentile bands per generation instead of one line per job, and rendered
+    straight to PNG or SVG without a display.
+"""
+
+import json
+import os
+from array import array
+from typing import Dict, List, Optional, Sequence, Tuple
+
+# Column name -> array typecode
+COLUMNS = (('job', 'I'), ('generation', 'I'), ('min', 'd'), ('max', 'd'), ('mean', 'd'),
+           ('seconds', 'd'))
+DEFAULT_PERCENTILES = (5, 25, 50, 75, 95)
+# Generations, and percentile -> the column's value at that percentile in every generation
+Bands = Tuple[List[int], Dict[float, List[float]]]
+FLUSH_ROWS = 256
+
+
+class StatsWriter():
+    """Append per generation stats to a columnar stats directory."""
+
+    def __init__(self, directory: str, flush_rows: int = FLUSH_ROWS):
+        """Start a new stats directory, creating it or replacing any stats already in it."""
+        self.directory = directory
+        self.flush_rows = flush_rows
+        os.makedirs(directory, exist_ok=True)
+        with open(os.path.join(directory, 'meta.json'), 'w') as meta:
+            json.dump({'columns': [list(column) for column in COLUMNS]}, meta)
+        for name, _ in COLUMNS:
+            open(os.path.join(directory, name + '.col'), 'wb').close()
+        self._buffers = {name: array(typecode) for name, typecode in COLUMNS}
+
+    def append(self, job: int, generation: int, min_score: float, max_score: float,
+               mean_score: float, seconds: float = 0.0) -> None:
+        """Record one generation of one job."""
+        for name, value in zip(self._buffers,
+                               (job, generation, min_score, max_score, mean_score, seconds)):
+            self._buffers[name].append(value)
+        if len(self._buffers['job']) >= self.flush_rows:
+            self.flush()
+
+    def flush(self) -> None:
+        """Write the buffered rows to the column files."""
+        for name, buffer in self._buffers.items():
+            with open(os.path.join(self.directory, name + '.col'), 'ab') as column:
+                buffer.tofile(column)
+            del buffer[:]
+
+    def close(self) -> None:
+        """Flush the remaining rows."""
+        self.flush()
+
+    def __enter__(self) -> 'StatsWriter':
+        """Use as a context manager that flushes on exit."""
+        return self
+
+    def __exit__(self, *_exc) -> None:
+        """Flush on leaving the with block."""
+        self.close()
+
+
+def read_stats(directory: str, columns: Optional[Sequence[str]] = None) -> Dict[str, array]:
+    """Load the named columns (default all) of a stats directory."""
+    with open(os.path.join(directory, 'meta.json')) as meta:
+        typecodes = dict(json.load(meta)['columns'])
+    loaded = dict()
+    for name in columns or typecodes:
+        values = array(typecodes[name])
+        path = os.path.join(directory, name + '.col')
+        if os.path.exists(path):
+            with open(path, 'rb') as column:
+                values.frombytes(column.read())
+        loaded[name] = values
+    return loaded
+
+
+def _percentile(ordered: List[float], percent: float) -> float:
+    """Linearly interpolated percentile of an already sorted list."""
+    position = (len(ordered) - 1) * percent / 100
+    low = int(position)
+    high = min(low + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (position - low)
+
+
+def percentile_bands(stats: Dict[str, array], column: str = 'max',
+                     percentiles: Sequence[float] = DEFAULT_PERCENTILES) -> Bands:
+    """Percentiles of a column across jobs for every generation.
+
+    A job that stopped early keeps counting with its last value, so every generation summarizes the
+    same set of jobs.
+    """
+    per_job: Dict[int, Dict[int, float]] = dict()
+    for job, generation, value in zip(stats['job'], stats['generation'], stats[column]):
+        per_job.setdefault(job, dict())[generation] = value
+    if not per_job:
+        return list(), {percent: list() for percent in percentiles}
+
+    generations = sorted({generation for values in per_job.values() for generation in values})
+    last = {job: None for job in per_job}
+    bands: Dict[float, List[float]] = {percent: list() for percent in percentiles}
+    for generation in generations:
+        for job, values in per_job.items():
+            if generation in values:
+                last[job] = values[generation]
+        ordered = sorted(value for value in last.values() if value is not None)
+        for percent in percentiles:
+            bands[percent].append(_percentile(ordered, percent))
+    return generations, bands
+
+
+def render_summary(directory: str, output: str, column: str = 'max',
+                   percentiles: Sequence[float] = DEFAULT_PERCENTILES) -> None:
+    """Draw a stats directory's percentile bands to an image in the format of output's extension."""
+    # Plotting is only loaded when rendering. The figure gets its own Agg canvas, so no display is
+    # needed and pyplot's backend is left alone for anything else in the process
+    from matplotlib.backends import backend_agg  # pylint: disable=import-outside-toplevel
+    from matplotlib.figure import Figure  # pylint: disable=import-outside-toplevel
+
+    stats = read_stats(directory, ('job', 'generation', column, 'seconds'))
+    generations, bands = percentile_bands(stats, column, percentiles)
+    seconds_generations, seconds_bands = percentile_bands(stats, 'seconds', (50,))
+    ordered = sorted(percentiles)
+
+    figure = Figure(figsize=(8, 8))
+    backend_agg.FigureCanvasAgg(figure)
+    score_axes, time_axes = figure.subplots(2, 1, sharex=True,
+                                            gridspec_kw={'height_ratios': (3, 1)})
+    # Nested bands, the outermost percentile pair is the lightest
+    for index in range(len(ordered) // 2):
+        low, high = ordered[index], ordered[-1 - index]
+        score_axes.fill_between(generations, bands[low], bands[high], alpha=0.2 + 0.2 * index,
+                                color='tab:blue', linewidth=0, label='p{0}-p{1}'.format(low, high))
+    if len(ordered) % 2:
+        middle = ordered[len(ordered) // 2]
+        score_axes.plot(generations, bands[middle], '-', color='tab:blue',
+                        label='p{0}'.format(middle))
+    score_axes.set_ylabel('{0} score'.format(column.capitalize()))
+    title = '{0} score vs generation across {1} jobs'
+    score_axes.set_title(title.format(column.capitalize(), len(set(stats['job']))))
+    score_axes.legend()
+
+    time_axes.plot(seconds_generations, seconds_bands[50], '-', color='tab:orange')
+    time_axes.set_xlabel('Generation')
+    time_axes.set_ylabel('Median seconds')
+
+    figure.tight_layout()
+    figure.savefig(output)
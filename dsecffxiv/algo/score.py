@@ -1,8 +1,11 @@
 """Scoring utilities."""
 
-from typing import Any
+from itertools import islice
+from typing import Any, Tuple
 
 from dsecffxiv.algo.types import Individual
+from dsecffxiv.sim_resources.Compiled import simulate_genome
+from dsecffxiv.sim_resources.Profile import DEFAULT_PROFILE, StatProfile, simulation_constants
 from dsecffxiv.sim_resources.State import State
 
 Score = Any
@@ -10,28 +13,45 @@ Score = Any
 
 
 def score_individual(indiv: Individual) -> int:
-    """Score a given individual."""
+    """Score an individual by its longest chain of values that each increase by one, in one pass."""
     max_score = 0
-    # Select start values
-    for each_start in range(0, len(indiv.value) - 1):
-        score = 0
-        for each in range(each_start, len(indiv.value) - 1):
-            if indiv.value[each] + 1 == indiv.value[each+1]:
-                score = score + 1
-            else:
-                break
-        if score > max_score:
-            max_score = score
+    score = 0
+    for left, right in zip(indiv.value, islice(indiv.value, 1, None)):
+        if left + 1 == right:
+            score += 1
+            if score > max_score:
+                max_score = score
+        else:
+            score = 0
     return max_score
 
 
-def score_craft(individual):
-    craft_state = State()
-    step_list = individual.value
+def score_craft(individual, profile: StatProfile = DEFAULT_PROFILE):
+    """Simulate an individual's craft from the start and score the result.
+
+    Also records the individual's effective length, the number of steps before the craft ended. Runs
+    the compiled simulator, which gives the same results as simulate_craft on a fresh State.
+    """
+    score, individual.effective_length = simulate_genome(simulation_constants(profile),
+                                                         individual.value)
+    return score
+
+
+def score_craft_from(craft_state: State, step_list, start: int):
+    """Continue simulating step_list from step start, craft_state being the state before that step.
+
+    The state is updated in place, so pass a copy if it is cached.
+    """
+    return simulate_craft(craft_state, step_list, start)[0]
+
+
+def simulate_craft(craft_state: State, step_list, start: int) -> Tuple[Any, int]:
+    """Simulate step_list from step start, returning the score and how many steps were used.
+
+    To see what every step did, trace the craft instead, see algo/trace.py.
+    """
     score = 0
-    # DEBUG
-    # print(step_list)
-    for step in range(0, len(step_list)):
+    for step in range(start, len(step_list)):
         # Get bundled success value
         craft_state.update_success(step_list[step][1])
         # Get bundled material value
@@ -40,9 +60,8 @@ def score_craft(individual):
         craft_state.step()
         score = craft_state.evaluate()
         if score != 0:  # The craft broke, we ran out of CP, or we've completed the craft
-            # print("Craft Parameters:\n{}\nScore: {}\n".format(craft_state, score))
-            return score
-    return score
+            return score, step + 1
+    return score, len(step_list)
 
 
 Default_Score = score_craft
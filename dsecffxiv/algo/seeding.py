@@ -0,0 +1,87 @@
+"""Pluggable strategies for seeding new populations.
+
+    A strategy takes a SeedingContext and a count and returns that many new individuals. The GA
+    splits each new population between the strategies named in config['seeding'] by fraction, for
+    example {'openers': 0.2, 'mutated_elites': 0.3}, and fills whatever is left randomly.
+"""
+
+from typing import Callable, Dict, List, NamedTuple, Sequence
+
+from dsecffxiv.algo.generation import generate_population_bulk
+from dsecffxiv.algo.mutation import mutate_each
+from dsecffxiv.algo.types import Individual, Population
+from dsecffxiv.sim_resources import ActionClasses as action
+from dsecffxiv.sim_resources.Profile import StatProfile
+from dsecffxiv.utils.rng import Rng
+
+ELITE_MUTATION_CHANCE = 0.05
+
+# Openings that are known to set up a craft well, the rest of each craft is random
+KNOWN_OPENERS = (
+    (action.MuscleMemory, action.Manipulation, action.Veneration, action.WasteNot2,
+     action.Groundwork, action.Groundwork),
+    (action.MuscleMemory, action.Veneration, action.WasteNot, action.Groundwork, action.Groundwork),
+    (action.Reflect, action.Manipulation, action.WasteNot2, action.Innovation,
+     action.PreparatoryTouch, action.PreparatoryTouch),
+    (action.Reflect, action.WasteNot, action.Innovation, action.BasicTouch, action.StandardTouch),
+)
+
+
+class SeedingContext(NamedTuple):
+    """What a strategy needs to know about the run it is seeding."""
+
+    size: int
+    material_conditions: Sequence[int]
+    success_rolls: Sequence[int]
+    profile: StatProfile
+    rng: Rng
+    elites: Population
+
+
+SeedingStrategy = Callable[[SeedingContext, int], Population]
+
+
+def random_seeding(context: SeedingContext, count: int) -> Population:
+    """Random individuals from the generation heuristics."""
+    return generate_population_bulk(count, context.size, context.material_conditions,
+                                    context.success_rolls, context.rng, context.profile)
+
+
+def opener_seeding(context: SeedingContext, count: int) -> Population:
+    """Individuals that start with one of KNOWN_OPENERS, in turn, followed by random actions."""
+    prefixes = [KNOWN_OPENERS[index % len(KNOWN_OPENERS)][:context.size] for index in range(count)]
+    return generate_population_bulk(count, context.size, context.material_conditions,
+                                    context.success_rolls, context.rng, context.profile, prefixes)
+
+
+def mutated_elite_seeding(context: SeedingContext, count: int) -> Population:
+    """Mutated copies of the context's elites, in turn, or random individuals without elites."""
+    if not context.elites:
+        return random_seeding(context, count)
+    seeded = list()
+    for index in range(count):
+        copy = Individual(list(context.elites[index % len(context.elites)].value))
+        mutate_each(copy, ELITE_MUTATION_CHANCE, None, context.rng, context.profile)
+        seeded.append(copy)
+    return seeded
+
+
+SEEDING_STRATEGIES: Dict[str, SeedingStrategy] = {
+    'random': random_seeding,
+    'openers': opener_seeding,
+    'mutated_elites': mutated_elite_seeding,
+}
+
+
+def seed_population(context: SeedingContext, count: int, fractions: Dict[str, float]) -> Population:
+    """Build count individuals, fractions[name] of them with each strategy and the rest randomly."""
+    population: List[Individual] = list()
+    for name, fraction in fractions.items():
+        if name not in SEEDING_STRATEGIES:
+            raise ValueError('Unknown seeding strategy {0}, expected one of {1}'.format(
+                name, ', '.join(SEEDING_STRATEGIES)))
+        share = min(int(count * fraction), count - len(population))
+        if share > 0:
+            population.extend(SEEDING_STRATEGIES[name](context, share))
+    population.extend(random_seeding(context, count - len(population)))
+    return population
@@ -1,26 +1,28 @@
 """Methods for selection in a GA."""
 
-from random import randint
-from typing import Any
+from typing import Any, Optional
 
 from dsecffxiv.algo.types import Individual, Population
+from dsecffxiv.utils.rng import Rng, default_rng
 
 Selection = Any
 # Selection = Callable[[Individual, Dict], Individual]
 
 
-def selection_tournament(_population: Population, tournament_size: int) -> Individual:
+def selection_tournament(_population: Population, tournament_size: int,
+                         rng: Optional[Rng] = None) -> Individual:
     """Tournament select an individual from the population."""
-    size = len(_population)-1
-    tournament_leader = size
+    return _population[selection_tournament_index(len(_population), tournament_size, rng)]
 
+
+def selection_tournament_index(population_size: int, tournament_size: int,
+                               rng: Optional[Rng] = None) -> int:
+    """Tournament select the index of an individual from a sorted population of the given size."""
     # Cheeky optimization here, assuming the population is already sorted, the best scoring indiv
     # will always be the smallest index
-    for _ in range(tournament_size):
-        # ? Should we allow duplicates in the selection pool?
-        tournament_leader = min(tournament_leader, randint(0, size))
-
-    return _population[tournament_leader]
+    # ? Should we allow duplicates in the selection pool?
+    return min(default_rng(rng).integers(0, population_size, tournament_size),
+               default=population_size-1)
 
 
 Default_Selection = selection_tournament
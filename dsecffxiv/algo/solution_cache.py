@@ -0,0 +1,139 @@
+"""Persistent cache of the best crafts found per problem.
+
+    A problem is fully described by its stat profile and the run's per step material conditions and
+    success rolls, so those are hashed into the problem key. For every key the cache keeps the best
+    distinct genomes seen so far in an SQLite file, which can answer a repeated problem outright or
+    warm start a new run from the cached elites. The least recently used problems are evicted once
+    the stored genomes exceed max_bytes.
+"""
+
+import hashlib
+import json
+import sqlite3
+import time
+from typing import Callable, NamedTuple, Optional, Sequence
+
+from dsecffxiv.algo.encoding import ACTION_IDS, decode_actions
+from dsecffxiv.algo.types import Individual, Population
+from dsecffxiv.sim_resources.Profile import StatProfile
+
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+DEFAULT_ELITES = 16
+
+_SCHEMA = '''
+CREATE TABLE IF NOT EXISTS problems (
+    key TEXT PRIMARY KEY,
+    best_score REAL NOT NULL,
+    generations INTEGER NOT NULL,
+    size_bytes INTEGER NOT NULL,
+    last_used REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS elites (
+    key TEXT NOT NULL REFERENCES problems(key) ON DELETE CASCADE,
+    genome BLOB NOT NULL,
+    score REAL NOT NULL,
+    PRIMARY KEY (key, genome)
+);
+CREATE INDEX IF NOT EXISTS problems_last_used ON problems(last_used);
+'''
+
+
+class CachedSolution(NamedTuple):
+    """What the cache knows about one problem."""
+
+    best_score: float
+    generations: int
+    elites: Population
+
+
+def problem_key(profile: StatProfile, material_conditions: Sequence[int],
+                success_rolls: Sequence[int]) -> str:
+    """Hash everything that decides the answer to a crafting problem."""
+    problem = {'profile': profile.to_dict(), 'material_conditions': list(material_conditions),
+               'success_rolls': [int(roll) for roll in success_rolls]}
+    return hashlib.sha256(json.dumps(problem, sort_keys=True).encode()).hexdigest()
+
+
+class SolutionCache():
+    """SQLite backed store of the best genomes per problem key."""
+
+    def __init__(self, path: str, max_bytes: int = DEFAULT_MAX_BYTES, elites: int = DEFAULT_ELITES):
+        """Open (creating if needed) the cache file at path."""
+        self.path = path
+        self.max_bytes = max_bytes
+        self.elites = elites
+        # Several worker processes may share one file, wait on their locks instead of failing
+        self._db = sqlite3.connect(path, timeout=30)
+        self._db.execute('PRAGMA journal_mode=WAL')
+        self._db.execute('PRAGMA foreign_keys=ON')
+        self._db.executescript(_SCHEMA)
+
+    def lookup(self, key: str, material_conditions: Sequence[int],
+               success_rolls: Sequence[int]) -> Optional[CachedSolution]:
+        """Return the cached elites of a problem, best first, or None on a miss."""
+        with self._db:
+            row = self._db.execute('SELECT best_score, generations FROM problems WHERE key = ?',
+                                   (key,)).fetchone()
+            if row is None:
+                return None
+            self._db.execute('UPDATE problems SET last_used = ? WHERE key = ?', (time.time(), key))
+            genomes = self._db.execute(
+                'SELECT genome FROM elites WHERE key = ? ORDER BY score DESC', (key,))
+            elites = [decode_actions(genome, success_rolls, material_conditions)
+                      for genome, in genomes]
+        return CachedSolution(row[0], row[1], elites)
+
+    def store(self, key: str, population: Population, score_func: Callable[[Individual], float],
+              generations: int) -> float:
+        """Merge the best of a population into a problem's elites and return the best cached score.
+
+        generations is the search effort behind this population and adds to what is already cached.
+        """
+        candidates = dict()
+        for indiv in population:
+            # Keep the whole genome, a warm started run needs the tail to grow longer crafts
+            genome = bytes([ACTION_IDS[gene[0]] for gene in indiv.value])
+            if genome not in candidates:
+                candidates[genome] = score_func(indiv)
+
+        with self._db:
+            previous = self._db.execute('SELECT generations FROM problems WHERE key = ?',
+                                        (key,)).fetchone()
+            stored = self._db.execute('SELECT genome, score FROM elites WHERE key = ?', (key,))
+            for genome, score in stored:
+                candidates.setdefault(bytes(genome), score)
+            best = sorted(candidates.items(), key=lambda item: item[1], reverse=True)[:self.elites]
+
+            self._db.execute('DELETE FROM elites WHERE key = ?', (key,))
+            self._db.execute('INSERT OR REPLACE INTO problems VALUES (?, ?, ?, ?, ?)',
+                             (key, best[0][1], generations + (previous[0] if previous else 0),
+                              sum(len(genome) for genome, _ in best), time.time()))
+            self._db.executemany('INSERT INTO elites VALUES (?, ?, ?)',
+                                 [(key, genome, score) for genome, score in best])
+            self._evict()
+        return best[0][1]
+
+    def _evict(self) -> None:
+        """Drop the least recently used problems until the stored genomes fit in max_bytes."""
+        total = self._db.execute('SELECT COALESCE(SUM(size_bytes), 0) FROM problems').fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        oldest_first = self._db.execute(
+            'SELECT key, size_bytes FROM problems ORDER BY last_used').fetchall()
+        for key, size in oldest_first:
+            self._db.execute('DELETE FROM problems WHERE key = ?', (key,))
+            total -= size
+            if total <= self.max_bytes:
+                break
+
+    def size_bytes(self) -> int:
+        """Total size of the stored genomes."""
+        return self._db.execute('SELECT COALESCE(SUM(size_bytes), 0) FROM problems').fetchone()[0]
+
+    def __len__(self):
+        """Number of cached problems."""
+        return self._db.execute('SELECT COUNT(*) FROM problems').fetchone()[0]
+
+    def close(self) -> None:
+        """Close the cache file."""
+        self._db.close()
@@ -1,17 +1,45 @@
 """Utilities for producing statistics about a genetic run."""
 
-from typing import Any, Callable, List
-
-from matplotlib import pyplot as plt
-from tqdm import tqdm
+from typing import Any, Callable, List, Optional
 
+from dsecffxiv.algo.history import RollingHistory
 from dsecffxiv.algo.score import Score
 from dsecffxiv.algo.types import Population
 from dsecffxiv.algo.types.individual import Individual
 
 
-def show_stats(input_population_history: List[Population], score_function: Callable[[Individual], int]) -> None:
-    """Show some stats about the population to the user."""
+def _axes(output: Optional[str]):
+    """New axes to draw on, on a pyplot figure to show or a standalone one when saving to output.
+
+    A saved figure gets its own Agg canvas, so it needs no display and pyplot keeps its backend for
+    later figures that are shown.
+    """
+    # Plotting is only pulled in when stats are actually shown
+    if output is None:
+        from matplotlib import pyplot as plt  # pylint: disable=import-outside-toplevel
+        return plt.figure().add_subplot()
+    from matplotlib.backends import backend_agg  # pylint: disable=import-outside-toplevel
+    from matplotlib.figure import Figure  # pylint: disable=import-outside-toplevel
+    figure = Figure()
+    backend_agg.FigureCanvasAgg(figure)
+    return figure.add_subplot()
+
+
+def _finish(axes, output: Optional[str]) -> None:
+    """Show the figure, or save it to output (format from its extension)."""
+    if output is None:
+        from matplotlib import pyplot as plt  # pylint: disable=import-outside-toplevel
+        plt.show()
+    else:
+        axes.figure.savefig(output)
+
+
+def show_stats(input_population_history: List[Population],
+               score_function: Callable[[Individual], int], output: Optional[str] = None) -> None:
+    """Show some stats about the population to the user, or save them to output."""
+    axes = _axes(output)
+    from tqdm import tqdm  # pylint: disable=import-outside-toplevel
+
     stat_min = list()
     stat_max = list()
     stat_avg = list()
@@ -25,20 +53,32 @@ def show_stats(input_population_history: List[Population], score_function: Calla
         avg /= len(generation_pop)
         stat_avg.append(avg)
 
-    stat_generation_min = list(range(0, len(stat_min)))
-    stat_generation_max = list(range(0, len(stat_max)))
-    stat_generation_avg = list(range(0, len(stat_avg)))
+    _plot_scores(list(range(0, len(stat_max))), stat_min, stat_max, stat_avg, axes)
+    _finish(axes, output)
+
+
+def show_history_stats(history: RollingHistory, output: Optional[str] = None) -> None:
+    """Show the min/max/avg scores of a rolling history to the user, or save them to output."""
+    axes = _axes(output)
+    stat_max = history.series('max')
+    first = history.first_generation()
+    _plot_scores(list(range(first, first + len(stat_max))), history.series('min'), stat_max,
+                 history.series('mean'), axes)
+    _finish(axes, output)
 
-    plt.plot(stat_generation_min, stat_min, '-', label='Min Score')
-    plt.plot(stat_generation_max, stat_max, '-.', label='Max Score')
-    plt.plot(stat_generation_avg, stat_avg, ':', label='Avg Score')
 
-    plt.xlabel('Generation')
-    plt.ylabel('Score')
+def _plot_scores(generations: List[int], stat_min: List[float], stat_max: List[float],
+                 stat_avg: List[float], axes) -> None:
+    """Draw min/max/avg score lines against generation on the axes."""
+    axes.plot(generations, stat_min, '-', label='Min Score')
+    axes.plot(generations, stat_max, '-.', label='Max Score')
+    axes.plot(generations, stat_avg, ':', label='Avg Score')
 
-    plt.title('Min/Max/Avg Score vs Generation')
-    plt.legend()
-    plt.show()
+    axes.set_xlabel('Generation')
+    axes.set_ylabel('Score')
+
+    axes.set_title('Min/Max/Avg Score vs Generation')
+    axes.legend()
 
 
 def print_individual_score_mapping(_population: Population, _scoring_function: Score) -> None:
@@ -53,10 +93,12 @@ def print_leaderboard(_population: Population, _scoring_function: Score, size=5)
         _population[slice(0, size)], _scoring_function)
 
 
-def show_p_stats(times: List[Any]) -> None:
-    """Generate and show performance stats."""
+def show_p_stats(times: List[Any], output: Optional[str] = None) -> None:
+    """Generate and show performance stats, or save them to output."""
+    axes = _axes(output)
+
     size = list(range(0, len(times)))
-    plt.plot(size, times, label='Time per generation')
+    axes.plot(size, times, label='Time per generation')
 
-    plt.legend()
-    plt.show()
+    axes.legend()
+    _finish(axes, output)
@@ -0,0 +1,345 @@
+"""Surrogate pre-screening of children before full simulation.
+
+    With config['surrogate'] set the GA breeds surrogate_pool_factor times more children than it
+    simulates. A linear model over cheap genome features (estimated progress and quality from the
+    action efficiencies and buff windows, CP and durability budget, how far the budget lasts, how
+    risky the actions are) ranks the pool and only the most promising children are simulated, plus a
+    small audit sample drawn at random from the whole pool. The model is trained online, by
+    normalized least mean squares, from the true scores of every simulated child. The pool only
+    grows once it has seen surrogate_warmup of them, and only while the audited children show that
+    it ranks the pool the right way round.
+
+    Metrics cover accuracy (rank correlation of predicted and true scores among the audited
+    children, a held out sample of the whole pool, and how often an audited reject would have beaten
+    the median accepted child) and cost (simulations per candidate, and the estimated speedup over
+    simulating every candidate). The features walk the craft much like the compiled simulator does,
+    so they cost about as much as a simulation and the screen pays off in better children per
+    simulation rather than in time.
+"""
+
+from time import perf_counter
+from typing import Dict, List, Sequence, Tuple
+
+import dsecffxiv.sim_resources.ActionClasses as action
+from dsecffxiv.algo.types import Individual, Population
+from dsecffxiv.sim_resources.Compiled import (CENTERED, CONDITION_CODES, GOOD, GROUNDWORK,
+                                              OPCODES, PLIANT, STURDY)
+from dsecffxiv.sim_resources.Profile import StatProfile, simulation_constants
+from dsecffxiv.utils.rng import Rng
+
+FEATURE_COUNT = 13
+# Small enough to average out noise, large enough to follow the moving population
+LEARNING_RATE = 0.1
+
+
+# What the features track of an action beyond its opcode row
+(PLAIN, INNOVATION, VENERATION, GREAT_STRIDES, MUSCLE_MEMORY, WASTE_NOT, MANIPULATION, INNER_QUIET,
+ REFLECT, BYREGOT, MASTERS_MEND, TRICKS, OTHER_BUFF) = range(13)
+_EFFECTS = {
+    action.Innovation: INNOVATION, action.Veneration: VENERATION,
+    action.GreatStrides: GREAT_STRIDES, action.MuscleMemory: MUSCLE_MEMORY,
+    action.WasteNot: WASTE_NOT, action.WasteNot2: WASTE_NOT, action.Manipulation: MANIPULATION,
+    action.InnerQuiet: INNER_QUIET, action.Reflect: REFLECT, action.ByregotsBlessing: BYREGOT,
+    action.MastersMend: MASTERS_MEND, action.TricksoftheTrade: TRICKS,
+    action.Observe: OTHER_BUFF, action.NameoftheElements: OTHER_BUFF,
+    action.FinalAppraisal: OTHER_BUFF,
+}
+
+
+class _GeneTraits(dict):
+    """Walk traits by gene, computed once per distinct (action, success roll, condition) gene.
+
+    (progress efficiency, quality efficiency, failed, CP cost, durability cost, durability cost
+    under Waste Not, effect, buff turns), where the efficiencies are 0 if the gene's roll fails the
+    action.
+    """
+
+    def __missing__(self, gene):
+        which, roll, condition = gene
+        (special, progress_efficiency, quality_efficiency, threshold, _, losses, cp_losses,
+         turns) = OPCODES[which]
+        code = CONDITION_CODES[condition]
+        if threshold >= 0 and code == CENTERED:
+            threshold += 25
+        success = threshold < 0 or roll <= threshold
+        sturdy = 2 * (code == STURDY)
+        # Groundwork's cost only lowers its efficiency in the simulator
+        durability_cost = 0 if special == GROUNDWORK else losses[sturdy]
+        waste_not_cost = 0 if special == GROUNDWORK else losses[1 + sturdy]
+        traits = self[gene] = (progress_efficiency * success,
+                               quality_efficiency * success * (1.5 if code == GOOD else 1.0),
+                               float(not success), cp_losses[code == PLIANT], durability_cost,
+                               waste_not_cost, _EFFECTS.get(which, PLAIN), max(turns - 1, 0))
+        return traits
+
+
+TRAITS = _GeneTraits()
+
+
+def genome_features(genes: Sequence[tuple], constants) -> List[float]:
+    """Cheap features of a genome from a rough walk of its craft.
+
+    The walk follows the genes' own success rolls and conditions but leaves out the rounding and the
+    less common action rules. It stops where the craft is estimated to finish or to break.
+    """
+    max_cp = constants.max_cp
+    max_durability = constants.max_durability
+    cp = max_cp
+    durability = max_durability
+    progress_units = quality_units = 0.0
+    veneration = innovation = great_strides = muscle_memory = waste_not = manipulation = stacks = 0
+    steps = buffs = failures = 0
+    finished = broken = False
+    progress_goal = constants.max_progress * 100 / constants.base_progress
+    for gene in genes:
+        (progress_efficiency, quality_efficiency, failed, cp_cost, durability_cost, waste_not_cost,
+         effect, turns) = TRAITS[gene]
+        steps += 1
+        failures += failed
+        cp -= cp_cost
+        durability -= waste_not_cost if waste_not else durability_cost
+        if progress_efficiency:
+            progress_units += progress_efficiency * (1.0 + (veneration > 0) * 0.5
+                                                     + (muscle_memory > 0))
+            muscle_memory = 0
+        if quality_efficiency:
+            quality_units += quality_efficiency * (1.0 + 0.1 * stacks) * \
+                (1.0 + (innovation > 0) * 0.5 + (great_strides > 0))
+            great_strides = 0
+            if 0 < stacks < 10:
+                stacks += 1
+
+        if veneration:
+            veneration -= 1
+        if innovation:
+            innovation -= 1
+        if great_strides:
+            great_strides -= 1
+        if muscle_memory:
+            muscle_memory -= 1
+        if waste_not:
+            waste_not -= 1
+        if manipulation:
+            manipulation -= 1
+            if durability > 0:
+                durability = min(durability + 5, max_durability)
+
+        if effect:
+            buffs += 1
+            if effect == INNOVATION:
+                innovation = turns
+            elif effect == VENERATION:
+                veneration = turns
+            elif effect == GREAT_STRIDES:
+                great_strides = turns
+            elif effect == MUSCLE_MEMORY:
+                muscle_memory = turns
+            elif effect == WASTE_NOT:
+                waste_not = turns
+            elif effect == MANIPULATION:
+                # Manipulation already restores durability on the step it is used
+                manipulation = turns
+                if durability > 0:
+                    durability = min(durability + 5, max_durability)
+            elif effect == INNER_QUIET:
+                stacks = max(stacks, 1)
+            elif effect == REFLECT:
+                stacks = 3
+            elif effect == BYREGOT:
+                stacks = 0
+            elif effect == MASTERS_MEND:
+                durability = min(durability + 30, max_durability)
+            elif effect == TRICKS:
+                cp = min(cp + 20, max_cp)
+
+        if progress_units >= progress_goal:
+            finished = True
+            break
+        if cp < 0 or durability <= 0:
+            broken = True
+            break
+
+    progress = min(progress_units / progress_goal, 1.0)
+    quality = min(quality_units * constants.base_quality[0] / 100 / constants.max_quality, 2.0)
+    return [
+        1.0,
+        progress,
+        quality,
+        float(finished),
+        quality * finished,
+        float(broken),
+        max(cp, 0) / max_cp,
+        max(durability, 0) / max_durability,
+        steps / max(len(genes), 1),
+        failures / max(steps, 1),
+        buffs / max(steps, 1),
+        stacks / 10,
+        (1.0 - progress) * (not finished),
+    ]
+
+
+def score_target(score: float) -> float:
+    """Compress the heavy tailed craft scores into the range the linear model fits."""
+    return (max(score, -1.0) + 1.0) ** 0.5
+
+
+def rank_correlation(left: Sequence[float], right: Sequence[float]) -> float:
+    """Spearman rank correlation, 0 when either side has no spread."""
+    def ranks(values):
+        order = sorted(range(len(values)), key=values.__getitem__)
+        result = [0.0] * len(values)
+        start = 0
+        while start < len(order):
+            end = start
+            while end + 1 < len(order) and values[order[end + 1]] == values[order[start]]:
+                end += 1
+            for position in range(start, end + 1):
+                result[order[position]] = (start + end) / 2
+            start = end + 1
+        return result
+
+    if len(left) < 2:
+        return 0.0
+    left_ranks = ranks(left)
+    right_ranks = ranks(right)
+    mean = (len(left) - 1) / 2
+    covariance = sum((a - mean) * (b - mean) for a, b in zip(left_ranks, right_ranks))
+    left_spread = sum((a - mean) ** 2 for a in left_ranks)
+    right_spread = sum((b - mean) ** 2 for b in right_ranks)
+    if left_spread == 0 or right_spread == 0:
+        return 0.0
+    return covariance / (left_spread * right_spread) ** 0.5
+
+
+class LinearSurrogate():
+    """Linear model trained online by normalized least mean squares, one cheap step per sample."""
+
+    def __init__(self, size: int = FEATURE_COUNT, rate: float = LEARNING_RATE):
+        """Start with zero weights."""
+        self.rate = rate
+        self.weights = [0.0] * size
+        self.samples = 0
+
+    def predict(self, features: Sequence[float]) -> float:
+        """Predicted target for a feature vector."""
+        return sum(weight * feature for weight, feature in zip(self.weights, features))
+
+    def update(self, features: Sequence[float], target: float) -> None:
+        """Step the weights towards one observed (features, target) sample."""
+        norm = 1e-9 + sum(feature * feature for feature in features)
+        step = self.rate * (target - self.predict(features)) / norm
+        self.weights = [weight + step * feature for weight, feature in zip(self.weights, features)]
+        self.samples += 1
+
+
+class SurrogateScreen():
+    """Screen children with a LinearSurrogate and learn from the ones that get simulated.
+
+    Configured from the GA config: surrogate_pool_factor (candidates bred per simulated child,
+    default 4), surrogate_warmup (simulated children to learn from before screening, default 200)
+    and surrogate_audit (fraction of the simulated children drawn at random from the whole pool,
+    default 0.1).
+    """
+
+    def __init__(self, config: Dict, profile: StatProfile):
+        """Start an untrained screen for the profile's problem."""
+        self.constants = simulation_constants(profile)
+        self.factor = max(config.get('surrogate_pool_factor', 4), 1)
+        self.warmup = config.get('surrogate_warmup', 200)
+        self.audit = config.get('surrogate_audit', 0.1)
+        self.model = LinearSurrogate()
+        # Children waiting for their true score,
+        # id -> (individual, features, prediction, audited, rejected)
+        self._pending: Dict[int, Tuple[Individual, List[float], float, bool, bool]] = dict()
+        self.metrics = {'candidates': 0, 'simulated': 0, 'rank_correlation': 0.0,
+                        'audit_miss_rate': 0.0, 'surrogate_seconds': 0.0, 'simulation_seconds': 0.0}
+        self.history: List[Tuple[float, float]] = list()
+
+    def pool_factor(self) -> int:
+        """How many candidates to breed per child that will be simulated.
+
+        1 until the model has seen warmup children, and whenever the audited children do not rank
+        positively, screening with a model that ranks backwards would simulate the worse children.
+        """
+        if self.model.samples < self.warmup or self.metrics['rank_correlation'] <= 0:
+            return 1
+        return self.factor
+
+    def screen(self, candidates: Population, keep: int, rng: Rng) -> Population:
+        """Pick keep candidates to simulate, an audit sample of the pool and the best of the rest.
+
+        Without more candidates than keep every candidate is simulated, and all of them are audited.
+        """
+        start = perf_counter()
+        scored = list()
+        for indiv in candidates:
+            features = genome_features(indiv.value, self.constants)
+            scored.append((self.model.predict(features), features, indiv))
+        self.metrics['candidates'] += len(candidates)
+
+        if len(scored) <= keep:
+            chosen = [(entry, True, False) for entry in scored]
+        else:
+            # The audit sample is drawn before ranking, so it stays a fair sample of the whole pool
+            order = list(range(len(scored)))
+            audits = set(rng.sample(order, int(keep * self.audit)))
+            order.sort(key=lambda index: scored[index][0], reverse=True)
+            accepted = set(order[:keep])
+            best = [index for index in order if index not in audits][:keep - len(audits)]
+            chosen = [(scored[index], False, False) for index in best] + \
+                [(scored[index], True, index not in accepted) for index in sorted(audits)]
+        for (prediction, features, indiv), audited, rejected in chosen:
+            self._pending[id(indiv)] = (indiv, features, prediction, audited, rejected)
+        self.metrics['surrogate_seconds'] += perf_counter() - start
+        return [entry[2] for entry, _, _ in chosen]
+
+    def observe(self, population: Population, scores: Sequence[float], seconds: float) -> None:
+        """Learn from the true scores of a simulated population, which took seconds to simulate."""
+        start = perf_counter()
+        simulated = 0
+        predictions = list()
+        truths = list()
+        accepted = list()
+        rejected = list()
+        for indiv, score in zip(population, scores):
+            entry = self._pending.pop(id(indiv), None)
+            if entry is None or entry[0] is not indiv:
+                continue  # A parent, or an id reused by a new object
+            _, features, prediction, is_audit, is_reject = entry
+            target = score_target(score)
+            self.model.update(features, target)
+            simulated += 1
+            if is_audit:
+                # Predicted before the model saw them, a held out sample of the pool
+                predictions.append(prediction)
+                truths.append(target)
+            (rejected if is_reject else accepted).append(target)
+        self._pending.clear()
+
+        self.metrics['simulated'] += simulated
+        if population:
+            self.metrics['simulation_seconds'] += seconds * simulated / len(population)
+        if len(truths) >= 2:
+            correlation = rank_correlation(predictions, truths)
+            metrics = self.metrics
+            metrics['rank_correlation'] = 0.8 * metrics['rank_correlation'] + 0.2 * correlation
+            if rejected and accepted:
+                median = sorted(accepted)[len(accepted) // 2]
+                misses = sum(target > median for target in rejected) / len(rejected)
+                metrics['audit_miss_rate'] = 0.8 * metrics['audit_miss_rate'] + 0.2 * misses
+            self.history.append((correlation, self.metrics['audit_miss_rate']))
+        self.metrics['surrogate_seconds'] += perf_counter() - start
+
+    def summary(self) -> Dict[str, float]:
+        """Metrics so far, with the simulation savings they add up to."""
+        metrics = dict(self.metrics)
+        simulated = max(metrics['simulated'], 1)
+        metrics['candidates_per_simulation'] = metrics['candidates'] / simulated
+        # What simulating every candidate would have cost, against simulating the chosen ones
+        # plus screening
+        per_simulation = metrics['simulation_seconds'] / simulated
+        spent = metrics['simulation_seconds'] + metrics['surrogate_seconds']
+        unscreened = metrics['candidates'] * per_simulation
+        metrics['estimated_speedup'] = unscreened / spent if spent > 0 else 1.0
+        metrics['trained_samples'] = self.model.samples
+        return metrics
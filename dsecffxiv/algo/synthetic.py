@@ -0,0 +1,119 @@
+"""Synthetic problems for stress testing the GA engine.
+
+    Crafts never get longer than a few dozen steps, these problems scale to genomes of any length
+    (10k genes and more) so the engine's selection, crossover, mutation, culling and transport can
+    be measured where a cost that grows faster than the genome would show. Every problem scores a
+    genome in one pass over it.
+
+    - increasing: the long increasing numbers problem of tests/long_increasing_numbers.py. Genes
+      are 1..size, the score is the longest chain of genes that each increase by one.
+    - planted: a hidden target of symbols from a small alphabet is drawn from the seed, the score
+      is how many genes match it. Every gene counts, so it has no dead tail and a smooth landscape.
+"""
+
+from array import array
+from operator import eq
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+from dsecffxiv.algo.problem import Problem
+from dsecffxiv.algo.score import score_individual
+from dsecffxiv.algo.types import Domain, Individual, Population
+from dsecffxiv.utils.rng import Rng, default_rng
+
+PLANTED_ALPHABET = 4
+
+
+class IncreasingNumbersProblem(Problem):
+    """Find a genome of size numbers from 1..size with the longest chain of +1 steps."""
+
+    name = 'increasing'
+
+    def __init__(self, size: int, seed: Optional[int] = None):
+        """Construct the problem, it has no hidden state so seed is unused."""
+        super().__init__(size)
+        self.domain: Domain = list(range(1, size + 1))
+
+    def random_population(self, count: int, rng: Rng) -> Population:
+        """Individuals of uniformly random numbers."""
+        return [Individual(rng.integers(1, self.size + 1, self.size)) for _ in range(count)]
+
+    def mutate(self, indiv: Individual, percent_chance: float, domain: Optional[Domain],
+               rng: Rng) -> None:
+        """Replace random genes with random numbers."""
+        rng = default_rng(rng)
+        for i in rng.bernoulli_indices(len(indiv.value), percent_chance):
+            indiv.value[i] = 1 + int(rng.random() * self.size)
+
+    def score(self, indiv: Individual) -> Any:
+        """Longest chain of +1 steps."""
+        return score_individual(indiv)
+
+    def score_batch(self, population: Sequence[Individual]) -> List[Any]:
+        """Longest chain of +1 steps of each individual."""
+        return [score_individual(indiv) for indiv in population]
+
+    def is_legal(self, indiv: Individual) -> bool:
+        """Exactly size numbers from 1..size."""
+        return len(indiv.value) == self.size and all(
+            isinstance(gene, int) and 1 <= gene <= self.size for gene in indiv.value)
+
+    def encode(self, indiv: Individual) -> bytes:
+        """Four bytes per gene."""
+        return array('I', indiv.value).tobytes()
+
+    def decode(self, data: bytes) -> Individual:
+        """Rebuild the numbers."""
+        return Individual(array('I', data).tolist())
+
+
+class PlantedTargetProblem(Problem):
+    """Match a hidden target of size symbols drawn from the seed."""
+
+    name = 'planted'
+
+    def __init__(self, size: int, seed: Optional[int] = None, alphabet: int = PLANTED_ALPHABET):
+        """Draw the target from seed, genes are stored as bytes so the alphabet is at most 256."""
+        if not 0 < alphabet <= 256:
+            raise ValueError('alphabet must have 1 to 256 symbols, not {0}'.format(alphabet))
+        super().__init__(size)
+        self.alphabet = alphabet
+        self.target: List[int] = Rng(seed if seed is not None else 0).integers(0, alphabet, size)
+
+    def random_population(self, count: int, rng: Rng) -> Population:
+        """Individuals of uniformly random symbols."""
+        return [Individual(rng.integers(0, self.alphabet, self.size)) for _ in range(count)]
+
+    def mutate(self, indiv: Individual, percent_chance: float, domain: Optional[Domain],
+               rng: Rng) -> None:
+        """Replace random genes with random symbols."""
+        rng = default_rng(rng)
+        for i in rng.bernoulli_indices(len(indiv.value), percent_chance):
+            indiv.value[i] = int(rng.random() * self.alphabet)
+
+    def score(self, indiv: Individual) -> Any:
+        """Genes that match the target."""
+        return sum(map(eq, indiv.value, self.target))
+
+    def score_batch(self, population: Sequence[Individual]) -> List[Any]:
+        """Genes that match the target, for each individual."""
+        target = self.target
+        return [sum(map(eq, indiv.value, target)) for indiv in population]
+
+    def is_legal(self, indiv: Individual) -> bool:
+        """Exactly size symbols of the alphabet."""
+        return len(indiv.value) == self.size and all(
+            isinstance(gene, int) and 0 <= gene < self.alphabet for gene in indiv.value)
+
+    def encode(self, indiv: Individual) -> bytes:
+        """One byte per gene."""
+        return bytes(indiv.value)
+
+    def decode(self, data: bytes) -> Individual:
+        """Rebuild the symbols."""
+        return Individual(list(data))
+
+
+SYNTHETIC_PROBLEMS: Dict[str, Callable[[int, Optional[int]], Problem]] = {
+    'increasing': IncreasingNumbersProblem,
+    'planted': PlantedTargetProblem,
+}
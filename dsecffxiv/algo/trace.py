@@ -0,0 +1,261 @@
+"""Step level traces of crafts in a compact binary format.
+
+    Tracing never touches the scoring path: the population is scored as usual and only the crafts
+    asked for (e.g. the elites of each generation, with config['trace_elites']) are simulated a
+    second time by trace_craft. Each step is stored as its action id, roll and condition, a bitmask
+    of the State fields that changed and their deltas as zigzag varints. That is usually 5-10 bytes
+    a step. The first record of a trace is the starting State as deltas from zero.
+
+    Traces go into a TraceBuffer, a ring that drops the oldest traces once it holds capacity bytes,
+    and can be written to and read back from a file. render_trace and diff_traces turn them back
+    into readable step tables.
+"""
+
+import struct
+from collections import deque
+from typing import Deque, Iterable, Iterator, List, NamedTuple, Optional, Sequence, Tuple
+
+from dsecffxiv.algo.encoding import ACTION_IDS, ACTIONS
+from dsecffxiv.sim_resources.Profile import DEFAULT_PROFILE, StatProfile
+from dsecffxiv.sim_resources.State import State
+
+# Stored order of the traced State fields, only ever append to this tuple
+TRACE_FIELDS = ('cp', 'progress', 'quality', 'durability', 'iq_stacks', 'muscle_memory',
+                'name_elements', 'veneration', 'final_appraisal', 'great_strides', 'innovation',
+                'observe', 'waste_not', 'manipulation')
+START = 255  # Action id of the record holding the starting State
+MAGIC = b'DSTR'
+VERSION = 1
+DEFAULT_CAPACITY = 1 << 20
+_FILE_HEADER = struct.Struct('<4sBB')
+# generation, rank, score, steps, record bytes
+_TRACE_HEADER = struct.Struct('<IHdHI')
+_STEP_HEADER = struct.Struct('<BBBH')
+
+
+class TraceStep(NamedTuple):
+    """One decoded step, values are the State fields after it."""
+
+    step: int
+    action: str
+    roll: int
+    condition: int
+    values: Tuple[int, ...]
+    changed: Tuple[int, ...]
+
+
+class Trace(NamedTuple):
+    """One traced craft."""
+
+    generation: int
+    rank: int
+    score: float
+    steps: int
+    records: bytes
+
+    def decode(self) -> List[TraceStep]:
+        """The craft's steps, the first one being the starting State."""
+        return list(_decode_records(self.records))
+
+
+def _write_varint(out: bytearray, value: int) -> None:
+    """Append a signed int as a zigzag varint."""
+    value = (value << 1) ^ (value >> 63)
+    while value > 0x7f:
+        out.append((value & 0x7f) | 0x80)
+        value >>= 7
+    out.append(value)
+
+
+def _read_varint(data: bytes, position: int) -> Tuple[int, int]:
+    """Read a zigzag varint, returning it and the position after it."""
+    result = shift = 0
+    while True:
+        byte = data[position]
+        position += 1
+        result |= (byte & 0x7f) << shift
+        if byte < 0x80:
+            return (result >> 1) ^ -(result & 1), position
+        shift += 7
+
+
+def _snapshot(state: State) -> Tuple[int, ...]:
+    """The traced fields of a State."""
+    return tuple(getattr(state, field) for field in TRACE_FIELDS)
+
+
+def _write_step(out: bytearray, action_id: int, roll: int, condition: int, current: Sequence[int],
+                previous: Sequence[int]) -> None:
+    """Append one step record."""
+    mask = 0
+    deltas = list()
+    for index, (now, before) in enumerate(zip(current, previous)):
+        if now != before:
+            mask |= 1 << index
+            deltas.append(now - before)
+    out += _STEP_HEADER.pack(action_id, roll, condition, mask)
+    for delta in deltas:
+        _write_varint(out, delta)
+
+
+def _decode_records(records: bytes) -> Iterator[TraceStep]:
+    """Replay step records into absolute values."""
+    values = [0] * len(TRACE_FIELDS)
+    position = step = 0
+    while position < len(records):
+        action_id, roll, condition, mask = _STEP_HEADER.unpack_from(records, position)
+        position += _STEP_HEADER.size
+        changed = list()
+        for index in range(len(TRACE_FIELDS)):
+            if mask & (1 << index):
+                delta, position = _read_varint(records, position)
+                values[index] += delta
+                changed.append(index)
+        name = 'start' if action_id == START else ACTIONS[action_id].__name__
+        yield TraceStep(step, name, roll, condition, tuple(values), tuple(changed))
+        step += 1
+
+
+def trace_craft(genes: Sequence[tuple],
+                profile: StatProfile = DEFAULT_PROFILE) -> Tuple[bytes, float, int]:
+    """Simulate a genome like simulate_craft, returning its step records, score and steps used."""
+    state = State(profile)
+    previous = _snapshot(state)
+    records = bytearray()
+    _write_step(records, START, 0, 0, previous, (0,) * len(TRACE_FIELDS))
+    score = 0
+    for step, (which, roll, condition) in enumerate(genes):
+        state.update_success(roll)
+        state.update_condition(condition)
+        state = which.execute(state)
+        state.step()
+        current = _snapshot(state)
+        _write_step(records, ACTION_IDS[which], roll, condition, current, previous)
+        previous = current
+        score = state.evaluate()
+        if score != 0:
+            return bytes(records), score, step + 1
+    return bytes(records), score, len(genes)
+
+
+class TraceBuffer():
+    """Ring of traces that drops the oldest ones beyond capacity bytes."""
+
+    def __init__(self, capacity: int = DEFAULT_CAPACITY):
+        """Start empty."""
+        self.capacity = capacity
+        self.traces: Deque[Trace] = deque()
+        self.size = 0
+        self.dropped = 0
+        # rank -> genes last traced at that rank, see trace_population
+        self.latest = dict()
+
+    def record(self, genes: Sequence[tuple], generation: int = 0, rank: int = 0,
+               profile: StatProfile = DEFAULT_PROFILE) -> Trace:
+        """Trace a genome into the buffer."""
+        records, score, steps = trace_craft(genes, profile)
+        trace = Trace(generation, rank, float(score), steps, records)
+        self.append(trace)
+        return trace
+
+    def append(self, trace: Trace) -> None:
+        """Add a trace, dropping the oldest ones until it fits."""
+        self.traces.append(trace)
+        self.size += _TRACE_HEADER.size + len(trace.records)
+        while self.size > self.capacity and len(self.traces) > 1:
+            oldest = self.traces.popleft()
+            self.size -= _TRACE_HEADER.size + len(oldest.records)
+            self.dropped += 1
+
+    def write(self, path: str) -> None:
+        """Write every trace in the buffer to a file."""
+        with open(path, 'wb') as output:
+            output.write(_FILE_HEADER.pack(MAGIC, VERSION, len(TRACE_FIELDS)))
+            for trace in self.traces:
+                output.write(_TRACE_HEADER.pack(trace.generation, trace.rank, trace.score,
+                                                trace.steps, len(trace.records)))
+                output.write(trace.records)
+
+
+def read_traces(path: str) -> List[Trace]:
+    """Read the traces of a file written by TraceBuffer.write."""
+    with open(path, 'rb') as source:
+        data = source.read()
+    magic, version, field_count = _FILE_HEADER.unpack_from(data, 0)
+    if magic != MAGIC or version != VERSION or field_count > len(TRACE_FIELDS):
+        raise ValueError('{0} is not a trace file this version can read'.format(path))
+    traces = list()
+    position = _FILE_HEADER.size
+    while position < len(data):
+        generation, rank, score, steps, length = _TRACE_HEADER.unpack_from(data, position)
+        position += _TRACE_HEADER.size
+        traces.append(Trace(generation, rank, score, steps, data[position:position + length]))
+        position += length
+    return traces
+
+
+def _format_changes(step: TraceStep, previous: Optional[Sequence[int]]) -> str:
+    """Changed fields of a step as 'field +delta=value' pairs."""
+    parts = list()
+    for index in step.changed:
+        before = previous[index] if previous is not None else 0
+        parts.append('{0} {1:+d}={2}'.format(TRACE_FIELDS[index], step.values[index] - before,
+                                             step.values[index]))
+    return ', '.join(parts)
+
+
+def render_trace(trace: Trace) -> str:
+    """A trace as a readable table of steps and what each one changed."""
+    lines = ['generation {0} rank {1}: score {2}, {3} steps'.format(trace.generation, trace.rank,
+                                                                    trace.score, trace.steps)]
+    previous = None
+    for step in trace.decode():
+        lines.append('{0:>3} {1:<20} roll {2:>2} cond {3}  {4}'.format(
+            step.step, step.action, step.roll, step.condition, _format_changes(step, previous)))
+        previous = step.values
+    return '\n'.join(lines)
+
+
+def diff_traces(left: Trace, right: Trace) -> str:
+    """Step by step differences between two traces, from the first step where they diverge."""
+    lines = ['left score {0} in {1} steps, right score {2} in {3} steps'.format(
+        left.score, left.steps, right.score, right.steps)]
+    left_steps, right_steps = left.decode(), right.decode()
+    diverged = False
+    for index in range(max(len(left_steps), len(right_steps))):
+        left_step = left_steps[index] if index < len(left_steps) else None
+        right_step = right_steps[index] if index < len(right_steps) else None
+        same = left_step is not None and right_step is not None and \
+            left_step[1:5] == right_step[1:5]
+        if same and not diverged:
+            continue
+        if not diverged:
+            lines.append('first difference at step {0}'.format(index))
+            diverged = True
+        lines.append('{0:>3} {1:<20} | {2:<20} {3}'.format(
+            index, left_step.action if left_step else '-', right_step.action if right_step else '-',
+            _field_differences(left_step, right_step)))
+    if not diverged:
+        lines.append('identical')
+    return '\n'.join(lines)
+
+
+def _field_differences(left: Optional[TraceStep], right: Optional[TraceStep]) -> str:
+    """Fields whose values differ after the same step of two traces."""
+    if left is None or right is None:
+        return ''
+    return ', '.join('{0} {1}|{2}'.format(field, left.values[index], right.values[index])
+                     for index, field in enumerate(TRACE_FIELDS)
+                     if left.values[index] != right.values[index])
+
+
+def trace_population(buffer: TraceBuffer, population: Iterable, generation: int, count: int,
+                     profile: StatProfile = DEFAULT_PROFILE) -> None:
+    """Trace the first count individuals of a sorted population not yet traced at their rank."""
+    for rank, indiv in enumerate(population):
+        if rank >= count:
+            return
+        genes = tuple(indiv.effective_value())
+        if buffer.latest.get(rank) != genes:
+            buffer.latest[rank] = genes
+            buffer.record(genes, generation, rank, profile)
@@ -2,4 +2,6 @@
 
 from dsecffxiv.algo.types.domain import Domain
 from dsecffxiv.algo.types.individual import Individual
+from dsecffxiv.algo.types.individual_pool import IndividualPool
 from dsecffxiv.algo.types.population import Population, cull_population
+from dsecffxiv.algo.types.shared_population import SharedPopulation, SharedPopulationHandle
@@ -5,15 +5,22 @@ Individual.
 """
 
 
-from typing import Any, List
+from typing import Any, List, Optional
 
 
 class Individual():
     """Generic Individual interface."""
 
+    # A run holds thousands of these, slots keep each one small and cheap to create
+    __slots__ = ('value', 'effective_length', 'objectives')
+
     def __init__(self, value: List[Any]):
         """Construct indiv with a predefined list."""
         self.value = value
+        # How many leading values are actually used, set by scoring. None until scored.
+        self.effective_length: Optional[int] = None
+        # Cached multi-objective values, see algo.pareto. None until computed.
+        self.objectives: Optional[Any] = None
 
     def __str__(self):
         """Printer for generic Individuals."""
@@ -28,4 +35,15 @@ class Individual():
 
     def __len__(self):
         """Pass through method for len of value."""
-        len(self.value)
+        return len(self.value)
+
+    def effective_value(self) -> List[Any]:
+        """The values that are actually used, the whole value until the individual is scored."""
+        if self.effective_length is None:
+            return self.value
+        return self.value[:self.effective_length]
+
+    def trim(self, slack: int = 0) -> None:
+        """Drop the dead tail, keeping slack values past the effective length."""
+        if self.effective_length is not None and self.effective_length + slack < len(self.value):
+            self.value = self.value[:self.effective_length + slack]
@@ -0,0 +1,41 @@
+"""
+Individual Pool.
+
+    The second buffer of a double buffered population. Individuals the GA culls are handed back to
+    the pool, and crossover writes the next generation's children into their genome lists in place
+    (see crossover_n_point_into). In steady state a generation then allocates no new Individuals or
+    genome lists, and leaves none behind for the garbage collector.
+"""
+
+from typing import Iterable, List
+
+from dsecffxiv.algo.types.individual import Individual
+
+
+class IndividualPool():
+    """Free list of Individuals whose genomes may be overwritten."""
+
+    def __init__(self, count: int = 0, width: int = 0):
+        """Preallocate count individuals with room for width genes."""
+        self.free: List[Individual] = [Individual([None] * width) for _ in range(count)]
+        # Statistics only, they may miss a count when several threads acquire at once
+        self.created = count
+        self.reused = 0
+
+    def __len__(self) -> int:
+        """Number of free individuals."""
+        return len(self.free)
+
+    def acquire(self) -> Individual:
+        """A free individual, or a new empty one once the pool has run dry. Thread safe."""
+        try:
+            indiv = self.free.pop()
+        except IndexError:
+            self.created += 1
+            return Individual(list())
+        self.reused += 1
+        return indiv
+
+    def release(self, individuals: Iterable[Individual]) -> None:
+        """Hand back individuals that nothing else refers to anymore."""
+        self.free.extend(individuals)
@@ -0,0 +1,153 @@
+"""
+Shared Population.
+
+    A population stored as a fixed width action id matrix plus a score vector inside one
+    multiprocessing.shared_memory block, so worker processes can score or rewrite slices of it in
+    place instead of pickling lists of Individuals back and forth.
+"""
+
+from multiprocessing.shared_memory import SharedMemory
+from typing import Callable, List, NamedTuple, Optional, Sequence
+
+# Module import, encoding itself imports algo.types and may still be initializing here
+from dsecffxiv.algo import encoding
+from dsecffxiv.algo.types.individual import Individual
+from dsecffxiv.sim_resources.Profile import DEFAULT_PROFILE, StatProfile
+from dsecffxiv.sim_resources.TestResources import get_random_action
+from dsecffxiv.utils.rng import Rng, default_rng
+
+SCORE_SIZE = 8  # One double per row
+
+
+class SharedPopulationHandle(NamedTuple):
+    """Everything a worker needs to attach to a shared population, cheap to pickle."""
+
+    name: str
+    capacity: int
+    width: int
+    success_rolls: Sequence[int]
+    material_conditions: Sequence[int]
+
+
+class SharedPopulation():
+    """Shared memory backed genome matrix and score vector."""
+
+    def __init__(self, handle: SharedPopulationHandle, create: bool = False):
+        """Attach to the block described by handle, or create it if create is set."""
+        self.capacity = handle.capacity
+        self.width = handle.width
+        self.success_rolls = list(handle.success_rolls)
+        self.material_conditions = list(handle.material_conditions)
+
+        genome_bytes = self.capacity * self.width
+        # Keep the score vector 8 byte aligned
+        self._score_offset = (genome_bytes + SCORE_SIZE - 1) // SCORE_SIZE * SCORE_SIZE
+        total_size = max(self._score_offset + self.capacity * SCORE_SIZE, 1)
+        if create:
+            self._shm = SharedMemory(create=True, size=total_size)
+        else:
+            self._shm = SharedMemory(name=handle.name)
+        self._owner = create
+
+        self.genomes = self._shm.buf[0:genome_bytes]
+        score_end = self._score_offset + self.capacity * SCORE_SIZE
+        self.scores = self._shm.buf[self._score_offset:score_end].cast('d')
+        self.size = 0
+
+    @classmethod
+    def create(cls, capacity: int, width: int, success_rolls: Sequence[int],
+               material_conditions: Sequence[int]) -> 'SharedPopulation':
+        """Allocate a new shared population block."""
+        return cls(SharedPopulationHandle('', capacity, width, tuple(success_rolls[:width]),
+                                          tuple(material_conditions[:width])), create=True)
+
+    @property
+    def handle(self) -> SharedPopulationHandle:
+        """Describe this block so another process can attach to it."""
+        return SharedPopulationHandle(self._shm.name, self.capacity, self.width,
+                                      tuple(self.success_rolls), tuple(self.material_conditions))
+
+    def row(self, index: int) -> memoryview:
+        """Writable view of one genome row."""
+        start = index * self.width
+        return self.genomes[start:start + self.width]
+
+    def set_individual(self, index: int, indiv: Individual, rng: Optional[Rng] = None,
+                       profile: StatProfile = DEFAULT_PROFILE) -> None:
+        """Encode an individual into a row.
+
+        Rows always hold width live genes, crossover can splice any part of one into another row. So
+        trimmed individuals are padded with random actions from the generation heuristics, like the
+        ones mutate_each_row draws for profile, rather than with a filler id that is itself an
+        action.
+        """
+        start = index * self.width
+        encoded = [encoding.ACTION_IDS[gene[0]] for gene in indiv.value[:self.width]]
+        if len(encoded) < self.width:
+            rng = default_rng(rng)
+            max_cp = profile.crafter.cp
+            max_durability = profile.recipe.durability
+            for step in range(len(encoded), self.width):
+                which = get_random_action(step, self.material_conditions[step], 0, False, 0, 0, 0,
+                                          0, 0, max_cp, max_durability, rng, max_cp)
+                encoded.append(encoding.ACTION_IDS[which])
+        self.genomes[start:start + self.width] = bytes(encoded)
+
+    def individual(self, index: int) -> Individual:
+        """Decode one row into an Individual."""
+        return encoding.decode_actions(self.row(index), self.success_rolls,
+                                       self.material_conditions)
+
+    def score_rows(self, start: int, stop: int, score_func: Callable[[Individual], float]) -> None:
+        """Score rows [start, stop) in place, reusing one Individual as the scratch genome."""
+        scratch = Individual(list())
+        for index in range(start, stop):
+            scratch.value = encoding.genes_from_ids(self.row(index), self.success_rolls,
+                                                    self.material_conditions)
+            self.scores[index] = score_func(scratch)
+
+    def reorder(self, order: Sequence[int]) -> None:
+        """Rewrite the population so row i holds what row order[i] held, dropping unlisted rows."""
+        width = self.width
+        genomes = bytes(self.genomes[0:self.size * width])
+        scores = self.scores.tolist()
+        for new_index, old_index in enumerate(order):
+            self.genomes[new_index * width:(new_index + 1) * width] = \
+                genomes[old_index * width:(old_index + 1) * width]
+            self.scores[new_index] = scores[old_index]
+        self.size = len(order)
+
+    def to_population(self, count: Optional[int] = None) -> List[Individual]:
+        """Decode the first count (default all live) rows into a list of Individuals."""
+        return [self.individual(index) for index in range(self.size if count is None else count)]
+
+    def __len__(self):
+        """Number of live rows."""
+        return self.size
+
+    def close(self) -> None:
+        """Detach from the block, and free it if this process created it."""
+        self.genomes.release()
+        self.scores.release()
+        self._shm.close()
+        if self._owner:
+            self._shm.unlink()
+            self._owner = False
+
+
+# Blocks already attached in this worker process, keyed by block name
+_ATTACHED = dict()
+
+
+def attach(handle: SharedPopulationHandle) -> SharedPopulation:
+    """Attach to a shared population, reusing an existing attachment in this process."""
+    shared = _ATTACHED.get(handle.name)
+    if shared is None:
+        shared = _ATTACHED[handle.name] = SharedPopulation(handle)
+    return shared
+
+
+def score_shared_rows(handle: SharedPopulationHandle, start: int, stop: int,
+                      score_func: Callable[[Individual], float]) -> None:
+    """Worker entry point, score a slice of a shared population in place."""
+    attach(handle).score_rows(start, stop, score_func)
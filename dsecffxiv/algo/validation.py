@@ -0,0 +1,172 @@
+"""Validation of hand written macros against the simulator.
+
+    A macro is a plain action sequence, one per line of input, either as action names separated by
+    commas or as a JSON object {"name": ..., "actions": [...]}. Names are matched ignoring case,
+    spaces and punctuation, so both "BasicSynthesis" and "Basic Synthesis" work. Every macro is run
+    under each scenario of a scenario set. A scenario fixes the material condition and success roll
+    of every step, and a scenario set is one of SCENARIO_SETS:
+
+    - normal: normal conditions throughout, once with every stochastic action succeeding (lucky)
+      and once with every one failing (unlucky).
+    - sampled: seeded random conditions and rolls, drawn like the GA draws them.
+
+    Each scenario reports the score, the steps used, why the craft ended (see REASONS) and the final
+    State's fields. The macro is valid if it completes the craft in every scenario.
+"""
+
+import json
+import re
+from typing import Any, Dict, Iterable, List, NamedTuple, Sequence, Tuple
+
+import dsecffxiv.sim_resources.ActionClasses as action
+from dsecffxiv.algo.encoding import ACTION_NAMES
+from dsecffxiv.algo.score import simulate_craft
+from dsecffxiv.sim_resources.Profile import DEFAULT_PROFILE, StatProfile
+from dsecffxiv.sim_resources.State import State
+from dsecffxiv.sim_resources.TestResources import (generate_material_conditions,
+                                                   generate_success_values)
+from dsecffxiv.utils.rng import Rng
+
+SCENARIO_SETS = ('normal', 'sampled')
+DEFAULT_SAMPLES = 20
+# Scenarios cover this many steps, longer macros are rejected
+SCENARIO_STEPS = 100
+# Why a craft ended
+REASONS = ('completed', 'cp_exhausted', 'durability_exhausted', 'unfinished')
+# State attributes that are not part of a craft's result
+_HIDDEN_FIELDS = ('constants', 'success_val')
+LUCKY_ROLL = 0
+UNLUCKY_ROLL = 99
+
+
+def _normalize(name: str) -> str:
+    """Lower case letters and digits only."""
+    return re.sub(r'[^a-z0-9]', '', name.lower())
+
+
+# Normalized name -> action, with the in game spellings that differ from the class names
+ACTION_LOOKUP: Dict[str, type] = {_normalize(name): which for name, which in ACTION_NAMES.items()}
+ACTION_LOOKUP.update({'tricksofthetrade': action.TricksoftheTrade, 'wastenotii': action.WasteNot2,
+                      'nameoftheelements': action.NameoftheElements,
+                      'brandoftheelements': action.BrandoftheElements})
+
+
+class Scenario(NamedTuple):
+    """Material condition and success roll of every step."""
+
+    name: str
+    material_conditions: Tuple[int, ...]
+    success_rolls: Tuple[int, ...]
+
+
+def scenario_set(name: str, samples: int = DEFAULT_SAMPLES, seed: int = 0) -> List[Scenario]:
+    """Build the named scenario set, samples and seed only matter to 'sampled'."""
+    if name == 'normal':
+        normal = (0,) * SCENARIO_STEPS
+        return [Scenario('lucky', normal, (LUCKY_ROLL,) * SCENARIO_STEPS),
+                Scenario('unlucky', normal, (UNLUCKY_ROLL,) * SCENARIO_STEPS)]
+    if name == 'sampled':
+        rng = Rng(seed)
+        return [Scenario('sample-{0}'.format(index),
+                         tuple(generate_material_conditions(SCENARIO_STEPS, rng)),
+                         tuple(generate_success_values(SCENARIO_STEPS, rng)))
+                for index in range(samples)]
+    raise ValueError(
+        'Unknown scenario set {0}, expected one of {1}'.format(name, ', '.join(SCENARIO_SETS)))
+
+
+def parse_macro(line: str) -> Tuple[str, List[type]]:
+    """Parse one input line into an optional name and its actions, ValueError if malformed."""
+    text = line.strip()
+    name = ''
+    if text.startswith('{'):
+        macro = json.loads(text)
+        if not isinstance(macro, dict):
+            raise ValueError('expected a JSON object')
+        name = str(macro.get('name', ''))
+        names = macro.get('actions', [])
+    elif text.startswith('['):
+        names = json.loads(text)
+    else:
+        names = [part for part in re.split(r'[,;]', text) if part.strip()]
+    # A string would be iterated a character at a time
+    if not isinstance(names, list):
+        raise ValueError('actions must be a list of action names')
+    actions = list()
+    for each in names:
+        which = ACTION_LOOKUP.get(_normalize(str(each)))
+        if which is None:
+            raise ValueError('unknown action {0!r}'.format(str(each).strip()))
+        actions.append(which)
+    if not actions:
+        raise ValueError('no actions')
+    if len(actions) > SCENARIO_STEPS:
+        raise ValueError('{0} actions, at most {1} are supported'.format(len(actions),
+                                                                         SCENARIO_STEPS))
+    return name, actions
+
+
+def end_reason(state: State) -> str:
+    """Why a simulated craft ended, one of REASONS."""
+    if state.cp < 0:
+        return 'cp_exhausted'
+    if state.progress >= state.constants.max_progress:
+        return 'completed'
+    if state.durability <= 0:
+        return 'durability_exhausted'
+    return 'unfinished'
+
+
+def run_scenario(actions: Sequence[type], scenario: Scenario,
+                 profile: StatProfile = DEFAULT_PROFILE) -> Dict:
+    """Simulate a macro under one scenario and describe how it ended."""
+    genes = [(which, scenario.success_rolls[step], scenario.material_conditions[step])
+             for step, which in enumerate(actions)]
+    state = State(profile)
+    score, steps = simulate_craft(state, genes, 0)
+    return {
+        'scenario': scenario.name,
+        'score': score,
+        'steps': steps,
+        'unused_steps': len(actions) - steps,
+        'reason': end_reason(state),
+        'state': {field: value for field, value in vars(state).items()
+                  if field not in _HIDDEN_FIELDS},
+    }
+
+
+def validate_macro(actions: Sequence[type], scenarios: Sequence[Scenario],
+                   profile: StatProfile = DEFAULT_PROFILE) -> Dict[str, Any]:
+    """Run a macro under every scenario and summarize the runs."""
+    runs = [run_scenario(actions, scenario, profile) for scenario in scenarios]
+    reasons: Dict[str, int] = dict()
+    for run in runs:
+        reasons[run['reason']] = reasons.get(run['reason'], 0) + 1
+    scores = [run['score'] for run in runs]
+    return {
+        'valid': reasons.get('completed', 0) == len(runs),
+        'completion_rate': reasons.get('completed', 0) / len(runs),
+        'reasons': reasons,
+        'mean_score': sum(scores) / len(scores),
+        'min_score': min(scores),
+        'max_score': max(scores),
+        'scenarios': runs,
+    }
+
+
+def validate_lines(lines: Iterable[Tuple[int, str]], scenarios: Sequence[Scenario],
+                   profile: StatProfile = DEFAULT_PROFILE) -> List[Dict[str, Any]]:
+    """Validate (line number, text) pairs, reporting a malformed line's error instead of raising."""
+    results = list()
+    for line_number, text in lines:
+        result: Dict[str, Any] = {'line': line_number}
+        try:
+            name, actions = parse_macro(text)
+        except ValueError as error:
+            result.update(valid=False, error=str(error))
+        else:
+            result['name'] = name or str(line_number)
+            result['actions'] = [which.__name__ for which in actions]
+            result.update(validate_macro(actions, scenarios, profile))
+        results.append(result)
+    return results
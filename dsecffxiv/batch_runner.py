@@ -0,0 +1,127 @@
+"""Executable to solve many crafter/recipe combinations in one batch, as JSON lines in and out.
+
+Each input line is a job such as
+    {"name": "...", "crafter": {...}, "recipe": {...}, "generations": 100, "config": {...}}
+where crafter and recipe hold any stats to override (see sim_resources/Profile.py) and config
+overrides the headless runner's GA settings. Jobs for the same profile are batched onto the same
+worker process, so its precomputed simulation constants are built once and reused for every job.
+"""
+
+import argparse
+import json
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from dsecffxiv.headless_runner import assemble_config, build_parser, solve_config
+from dsecffxiv.sim_resources.Profile import StatProfile
+
+DEFAULT_GENERATIONS = 100
+DEFAULT_BATCH_SIZE = 4
+
+Job = Tuple[int, Dict[str, Any]]
+
+
+def read_jobs(lines: Iterable[str]) -> Tuple[List[Job], List[Dict[str, Any]]]:
+    """Parse JSON lines into (line index, job) pairs, skipping blank lines.
+
+    A malformed line is reported as an error result for its job instead of raising, so the rest of
+    the batch still runs. Returns the jobs and the error results.
+    """
+    jobs = list()
+    errors = list()
+    for index, line in enumerate(lines):
+        if not line.strip():
+            continue
+        try:
+            job = json.loads(line)
+        except ValueError as error:
+            errors.append({'index': index, 'name': str(index),
+                           'error': 'Bad job: {0}'.format(error)})
+            continue
+        if not isinstance(job, dict):
+            errors.append({'index': index, 'name': str(index),
+                           'error': 'Bad job: expected a JSON object'})
+            continue
+        jobs.append((index, job))
+    return jobs, errors
+
+
+def job_profile(job: Dict[str, Any]) -> StatProfile:
+    """The StatProfile a job solves for."""
+    return StatProfile.from_dict({'crafter': job.get('crafter', {}),
+                                  'recipe': job.get('recipe', {})})
+
+
+def batch_jobs(jobs: List[Job], batch_size: int) -> List[List[Job]]:
+    """Group jobs by profile, then split each group into batches of at most batch_size jobs."""
+    groups: Dict[StatProfile, List[Job]] = dict()
+    for job in jobs:
+        groups.setdefault(job_profile(job[1]), list()).append(job)
+    return [group[start:start + batch_size] for group in groups.values()
+            for start in range(0, len(group), batch_size)]
+
+
+def solve_job(job: Dict[str, Any], solution_cache: Optional[str] = None) -> Dict[str, Any]:
+    """Solve one job with the headless runner's defaults and the job's overrides."""
+    config = assemble_config(build_parser().parse_args(['solve']))
+    if solution_cache is not None:
+        config['solution_cache'] = solution_cache
+    config.update(job.get('config', {}))
+    config['profile'] = job_profile(job)
+    if 'seed' in job:
+        config['seed'] = job['seed']
+    return solve_config(config, job.get('generations', DEFAULT_GENERATIONS),
+                        job.get('backend', 'basic'))
+
+
+def solve_batch(batch: List[Job], solution_cache: Optional[str] = None) -> List[Dict[str, Any]]:
+    """Worker entry point, solve a batch of jobs that share a profile.
+
+    A failing job is reported with its error instead of stopping the rest of the batch.
+    """
+    results = list()
+    for index, job in batch:
+        result: Dict[str, Any] = {'index': index, 'name': job.get('name', str(index))}
+        try:
+            result.update(solve_job(job, solution_cache))
+        except Exception as error:  # pylint: disable=broad-except
+            result['error'] = '{0}: {1}'.format(type(error).__name__, error)
+        results.append(result)
+    return results
+
+
+def main(argv=None) -> int:
+    """Run the batch CLI, exiting non-zero if any job failed."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--input', type=argparse.FileType('r'), default=sys.stdin,
+                        help='JSON lines file of jobs (default: stdin)')
+    parser.add_argument('--output', type=argparse.FileType('w'), default=sys.stdout,
+                        help='Where to write one JSON result per line, in completion order')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1, help='Worker processes')
+    parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE,
+                        help='Most jobs of one profile handed to a worker at once')
+    parser.add_argument('--solution-cache', default=None,
+                        help='SQLite file of best crafts per problem, to answer repeats and warm '
+                             'start jobs')
+    args = parser.parse_args(argv)
+
+    jobs, errors = read_jobs(args.input)
+    for result in errors:
+        args.output.write(json.dumps(result) + '\n')
+    args.output.flush()
+    batches = batch_jobs(jobs, max(args.batch_size, 1))
+    failures = len(errors)
+    with ProcessPoolExecutor(max(args.workers, 1)) as pool:
+        futures = [pool.submit(solve_batch, batch, args.solution_cache) for batch in batches]
+        for future in as_completed(futures):
+            for result in future.result():
+                failures += 'error' in result
+                args.output.write(json.dumps(result) + '\n')
+                args.output.flush()
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
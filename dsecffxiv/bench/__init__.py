@@ -0,0 +1,3 @@
+"""Benchmark harness and suites for the simulator and genetic algorithm."""
+
+from dsecffxiv.bench.harness import BenchmarkResult, compare_to_baseline, run_benchmark
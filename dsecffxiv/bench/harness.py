@@ -0,0 +1,57 @@
+"""Timing helpers and baseline comparison for benchmarks."""
+
+from time import perf_counter
+from typing import Callable, Dict, List, NamedTuple
+
+from dsecffxiv.utils.rng import Rng
+
+
+class BenchmarkResult(NamedTuple):
+    """Throughput measurement for a single benchmark."""
+
+    name: str
+    ops_per_second: float
+    operations: int
+    seconds: float
+    unit: str
+
+    def to_json(self) -> Dict:
+        """Convert the result into a JSON friendly dict."""
+        return {'ops_per_second': self.ops_per_second, 'operations': self.operations,
+                'seconds': self.seconds, 'unit': self.unit}
+
+
+def run_benchmark(name: str, func: Callable[[Rng], int], seed: int, repeats: int = 3,
+                  unit: str = 'op', setup: Callable[[], None] = None) -> BenchmarkResult:
+    """Time func, which returns how many operations it performed, keeping the best of repeats.
+
+    func is handed a freshly seeded stream on every repeat so each repeat does identical work.
+    """
+    best = None
+    for _ in range(repeats):
+        rng = Rng(seed)
+        if setup is not None:
+            setup()
+        start = perf_counter()
+        operations = func(rng)
+        seconds = perf_counter() - start
+        result = BenchmarkResult(name, operations / seconds if seconds > 0 else float('inf'),
+                                 operations, seconds, unit)
+        if best is None or result.ops_per_second > best.ops_per_second:
+            best = result
+    return best
+
+
+def compare_to_baseline(results: Dict[str, Dict], baseline: Dict[str, Dict],
+                        tolerance: float) -> List[str]:
+    """Describe every benchmark that regressed more than tolerance against the baseline."""
+    regressions = list()
+    for name, base in baseline.items():
+        if name not in results:
+            continue
+        current = results[name]['ops_per_second']
+        limit = base['ops_per_second'] * (1 - tolerance)
+        if current < limit:
+            regressions.append('{0}: {1:.1f} {3}/s < {2:.1f} {3}/s (baseline {4:.1f})'.format(
+                name, current, limit, base['unit'], base['ops_per_second']))
+    return regressions
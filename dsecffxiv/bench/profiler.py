@@ -0,0 +1,263 @@
+"""Built-in profiling of GA runs.
+
+    Two modes. 'sample' polls the stacks of every other thread from a background thread every
+    interval seconds. It is cheap enough to leave on for a whole run, and its stacks are written in
+    the collapsed format that flamegraph tools read. 'cprofile' wraps the run in the deterministic
+    cProfile for exact call counts and times, at a much higher overhead and without stacks. It only
+    sees the thread that started it, so the breeding done by ThreadedGeneticAlgorithm's workers is
+    only visible to the sampler.
+
+    Both modes attribute time to GA subsystems by the module and function of a frame (see
+    SUBSYSTEMS) and print a top-N hotspot table. Results of separate runs, e.g. one per worker
+    process, can be merged before reporting.
+"""
+
+import cProfile
+import os
+import pstats
+import sys
+import threading
+from collections import Counter
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple
+
+DEFAULT_INTERVAL = 0.005
+DEFAULT_TOP = 20
+MODES = ('sample', 'cprofile')
+
+# (subsystem, module path suffix, function names or None for every function), first match wins
+SUBSYSTEMS = (
+    ('state step/evaluate', 'sim_resources/State.py', ('step', 'evaluate')),
+    ('state', 'sim_resources/State.py', None),
+    ('action execute', 'sim_resources/ActionClasses.py', None),
+    ('compiled simulator', 'sim_resources/Compiled.py', None),
+    ('scoring', 'algo/score.py', None),
+    ('scoring', 'algo/expected.py', None),
+    ('scoring', 'algo/synthetic.py', ('score', 'score_batch')),
+    ('mutation', 'algo/synthetic.py', ('mutate',)),
+    ('generation', 'algo/synthetic.py', ('random_population',)),
+    ('selection', 'algo/selection.py', None),
+    ('crossover', 'algo/crossover.py', None),
+    ('mutation', 'algo/mutation.py', None),
+    ('generation', 'algo/generation.py', None),
+    ('generation', 'algo/seeding.py', None),
+    ('surrogate', 'algo/surrogate.py', None),
+    ('local search', 'algo/local_search.py', None),
+    ('pareto', 'algo/pareto.py', None),
+    ('ranking', 'algo/genetic_algorithm.py', ('rank_and_cull', 'generation_stats')),
+    ('ga loop', 'algo/genetic_algorithm.py', None),
+)
+OTHER = 'other'
+IDLE = 'idle'
+# How many callers up unattributed cProfile time is followed before it counts as other
+MAX_ATTRIBUTION_DEPTH = 8
+# A sampled thread whose innermost frame is in one of these is waiting, not working
+_IDLE_MODULES = ('threading.py', 'queue.py', 'selectors.py', 'concurrent/futures/_base.py',
+                 'concurrent/futures/thread.py', 'multiprocessing/connection.py')
+
+
+@lru_cache(maxsize=None)
+def subsystem_of(filename: str, function: str) -> Optional[str]:
+    """The subsystem a function belongs to, None if it is not part of any."""
+    path = filename.replace(os.sep, '/')
+    for subsystem, suffix, functions in SUBSYSTEMS:
+        if path.endswith(suffix) and (functions is None or function in functions):
+            return subsystem
+    return None
+
+
+def _label(filename: str, function: str) -> str:
+    """Short frame label, module:function."""
+    return '{0}:{1}'.format(os.path.splitext(os.path.basename(filename))[0], function)
+
+
+class Hotspots():
+    """Time per function and subsystem of a profiled run, plus its collapsed stacks if sampled."""
+
+    def __init__(self, mode: str):
+        """Start empty."""
+        self.mode = mode
+        # label -> [self seconds, total seconds, subsystem]
+        self.functions: Dict[str, List] = dict()
+        self.subsystems: Counter = Counter()
+        # collapsed stack, root first and ; separated -> samples
+        self.stacks: Counter = Counter()
+        self.seconds = 0.0
+
+    def add_function(self, label: str, self_seconds: float, total_seconds: float,
+                     subsystem: str) -> None:
+        """Add time to a function."""
+        entry = self.functions.setdefault(label, [0.0, 0.0, subsystem])
+        entry[0] += self_seconds
+        entry[1] += total_seconds
+
+    def merge(self, other: 'Hotspots') -> None:
+        """Add another run's hotspots to these."""
+        for label, (self_seconds, total_seconds, subsystem) in other.functions.items():
+            self.add_function(label, self_seconds, total_seconds, subsystem)
+        self.subsystems.update(other.subsystems)
+        self.stacks.update(other.stacks)
+        self.seconds += other.seconds
+
+    def format_table(self, top: int = DEFAULT_TOP) -> str:
+        """Subsystem totals and the top functions by self time, as text."""
+        measured = sum(self.subsystems.values()) or 1.0
+        lines = ['{0:<24}{1:>10}{2:>8}'.format('subsystem', 'seconds', '%')]
+        for subsystem, seconds in self.subsystems.most_common():
+            lines.append('{0:<24}{1:>10.3f}{2:>7.1f}%'.format(subsystem, seconds,
+                                                              100 * seconds / measured))
+        lines.append('')
+        lines.append('{0:<48}{1:>10}{2:>10}  {3}'.format('function', 'self', 'total', 'subsystem'))
+        ranked = sorted(self.functions.items(), key=lambda item: item[1][0], reverse=True)
+        for label, (self_seconds, total_seconds, subsystem) in ranked[:top]:
+            lines.append('{0:<48}{1:>10.3f}{2:>10.3f}  {3}'.format(label[:47], self_seconds,
+                                                                   total_seconds, subsystem))
+        if self.mode == 'sample':
+            lines.append('(estimated from {0} samples)'.format(sum(self.stacks.values())))
+        return '\n'.join(lines)
+
+    def write_collapsed(self, path: str) -> None:
+        """Write the sampled stacks in collapsed format, one 'frame;frame;frame count' line each."""
+        with open(path, 'w') as collapsed:
+            for stack, samples in sorted(self.stacks.items()):
+                collapsed.write('{0} {1}\n'.format(stack, samples))
+
+
+class _Sampler(threading.Thread):
+    """Background thread that counts the collapsed stacks of every other thread."""
+
+    def __init__(self, interval: float):
+        """Prepare to sample every interval seconds."""
+        super().__init__(name='profiler-sampler', daemon=True)
+        self.interval = interval
+        self.stacks: Counter = Counter()
+        self.finished = threading.Event()
+        # code object -> (label, subsystem), frames of one code object always map the same
+        self._codes: Dict = dict()
+
+    def _describe(self, code) -> Tuple[str, Optional[str]]:
+        """Label and subsystem of a code object."""
+        described = self._codes.get(code)
+        if described is None:
+            function = getattr(code, 'co_qualname', code.co_name)
+            described = (_label(code.co_filename, function),
+                         subsystem_of(code.co_filename, code.co_name))
+            self._codes[code] = described
+        return described
+
+    def run(self) -> None:
+        """Sample until finished is set."""
+        own = threading.get_ident()
+        while not self.finished.wait(self.interval):
+            for ident, frame in sys._current_frames().items():  # pylint: disable=protected-access
+                filename = frame.f_code.co_filename.replace(os.sep, '/')
+                if ident == own or filename.endswith(_IDLE_MODULES):
+                    continue
+                labels = list()
+                while frame is not None:
+                    labels.append(self._describe(frame.f_code)[0])
+                    frame = frame.f_back
+                self.stacks[';'.join(reversed(labels))] += 1
+
+    def hotspots(self) -> Hotspots:
+        """Turn the sampled stacks into hotspots, each sample worth interval seconds."""
+        result = Hotspots('sample')
+        result.stacks = self.stacks
+        subsystems = {label: subsystem for label, subsystem in self._codes.values()}
+        for stack, samples in self.stacks.items():
+            labels = stack.split(';')
+            seconds = samples * self.interval
+            result.seconds += seconds
+            # Time in a frame outside every subsystem goes to the innermost caller that is in one
+            owner = next((subsystems[label] for label in reversed(labels)
+                          if subsystems.get(label)), OTHER)
+            result.subsystems[owner] += seconds
+            result.add_function(labels[-1], seconds, 0.0, subsystems.get(labels[-1]) or OTHER)
+            for label in set(labels):
+                result.add_function(label, 0.0, seconds, subsystems.get(label) or OTHER)
+        return result
+
+
+class Profiler():
+    """Profile whatever runs between start and stop, or inside a with block."""
+
+    def __init__(self, mode: str = 'sample', interval: float = DEFAULT_INTERVAL):
+        """Prepare a profiler, mode is one of MODES."""
+        if mode not in MODES:
+            raise ValueError(
+                'Unknown profiler mode {0}, expected one of {1}'.format(mode, ', '.join(MODES)))
+        self.mode = mode
+        self.interval = interval
+        self.hotspots: Optional[Hotspots] = None
+        self._sampler: Optional[_Sampler] = None
+        self._profile: Optional[cProfile.Profile] = None
+
+    def start(self) -> None:
+        """Start profiling."""
+        if self.mode == 'sample':
+            self._sampler = _Sampler(self.interval)
+            self._sampler.start()
+        else:
+            self._profile = cProfile.Profile()
+            self._profile.enable()
+
+    def stop(self) -> Hotspots:
+        """Stop profiling and return the hotspots."""
+        if self.mode == 'sample':
+            self._sampler.finished.set()
+            self._sampler.join()
+            self.hotspots = self._sampler.hotspots()
+        else:
+            self._profile.disable()
+            self.hotspots = _cprofile_hotspots(pstats.Stats(self._profile))
+        return self.hotspots
+
+    def __enter__(self) -> 'Profiler':
+        """Profile the with block."""
+        self.start()
+        return self
+
+    def __exit__(self, *_exc) -> None:
+        """Stop at the end of the with block."""
+        self.stop()
+
+
+def _cprofile_hotspots(stats: pstats.Stats) -> Hotspots:
+    """Hotspots from cProfile stats.
+
+    Like the sampler, self time of a function outside every subsystem goes to its callers (split by
+    how long each call site kept it busy), up to the first one that is in a subsystem.
+    """
+    result = Hotspots('cprofile')
+    entries = stats.stats  # type: ignore
+    for key, (_, _, self_seconds, total_seconds, _) in entries.items():
+        filename, _, function = key
+        result.add_function(_label(filename, function), self_seconds, total_seconds,
+                            _cprofile_subsystem(filename, function) or OTHER)
+        _attribute(entries, key, self_seconds, result.subsystems, frozenset())
+        result.seconds += self_seconds
+    return result
+
+
+def _cprofile_subsystem(filename: str, function: str) -> Optional[str]:
+    """Subsystem of a cProfile entry, builtin lock waits are idle time."""
+    if filename == '~' and 'acquire' in function:
+        return IDLE
+    return subsystem_of(filename, function)
+
+
+def _attribute(entries: Dict, key: Tuple, seconds: float, subsystems: Counter,
+               visiting: frozenset) -> None:
+    """Add seconds spent in key to its subsystem, or to its callers' if it has none."""
+    filename, _, function = key
+    subsystem = _cprofile_subsystem(filename, function)
+    callers = entries[key][4] if key in entries else None
+    if subsystem is not None or not callers or key in visiting or \
+            len(visiting) >= MAX_ATTRIBUTION_DEPTH:
+        subsystems[subsystem or OTHER] += seconds
+        return
+    # pstats caller entries are (primitive calls, calls, self seconds, total seconds)
+    busy = sum(entry[2] for entry in callers.values())
+    for caller, entry in callers.items():
+        share = entry[2] / busy if busy > 0 else 1 / len(callers)
+        _attribute(entries, caller, seconds * share, subsystems, visiting | {key})
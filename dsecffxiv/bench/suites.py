@@ -0,0 +1,220 @@
+"""Benchmark suites for the simulator, the GA operators and end to end GA throughput."""
+
+import inspect
+import subprocess
+import sys
+from copy import copy
+from typing import Callable, Dict, List
+
+import dsecffxiv.sim_resources.ActionClasses as action
+from dsecffxiv.algo.crossover import crossover_n_point, crossover_n_point_into
+from dsecffxiv.algo.generation import generate_new_individual, generate_new_population
+from dsecffxiv.algo.genetic_algorithm import (GeneticAlgorithm,
+                                              SharedMemoryGeneticAlgorithm,
+                                              ThreadedGeneticAlgorithm)
+from dsecffxiv.algo.mutation import mutate_each
+from dsecffxiv.algo.score import score_craft, simulate_craft
+from dsecffxiv.algo.selection import selection_tournament
+from dsecffxiv.algo.types import Individual, IndividualPool
+from dsecffxiv.bench.harness import BenchmarkResult, run_benchmark
+from dsecffxiv.sim_resources.State import State
+from dsecffxiv.sim_resources.TestResources import (generate_material_conditions,
+                                                   generate_success_values)
+from dsecffxiv.utils.rng import Rng
+
+INDIVIDUAL_SIZE = 50
+DOMAIN = list(range(1, INDIVIDUAL_SIZE + 1))
+
+
+def all_actions() -> List[type]:
+    """List every concrete action class in the simulator."""
+    return [member for _, member in inspect.getmembers(action, inspect.isclass)
+            if issubclass(member, action.Action) and member is not action.Action]
+
+
+def _sample_population(seed: int, population_size: int):
+    """Build a reproducible population for operator benchmarks."""
+    rng = Rng(seed)
+    material_conditions = generate_material_conditions(INDIVIDUAL_SIZE, rng)
+    success_rolls = generate_success_values(INDIVIDUAL_SIZE, rng)
+    population = generate_new_population(population_size, DOMAIN, INDIVIDUAL_SIZE,
+                                         material_conditions, success_rolls, rng)
+    population.sort(key=score_craft, reverse=True)
+    return population, material_conditions, success_rolls
+
+
+def _mid_craft_state() -> State:
+    """Build a state with buffs and stacks up, so most action branches are exercised."""
+    state = State()
+    state.progress = 4000
+    state.quality = 20000
+    state.iq_stacks = 5
+    state.veneration = 2
+    state.innovation = 2
+    state.waste_not = 2
+    state.manipulation = 3
+    state.success_val = 30
+    return state
+
+
+def simulation_suite(seed: int, scale: float = 1.0) -> List[BenchmarkResult]:
+    """Benchmark single action execution per action class and full craft scoring."""
+    results = list()
+    iterations = max(int(20000 * scale), 1)
+    template = _mid_craft_state()
+
+    def bench_action(which) -> Callable[[], int]:
+        def run(_rng) -> int:
+            for _ in range(iterations):
+                state = copy(template)
+                which.execute(state)
+                state.step()
+            return iterations
+        return run
+
+    def state_copy(_rng) -> int:
+        for _ in range(iterations):
+            copy(template)
+        return iterations
+    # Every action benchmark pays for one copy per step, this is the floor to subtract
+    results.append(run_benchmark('simulation.state_copy', state_copy, seed, unit='state'))
+    for which in all_actions():
+        results.append(run_benchmark('simulation.action.{0}'.format(which.__name__),
+                                     bench_action(which), seed, unit='step'))
+
+    population, _, _ = _sample_population(seed, max(int(500 * scale), 1))
+
+    def full_craft(_rng) -> int:
+        for indiv in population:
+            score_craft(indiv)
+        return len(population)
+    results.append(run_benchmark('simulation.full_craft', full_craft, seed, unit='craft'))
+
+    # The same crafts through the action classes, the reference the compiled simulator is
+    # checked against
+    def full_craft_classes(_rng) -> int:
+        for indiv in population:
+            simulate_craft(State(), indiv.value, 0)
+        return len(population)
+    results.append(run_benchmark('simulation.full_craft_classes', full_craft_classes, seed,
+                                 unit='craft'))
+    return results
+
+
+def operator_suite(seed: int, scale: float = 1.0) -> List[BenchmarkResult]:
+    """Benchmark the selection, crossover, mutation and generation operators."""
+    results = list()
+    iterations = max(int(2000 * scale), 1)
+    population, material_conditions, success_rolls = _sample_population(seed, 500)
+
+    def selection(rng) -> int:
+        for _ in range(iterations):
+            selection_tournament(population, 50, rng)
+        return iterations
+    results.append(run_benchmark('operators.selection_tournament', selection, seed,
+                                 unit='selection'))
+
+    def crossover(rng) -> int:
+        for i in range(iterations):
+            crossover_n_point((population[i % 500], population[(i * 7) % 500]), 25, rng)
+        return iterations
+    results.append(run_benchmark('operators.crossover_n_point', crossover, seed, unit='pair'))
+
+    pool = IndividualPool(2, INDIVIDUAL_SIZE)
+    recycled = (pool.acquire(), pool.acquire())
+
+    def crossover_into(rng) -> int:
+        for i in range(iterations):
+            parents = (population[i % 500], population[(i * 7) % 500])
+            crossover_n_point_into(parents, recycled, 25, rng)
+        return iterations
+    results.append(run_benchmark('operators.crossover_n_point_into', crossover_into, seed,
+                                 unit='pair'))
+
+    # Mutate copies so repeats stay identical
+    children = list()
+
+    def copy_children():
+        # Unscored children with their own gene lists, like the ones the GA mutates
+        children[:] = [Individual(list(indiv.value)) for indiv in population]
+
+    def mutation(rng) -> int:
+        for i in range(iterations):
+            mutate_each(children[i % 500], 0.01, DOMAIN, rng)
+        return iterations
+    results.append(run_benchmark('operators.mutate_each', mutation, seed, unit='individual',
+                                 setup=copy_children))
+
+    generation_size = max(int(500 * scale), 1)
+
+    def generation(rng) -> int:
+        generate_new_population(generation_size, DOMAIN, INDIVIDUAL_SIZE, material_conditions,
+                                success_rolls, rng)
+        return generation_size
+    results.append(run_benchmark('operators.generate_new_population', generation, seed,
+                                 unit='individual'))
+
+    def generation_one_by_one(rng) -> int:
+        for _ in range(generation_size):
+            generate_new_individual(DOMAIN, INDIVIDUAL_SIZE, material_conditions,
+                                    success_rolls, rng)
+        return generation_size
+    results.append(run_benchmark('operators.generate_new_individual', generation_one_by_one, seed,
+                                 unit='individual'))
+    return results
+
+
+def ga_config(population_size: int, seed: int) -> Dict:
+    """Construct the GA config used for end to end benchmarks."""
+    config: Dict = dict()
+    config['seed'] = seed
+    config['population_size'] = population_size
+    config['generation_limit'] = 1000
+    config['individual_size'] = INDIVIDUAL_SIZE
+    config['selection_size'] = population_size // 2
+    config['tournament_size'] = 50
+    config['mutation_chance'] = 0.01
+    config['domain'] = DOMAIN
+    config['replace_pop'] = True
+    config['crossover_points'] = 25
+    return config
+
+
+def end_to_end_suite(seed: int, scale: float = 1.0,
+                     population_sizes=(100, 500)) -> List[BenchmarkResult]:
+    """Benchmark generations per second of each GA implementation across population sizes."""
+    results = list()
+    generations = max(int(10 * scale), 1)
+    for population_size in population_sizes:
+        for ga_type in (GeneticAlgorithm, ThreadedGeneticAlgorithm, SharedMemoryGeneticAlgorithm):
+            def run(_rng, ga_type=ga_type, population_size=population_size) -> int:
+                ga = ga_type(ga_config(population_size, seed))
+                for _ in range(generations):
+                    ga.step()
+                if hasattr(ga, 'thread_pool'):
+                    ga.thread_pool.shutdown()
+                if hasattr(ga, 'close'):
+                    ga.close()
+                return generations
+            name = 'end_to_end.{0}.population_{1}'.format(ga_type.__name__, population_size)
+            results.append(run_benchmark(name, run, seed, repeats=1, unit='generation'))
+    return results
+
+
+def startup_suite(seed: int, scale: float = 1.0) -> List[BenchmarkResult]:
+    """Benchmark how many fresh interpreters per second can import the headless runner."""
+    runs = max(int(5 * scale), 1)
+
+    def run(_rng) -> int:
+        for _ in range(runs):
+            subprocess.run([sys.executable, '-c', 'import dsecffxiv.headless_runner'], check=True)
+        return runs
+    return [run_benchmark('startup.headless_runner', run, seed, repeats=1, unit='process')]
+
+
+SUITES = {
+    'simulation': simulation_suite,
+    'operators': operator_suite,
+    'end_to_end': end_to_end_suite,
+    'startup': startup_suite,
+}
@@ -0,0 +1,74 @@
+"""Executable to run the benchmark suites and check them against a saved baseline."""
+
+import argparse
+import json
+import platform
+import sys
+from typing import Dict
+
+from dsecffxiv.bench.harness import compare_to_baseline
+from dsecffxiv.bench.suites import SUITES
+
+DEFAULT_SEED = 4200
+DEFAULT_TOLERANCE = 0.15
+
+
+def run_suites(suite_names, seed: int, scale: float) -> Dict:
+    """Run the named suites and collect the results into one machine readable document."""
+    results = dict()
+    for suite_name in suite_names:
+        for result in SUITES[suite_name](seed, scale):
+            print('{0:<60} {1:>14.1f} {2}/s'.format(result.name, result.ops_per_second,
+                                                    result.unit), file=sys.stderr)
+            results[result.name] = result.to_json()
+    return {
+        'meta': {'seed': seed, 'scale': scale, 'suites': list(suite_names),
+                 'python': platform.python_version(), 'machine': platform.machine()},
+        'results': results,
+    }
+
+
+def main(argv=None) -> int:
+    """Run the benchmark CLI, exiting non-zero if any benchmark regressed against the baseline."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--suite', action='append', choices=sorted(SUITES),
+                        help='Suite to run, may be given multiple times (default: all)')
+    parser.add_argument('--seed', type=int, default=DEFAULT_SEED)
+    parser.add_argument('--scale', type=float, default=1.0,
+                        help='Multiplier on the iteration counts')
+    parser.add_argument('--output', help='Write the results JSON here instead of stdout')
+    parser.add_argument('--baseline', help='Compare against a previously saved results JSON')
+    parser.add_argument('--save-baseline', help='Also save the results as a baseline to this path')
+    parser.add_argument('--tolerance', type=float, default=DEFAULT_TOLERANCE,
+                        help='Allowed fractional slowdown before a benchmark counts as a '
+                             'regression')
+    args = parser.parse_args(argv)
+
+    document = run_suites(args.suite or list(SUITES), args.seed, args.scale)
+
+    if args.output:
+        with open(args.output, 'w') as output:
+            json.dump(document, output, indent=2)
+    else:
+        json.dump(document, sys.stdout, indent=2)
+        sys.stdout.write('\n')
+
+    if args.save_baseline:
+        with open(args.save_baseline, 'w') as output:
+            json.dump(document, output, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as baseline_file:
+            baseline = json.load(baseline_file)
+        if baseline['meta']['seed'] != args.seed or baseline['meta']['scale'] != args.scale:
+            print('Warning: baseline was recorded with a different seed or scale', file=sys.stderr)
+        regressions = compare_to_baseline(document['results'], baseline['results'], args.tolerance)
+        for regression in regressions:
+            print('REGRESSION {0}'.format(regression), file=sys.stderr)
+        if regressions:
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,488 @@
+"""Executable to spread GA jobs and evaluation batches over worker processes on any number of nodes.
+
+A coordinator listens on a TCP port and queues tasks, and workers connect from any host and pull
+one task at a time as newline delimited JSON. Genomes travel in the compact one byte per step
+encoding of algo/encoding.py, base64 encoded. While a worker runs a task it sends a heartbeat every
+few seconds, each one extends the task's lease. If a worker disconnects or goes quiet for longer
+than the lease, the task goes back to the front of the queue for the next worker. The first answer
+for a task wins, and a task that fails max_attempts times is reported as failed.
+
+    coordinator: python -m dsecffxiv.distributed_runner --host 0.0.0.0 sweep --jobs 500
+    every node:  python -m dsecffxiv.distributed_runner --host COORDINATOR worker --processes 32
+
+sweep --spawn-workers N also starts N workers on the coordinator's host, which is all it takes to
+run everything on one machine.
+"""
+
+import argparse
+import asyncio
+import base64
+import json
+import os
+import socket
+import subprocess
+import sys
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor, as_completed
+from typing import Any, Callable, Deque, Dict, List, Optional, Sequence, Set, Tuple
+
+from dsecffxiv.algo.encoding import decode_actions, encode_actions
+from dsecffxiv.algo.report import StatsWriter, render_summary
+from dsecffxiv.algo.score import score_craft
+from dsecffxiv.algo.types import Population
+from dsecffxiv.headless_runner import individual_to_json
+from dsecffxiv.multi_runner import GEN_LIMIT, JOB_COUNT, SUMMARY_PATH, do_run
+from dsecffxiv.sim_resources.Profile import DEFAULT_PROFILE, StatProfile
+
+DEFAULT_HOST = '127.0.0.1'
+DEFAULT_PORT = 8766
+# Seconds a worker may go without a heartbeat before its task is handed to another one
+DEFAULT_LEASE = 300.0
+DEFAULT_HEARTBEAT = 30.0  # Seconds between a worker's heartbeats while it runs a task
+DEFAULT_MAX_ATTEMPTS = 3
+DEFAULT_CONNECT_TIMEOUT = 30.0
+DEFAULT_EVALUATION_BATCH = 256
+STATS_DIR = 'distributed_run_stats'
+
+
+class RemoteTaskError(Exception):
+    """A task raised on its worker, or was given up on after max_attempts."""
+
+
+def run_job(payload: Dict[str, Any]) -> Dict[str, Any]:
+    """Worker side of a 'job' task, one multi_runner GA run."""
+    overrides = dict(payload.get('config', dict()))
+    profile = StatProfile.from_dict(payload.get('profile', dict()))
+    if profile != DEFAULT_PROFILE:
+        overrides['profile'] = profile
+    rows, best = do_run(payload['job'], overrides, payload.get('generations', GEN_LIMIT))
+    return {'rows': rows, 'score': score_craft(best, profile),
+            'individual': individual_to_json(best)}
+
+
+def run_evaluation(payload: Dict[str, Any]) -> Dict[str, Any]:
+    """Worker side of an 'evaluate' task, score a batch of encoded genomes of one problem."""
+    profile = StatProfile.from_dict(payload['profile'])
+    scores = list()
+    lengths = list()
+    for genome in payload['genomes']:
+        indiv = decode_actions(base64.b64decode(genome), payload['success_rolls'],
+                               payload['material_conditions'])
+        scores.append(score_craft(indiv, profile))
+        lengths.append(indiv.effective_length)
+    return {'scores': scores, 'lengths': lengths}
+
+
+TASK_HANDLERS: Dict[str, Callable[[Dict[str, Any]], Dict[str, Any]]] = {
+    'job': run_job,
+    'evaluate': run_evaluation,
+}
+
+
+class _Task():
+    """A queued or running task and the future its answer goes to."""
+
+    def __init__(self, task_id: int, kind: str, payload: Dict[str, Any], future: Future):
+        """Record a new task that has not been handed out yet."""
+        self.task_id = task_id
+        self.kind = kind
+        self.payload = payload
+        self.future = future
+        self.attempts = 0
+        # The connection working on the task and the event loop time its lease runs out, None
+        # while queued. Every heartbeat from the holder moves the deadline a full lease ahead.
+        self.holder: Optional[asyncio.StreamWriter] = None
+        self.deadline: Optional[float] = None
+
+
+class Coordinator():
+    """Serve queued tasks to workers from a background thread and collect their answers."""
+
+    def __init__(self, host: str = DEFAULT_HOST, port: int = DEFAULT_PORT,
+                 lease: float = DEFAULT_LEASE, max_attempts: int = DEFAULT_MAX_ATTEMPTS):
+        """Configure the coordinator, it only listens once started."""
+        self.host = host
+        self.port = port
+        self.lease = lease
+        self.max_attempts = max(max_attempts, 1)
+        self.address: Optional[Tuple[str, int]] = None
+        self.stats = {'submitted': 0, 'completed': 0, 'failed': 0, 'requeued': 0, 'connections': 0}
+
+        # Everything below is only touched on the coordinator's event loop
+        self._tasks: Dict[int, _Task] = dict()
+        self._queue: Deque[int] = deque()
+        self._next_id = 0
+        self._writers: Set[asyncio.StreamWriter] = set()
+        self._handlers: Set[asyncio.Task] = set()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._work: Optional[asyncio.Event] = None
+        self._stopping: Optional[asyncio.Event] = None
+        self._thread: Optional[threading.Thread] = None
+        self._started = threading.Event()
+        self._startup_error: Optional[Exception] = None
+
+    def start(self) -> Tuple[str, int]:
+        """Start listening and return the bound address, port 0 picks a free port."""
+        self._thread = threading.Thread(target=asyncio.run, args=(self._serve(),), daemon=True)
+        self._thread.start()
+        self._started.wait()
+        if self._startup_error is not None:
+            raise self._startup_error
+        return self.address
+
+    def submit(self, kind: str, payload: Dict[str, Any]) -> Future:
+        """Queue a task of one of the TASK_HANDLERS kinds, the future resolves with its result."""
+        if kind not in TASK_HANDLERS:
+            raise ValueError(
+                'Unknown task kind {0}, expected one of {1}'.format(kind, ', '.join(TASK_HANDLERS)))
+        future: Future = Future()
+        self._loop.call_soon_threadsafe(self._enqueue, kind, payload, future)
+        return future
+
+    def close(self) -> None:
+        """Disconnect every worker and fail the tasks that were never answered."""
+        if self._thread is None:
+            return
+        self._loop.call_soon_threadsafe(self._stop)
+        self._thread.join()
+        self._thread = None
+        for task in self._tasks.values():
+            if not task.future.done():
+                task.future.set_exception(
+                    RemoteTaskError('Coordinator closed before the task was answered'))
+        self._tasks.clear()
+
+    def __enter__(self) -> 'Coordinator':
+        """Start on entering a with block."""
+        self.start()
+        return self
+
+    def __exit__(self, *_exc) -> None:
+        """Close on leaving the with block."""
+        self.close()
+
+    async def _serve(self) -> None:
+        """Accept workers until stopped."""
+        self._loop = asyncio.get_running_loop()
+        self._work = asyncio.Event()
+        self._stopping = asyncio.Event()
+        try:
+            server = await asyncio.start_server(self._handle_worker, self.host, self.port)
+        except OSError as error:
+            self._startup_error = error
+            self._started.set()
+            return
+        self.address = server.sockets[0].getsockname()[:2]
+        watchdog = asyncio.ensure_future(self._watch_leases())
+        self._started.set()
+        async with server:
+            await self._stopping.wait()
+        watchdog.cancel()
+        for writer in list(self._writers):
+            writer.close()
+        # Closing the connections ends every handler, let them finish instead of cancelling them
+        await asyncio.gather(*self._handlers, return_exceptions=True)
+
+    def _stop(self) -> None:
+        """Wake everything waiting on the loop so it can wind down."""
+        self._stopping.set()
+        self._work.set()
+
+    def _enqueue(self, kind: str, payload: Dict[str, Any], future: Future) -> None:
+        """Add a submitted task to the back of the queue."""
+        task = _Task(self._next_id, kind, payload, future)
+        self._next_id += 1
+        self._tasks[task.task_id] = task
+        self._queue.append(task.task_id)
+        self.stats['submitted'] += 1
+        self._work.set()
+
+    def _requeue(self, task_id: int, holder: asyncio.StreamWriter, reason: str) -> None:
+        """Take a task away from holder and put it back at the front of the queue, or give up."""
+        task = self._tasks.get(task_id)
+        if task is None or task.holder is not holder:
+            return  # Already answered, or already handed to someone else
+        task.holder = None
+        task.deadline = None
+        if task.attempts >= self.max_attempts:
+            error = 'Gave up after {0} attempts, the last one: {1}'.format(task.attempts, reason)
+            self._finish(task_id, {'type': 'error', 'error': error})
+            return
+        self.stats['requeued'] += 1
+        self._queue.appendleft(task_id)
+        self._work.set()
+
+    def _finish(self, task_id: int, message: Dict[str, Any]) -> None:
+        """Resolve a task with a worker's answer, later answers to the same task are dropped."""
+        task = self._tasks.pop(task_id, None)
+        if task is None or task.future.done():
+            return
+        if message['type'] == 'result':
+            self.stats['completed'] += 1
+            task.future.set_result(message['result'])
+        else:
+            self.stats['failed'] += 1
+            task.future.set_exception(RemoteTaskError(message['error']))
+
+    async def _next_task(self) -> Optional[_Task]:
+        """Wait for a queued task, None once the coordinator is stopping."""
+        while not self._stopping.is_set():
+            while self._queue:
+                task = self._tasks.get(self._queue.popleft())
+                if task is not None:
+                    return task
+            self._work.clear()
+            await self._work.wait()
+        return None
+
+    async def _watch_leases(self) -> None:
+        """Requeue tasks whose holder has been quiet for longer than the lease."""
+        while True:
+            await asyncio.sleep(min(self.lease, 1.0))
+            now = self._loop.time()
+            for task in list(self._tasks.values()):
+                if task.deadline is not None and task.deadline < now:
+                    self._requeue(task.task_id, task.holder,
+                                  'lease of {0}s ran out'.format(self.lease))
+
+    async def _handle_worker(self, reader: asyncio.StreamReader,
+                             writer: asyncio.StreamWriter) -> None:
+        """Serve one worker connection, requeueing whatever it still holds when it goes away."""
+        self._writers.add(writer)
+        self._handlers.add(asyncio.current_task())
+        self.stats['connections'] += 1
+        name = '{0}:{1}'.format(*writer.get_extra_info('peername')[:2])
+        held: Set[int] = set()
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                message = json.loads(line)
+                if message['type'] == 'hello':
+                    name = message.get('worker', name)
+                elif message['type'] == 'heartbeat':
+                    task = self._tasks.get(message['task'])
+                    if task is not None and task.holder is writer:
+                        task.deadline = self._loop.time() + self.lease
+                elif message['type'] in ('result', 'error'):
+                    held.discard(message['task'])
+                    self._finish(message['task'], message)
+                elif message['type'] == 'pull':
+                    task = await self._next_task()
+                    if task is None:
+                        break
+                    task.attempts += 1
+                    task.holder = writer
+                    task.deadline = self._loop.time() + self.lease
+                    held.add(task.task_id)
+                    writer.write((json.dumps({'type': 'task', 'task': task.task_id,
+                                              'kind': task.kind, 'payload': task.payload})
+                                  + '\n').encode())
+                    await writer.drain()
+        except (ConnectionError, ValueError):
+            pass
+        finally:
+            self._writers.discard(writer)
+            self._handlers.discard(asyncio.current_task())
+            for task_id in held:
+                self._requeue(task_id, writer, 'worker {0} disconnected'.format(name))
+            writer.close()
+
+
+def _connect(host: str, port: int, timeout: float) -> socket.socket:
+    """Connect to the coordinator, retrying until it is up or timeout seconds have passed."""
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            return socket.create_connection((host, port))
+        except OSError:
+            if time.monotonic() >= deadline:
+                raise
+            time.sleep(0.2)
+
+
+def _send_heartbeats(send: Callable[[Dict[str, Any]], None], task_id: int, interval: float,
+                     done: threading.Event) -> None:
+    """Tell the coordinator every interval seconds that the task still runs, until done is set."""
+    while not done.wait(interval):
+        try:
+            send({'type': 'heartbeat', 'task': task_id})
+        except OSError:
+            return  # The main loop notices the lost connection once the task is done
+
+
+def run_worker(host: str = DEFAULT_HOST, port: int = DEFAULT_PORT, name: Optional[str] = None,
+               connect_timeout: float = DEFAULT_CONNECT_TIMEOUT,
+               heartbeat: float = DEFAULT_HEARTBEAT) -> int:
+    """Pull and run tasks until the coordinator goes away, returning how many were answered.
+
+    Heartbeats are sent every heartbeat seconds while a task runs, keep it well below the
+    coordinator's lease.
+    """
+    name = name or '{0}:{1}'.format(socket.gethostname(), os.getpid())
+    answered = 0
+    with _connect(host, port, connect_timeout) as connection, connection.makefile('r') as messages:
+        # Heartbeats are sent from their own thread, keep messages from interleaving
+        sending = threading.Lock()
+
+        def send(message: Dict[str, Any]) -> None:
+            data = (json.dumps(message) + '\n').encode()
+            with sending:
+                connection.sendall(data)
+
+        try:
+            send({'type': 'hello', 'worker': name})
+            while True:
+                send({'type': 'pull'})
+                line = messages.readline()
+                if not line:
+                    break
+                task = json.loads(line)
+                done = threading.Event()
+                beating = threading.Thread(target=_send_heartbeats,
+                                           args=(send, task['task'], heartbeat, done), daemon=True)
+                beating.start()
+                try:
+                    answer = {'type': 'result', 'task': task['task'],
+                              'result': TASK_HANDLERS[task['kind']](task['payload'])}
+                except Exception as error:  # pylint: disable=broad-except
+                    answer = {'type': 'error', 'task': task['task'],
+                              'error': '{0}: {1}'.format(type(error).__name__, error)}
+                finally:
+                    done.set()
+                    beating.join()
+                send(answer)
+                answered += 1
+        except ConnectionError:
+            pass
+    return answered
+
+
+def spawn_workers(count: int, host: str, port: int) -> List[subprocess.Popen]:
+    """Start count worker processes on this host."""
+    command = [sys.executable, '-m', 'dsecffxiv.distributed_runner', '--host', host, '--port',
+               str(port), 'worker']
+    return [subprocess.Popen(command) for _ in range(count)]
+
+
+def evaluate_population(coordinator: Coordinator, profile: StatProfile,
+                        material_conditions: Sequence[int], success_rolls: Sequence[int],
+                        population: Population,
+                        batch_size: int = DEFAULT_EVALUATION_BATCH) -> List[float]:
+    """Score a population on the workers in batches, returning the scores in population order."""
+    problem = {'profile': profile.to_dict(), 'material_conditions': list(material_conditions),
+               'success_rolls': [int(roll) for roll in success_rolls]}
+    futures = [coordinator.submit('evaluate', dict(problem, genomes=[
+        base64.b64encode(encode_actions(indiv)).decode()
+        for indiv in population[start:start + batch_size]]))
+        for start in range(0, len(population), batch_size)]
+    scores = list()
+    for future in futures:
+        scores.extend(future.result()['scores'])
+    return scores
+
+
+def sweep(coordinator: Coordinator, jobs: int, generations: int, overrides: Dict[str, Any],
+          stats_dir: str) -> Tuple[Optional[Dict[str, Any]], int]:
+    """Run jobs GA's on the workers, writing their stats as they finish.
+
+    Returns the best job's result and the number of jobs that failed.
+    """
+    from tqdm import tqdm  # pylint: disable=import-outside-toplevel
+
+    futures = [coordinator.submit('job',
+                                  {'job': job, 'generations': generations, 'config': overrides})
+               for job in range(jobs)]
+    best = None
+    failures = 0
+    with StatsWriter(stats_dir) as writer:
+        for future in tqdm(as_completed(futures), total=len(futures)):
+            try:
+                result = future.result()
+            except RemoteTaskError as error:
+                failures += 1
+                print('Job failed: {0}'.format(error), file=sys.stderr)
+                continue
+            for row in result['rows']:
+                writer.append(*row)
+            if best is None or result['score'] > best['score']:
+                best = result
+    return best, failures
+
+
+def main(argv=None) -> int:
+    """Run a coordinator sweep or a worker."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--host', default=DEFAULT_HOST,
+                        help='Address the coordinator listens on (0.0.0.0 for every node), or '
+                             'connects to')
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT)
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    worker_parser = commands.add_parser('worker', help='Pull and run tasks from a coordinator')
+    worker_parser.add_argument('--processes', type=int, default=1,
+                               help='Worker processes to run on this node')
+    worker_parser.add_argument('--connect-timeout', type=float, default=DEFAULT_CONNECT_TIMEOUT,
+                               help='Seconds to keep retrying while the coordinator is not up yet')
+    worker_parser.add_argument('--heartbeat', type=float, default=DEFAULT_HEARTBEAT,
+                               help='Seconds between heartbeats while a task runs, below the '
+                                    'coordinator\'s lease')
+
+    sweep_parser = commands.add_parser('sweep',
+                                       help='Coordinate a multi_runner style sweep of GA jobs')
+    sweep_parser.add_argument('--jobs', type=int, default=JOB_COUNT)
+    sweep_parser.add_argument('--generations', type=int, default=GEN_LIMIT,
+                              help='Generation limit per job')
+    sweep_parser.add_argument('--config', type=json.loads, default=dict(),
+                              help='JSON object of GA config overrides for every job')
+    sweep_parser.add_argument('--spawn-workers', type=int, default=0,
+                              help='Local worker processes to start')
+    sweep_parser.add_argument('--lease', type=float, default=DEFAULT_LEASE,
+                              help='Seconds a worker may go without a heartbeat before its job is '
+                                   'handed to another')
+    sweep_parser.add_argument('--max-attempts', type=int, default=DEFAULT_MAX_ATTEMPTS)
+    sweep_parser.add_argument('--stats-dir', default=STATS_DIR,
+                              help='Directory to write per generation stats to')
+    sweep_parser.add_argument('--summary', default=SUMMARY_PATH,
+                              help='Image to render the percentile summary to, .png or .svg (empty '
+                                   'to skip)')
+    args = parser.parse_args(argv)
+
+    if args.command == 'worker':
+        if args.processes <= 1:
+            run_worker(args.host, args.port, connect_timeout=args.connect_timeout,
+                       heartbeat=args.heartbeat)
+            return 0
+        with ProcessPoolExecutor(args.processes) as pool:
+            for future in [pool.submit(run_worker, args.host, args.port, None, args.connect_timeout,
+                                       args.heartbeat)
+                           for _ in range(args.processes)]:
+                future.result()
+        return 0
+
+    workers: List[subprocess.Popen] = list()
+    with Coordinator(args.host, args.port, args.lease, args.max_attempts) as coordinator:
+        host, port = coordinator.address
+        print('Coordinator listening on {0}:{1}'.format(host, port), file=sys.stderr)
+        if args.spawn_workers:
+            local_host = DEFAULT_HOST if host == '0.0.0.0' else host
+            workers = spawn_workers(args.spawn_workers, local_host, port)
+        best, failures = sweep(coordinator, args.jobs, args.generations, args.config,
+                               args.stats_dir)
+        print('Stats: {0}'.format(json.dumps(coordinator.stats)), file=sys.stderr)
+    for worker in workers:
+        worker.wait()
+
+    if best is not None:
+        print('{0} => {1}'.format(json.dumps(best['individual']), best['score']))
+    if args.summary:
+        render_summary(args.stats_dir, args.summary)
+        print('Summary written to {0}'.format(args.summary))
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -3,7 +3,7 @@
 # import gc
 import sys
 from time import time_ns
-from typing import Any, Dict, List
+from typing import Dict
 
 import cmd2
 from cmd2.decorators import with_argument_list
@@ -11,8 +11,12 @@ from tqdm import tqdm
 
 from dsecffxiv.algo.genetic_algorithm import (GeneticAlgorithm,
                                               ThreadedGeneticAlgorithm)
-from dsecffxiv.algo.stats import print_leaderboard, show_p_stats, show_stats
-from dsecffxiv.algo.types.population import Population
+from dsecffxiv.algo.history import HISTORY_WINDOW, RollingHistory
+from dsecffxiv.algo.stats import print_leaderboard, show_history_stats, show_p_stats
+from dsecffxiv.bench.profiler import DEFAULT_INTERVAL, DEFAULT_TOP, MODES, Profiler
+from dsecffxiv.sim_resources.Compiled import STEPS
+from dsecffxiv.sim_resources.Profile import simulation_constants
+from dsecffxiv.utils.memory import deep_sizeof, format_bytes
 
 
 class GenAlgShell(cmd2.Cmd):
@@ -43,6 +47,14 @@ class GenAlgShell(cmd2.Cmd):
         self.auto_domain = True
         self.replace_pop = False
         self.crossover_points = 5
+        self.local_search_elites = 0
+        self.local_search_budget = 200
+        self.adaptive = False
+        self.history_window = HISTORY_WINDOW
+        self.history_spill = ''
+        self.profile_mode = 'sample'
+        self.profile_interval = DEFAULT_INTERVAL
+        self.profile_top = DEFAULT_TOP
 
         self.add_settable(cmd2.Settable('population_size', int,
                                         'Number of individuals in the population', onchange_cb=self.bind_config))
@@ -62,10 +74,30 @@ class GenAlgShell(cmd2.Cmd):
                                         bool, 'Should we replace the current population all with children', onchange_cb=self.bind_config))
         self.add_settable(cmd2.Settable('crossover_points',
                                         int, 'How many points to cross over the parents', onchange_cb=self.bind_config))
+        self.add_settable(cmd2.Settable('local_search_elites', int,
+                                        'How many elites to polish with local search each '
+                                        'generation', onchange_cb=self.bind_config))
+        self.add_settable(cmd2.Settable('local_search_budget',
+                                        int, 'Local search neighbor evaluations per generation',
+                                        onchange_cb=self.bind_config))
+        self.add_settable(cmd2.Settable('adaptive', bool,
+                                        'Adapt operator rates online and restart stalled runs',
+                                        onchange_cb=self.bind_config))
+        self.add_settable(cmd2.Settable('history_window',
+                                        int, 'How many generation summaries to keep in memory',
+                                        onchange_cb=self.bind_history))
+        self.add_settable(cmd2.Settable('history_spill', str,
+                                        'Stats directory older generations spill to, empty to '
+                                        'drop them (from the next reset)'))
+        self.add_settable(cmd2.Settable('profile_mode',
+                                        str, 'Profiler used by the profile command', choices=MODES))
+        self.add_settable(cmd2.Settable('profile_interval',
+                                        float, 'Seconds between samples of the sampling profiler'))
+        self.add_settable(cmd2.Settable('profile_top',
+                                        int, 'How many functions the hotspot table lists'))
 
         self.genetic_algorithm: GeneticAlgorithm = None
-        self.population_history: List[Population] = list()
-        self.profile_times: List[Any] = list()
+        self.history = RollingHistory(self.history_window, self.history_spill or None)
 
     def assemble_config(self) -> Dict:
         """Construct a config dict from the member values."""
@@ -78,6 +110,9 @@ class GenAlgShell(cmd2.Cmd):
         config['mutation_chance'] = self.mutation_chance
         config['replace_pop'] = self.replace_pop
         config['crossover_points'] = self.crossover_points
+        config['local_search_elites'] = self.local_search_elites
+        config['local_search_budget'] = self.local_search_budget
+        config['adaptive'] = self.adaptive
         config['domain'] = list(
             range(1, self.individual_size + 1)) if self.auto_domain else None  # make domain more generic
 
@@ -89,18 +124,38 @@ class GenAlgShell(cmd2.Cmd):
             self.genetic_algorithm = ThreadedGeneticAlgorithm(
                 self.assemble_config())
         else:
-            self.genetic_algorithm.config = self.assemble_config()
+            self.genetic_algorithm.reconfigure(self.assemble_config())
+
+    def bind_history(self, _name, _old, _new):
+        """Resize the rolling history to the new window."""
+        self.history.resize(self.history_window)
 
     def do_run(self, args):
         """Run algorithm until converge."""
 
-    def do_stats(self, _args):
-        """Print the stats for the current run."""
-        show_stats(self.population_history, self.genetic_algorithm.score_func)
-
-    def do_pstats(self, _args):
-        """Profile stats."""
-        show_p_stats(self.profile_times)
+    def do_stats(self, args):
+        """Plot the stats for the current run, or save them to the .png/.svg path given."""
+        show_history_stats(self.history, args.strip() or None)
+
+    def do_pstats(self, args):
+        """Plot the profile stats, or save them to the .png/.svg path given."""
+        show_p_stats(self.history.series('seconds'), args.strip() or None)
+
+    def do_memory(self, _args):
+        """Report the memory held by the population, the history and the simulation caches."""
+        # One seen set, so objects shared between them are only counted where first reached
+        seen = set()
+        ga = self.genetic_algorithm
+        population = ga.population if ga is not None else None
+        print("Population: {0} individuals, {1}".format(
+            len(population or ()), format_bytes(deep_sizeof(population, seen))))
+        print("History: {0}/{1} generations in memory, {2} spilled{3}, {4}".format(
+            len(self.history.summaries), self.history.window, self.history.spilled,
+            " to " + self.history.spill_directory if self.history.spill_directory else "",
+            format_bytes(deep_sizeof(self.history.summaries, seen))))
+        constants = simulation_constants.cache_info()
+        print("Caches: {0} stat profiles, {1} compiled genes, {2}".format(
+            constants.currsize, len(STEPS), format_bytes(deep_sizeof(STEPS, seen))))
 
     # def do_gc(self, _opts):
     #     """Manually run garbage collection."""
@@ -110,7 +165,8 @@ class GenAlgShell(cmd2.Cmd):
     def do_reset(self, _args):
         """Reset the current run."""
         self.genetic_algorithm = None
-        self.population_history = list()
+        self.history.close()
+        self.history = RollingHistory(self.history_window, self.history_spill or None)
 
     @with_argument_list
     def do_leaderboard(self, args):
@@ -134,13 +190,35 @@ class GenAlgShell(cmd2.Cmd):
             self.genetic_algorithm = ThreadedGeneticAlgorithm(
                 self.assemble_config())
 
-        # Run n steps
+        self.run_steps(steps)
+
+    @with_argument_list
+    def do_profile(self, args):
+        """Profile number generations (default 1), print the hotspots and save them to a prefix."""
+        steps = int(args[0]) if len(args) >= 1 else 1
+        prefix = args[1] if len(args) >= 2 else None
+
+        if self.genetic_algorithm is None:
+            self.genetic_algorithm = ThreadedGeneticAlgorithm(
+                self.assemble_config())
+
+        with Profiler(self.profile_mode, self.profile_interval) as profiler:
+            self.run_steps(steps)
+        print(profiler.hotspots.format_table(self.profile_top))
+        if prefix:
+            with open(prefix + '.txt', 'w') as table:
+                table.write(profiler.hotspots.format_table(self.profile_top) + '\n')
+            if profiler.hotspots.stacks:
+                profiler.hotspots.write_collapsed(prefix + '.collapsed')
+            print('Hotspots written to {0}.*'.format(prefix))
+
+    def run_steps(self, steps: int):
+        """Run steps generations, recording each into the history."""
         for _ in tqdm(range(steps), desc='Simulating', unit='Generations'):
             start_time = time_ns()
             self.genetic_algorithm.step()
             end_time = time_ns()
-            self.population_history.append(self.genetic_algorithm.population)
-            self.profile_times.append(end_time - start_time)
+            self.history.append(*self.genetic_algorithm.generation_stats(), end_time - start_time)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,353 @@
+"""Non-interactive entry point for running the genetic algorithm and reporting results as JSON.
+
+Only the simulation and algorithm core are imported here, plotting and the REPL are never loaded,
+so this is cheap to spawn from batch jobs and short-lived workers.
+"""
+
+from time import perf_counter
+
+_IMPORT_START = perf_counter()
+
+# pylint: disable=wrong-import-position
+import argparse
+import json
+import subprocess
+import sys
+from statistics import median
+from typing import Any, Callable, Dict, List, Optional
+
+from dsecffxiv.algo.expected import expected_craft
+from dsecffxiv.algo.genetic_algorithm import (GeneticAlgorithm,
+                                              PipelinedGeneticAlgorithm,
+                                              SharedMemoryGeneticAlgorithm,
+                                              ThreadedGeneticAlgorithm)
+from dsecffxiv.algo.pareto import pareto_front
+from dsecffxiv.algo.pipeline import DEFAULT_CHUNK
+from dsecffxiv.algo.report import StatsWriter
+from dsecffxiv.algo.score import score_craft
+from dsecffxiv.algo.seeding import SEEDING_STRATEGIES
+from dsecffxiv.algo.solution_cache import SolutionCache, problem_key
+from dsecffxiv.algo.types import Individual
+from dsecffxiv.sim_resources.Profile import DEFAULT_PROFILE, StatProfile
+
+IMPORT_SECONDS = perf_counter() - _IMPORT_START
+
+# Modules that should never be pulled in by a headless run
+HEAVY_MODULES = ('matplotlib', 'cmd2', 'tqdm')
+
+
+def assemble_config(args: argparse.Namespace) -> Dict:
+    """Construct a GA config dict from the parsed arguments."""
+    config: Dict[Any, Any] = dict()
+    config['population_size'] = args.population_size
+    config['generation_limit'] = args.generations
+    config['individual_size'] = args.individual_size
+    config['selection_size'] = args.selection_size
+    config['tournament_size'] = args.tournament_size
+    config['mutation_chance'] = args.mutation_chance
+    config['domain'] = list(range(1, args.individual_size + 1))
+    config['replace_pop'] = args.replace_pop
+    config['crossover_points'] = args.crossover_points
+    config['seed'] = args.seed
+    config['objective'] = args.objective
+    config['truncate_genomes'] = args.truncate_genomes
+    config['local_search_elites'] = args.local_search_elites
+    config['local_search_budget'] = args.local_search_budget
+    config['adaptive'] = args.adaptive
+    config['surrogate'] = args.surrogate
+    config['surrogate_pool_factor'] = args.surrogate_pool_factor
+    config['trace_elites'] = args.trace_elites
+    config['archive_size'] = args.archive_size
+    config['archive_radius'] = args.archive_radius
+    config['archive_selection'] = args.archive_selection
+    config['seeding'] = dict(args.seeding)
+    if args.workers is not None:
+        config['worker_count'] = args.workers
+    if args.pipeline_depth is not None:
+        config['pipeline_depth'] = args.pipeline_depth
+    if args.pipeline_chunk is not None:
+        config['pipeline_chunk'] = args.pipeline_chunk
+    if args.solution_cache is not None:
+        config['solution_cache'] = args.solution_cache
+    if args.profile is not None:
+        config['profile'] = StatProfile.from_dict(json.load(args.profile))
+
+    return config
+
+
+def seeding_fraction(text: str):
+    """Parse a NAME=FRACTION seeding argument."""
+    name, _, fraction = text.partition('=')
+    if name not in SEEDING_STRATEGIES:
+        raise argparse.ArgumentTypeError('unknown seeding strategy {0}'.format(name))
+    return name, float(fraction or 1)
+
+
+def individual_to_json(indiv: Individual) -> List[Dict[str, Any]]:
+    """Convert an individual's actions into a JSON friendly list."""
+    return [{'action': which.__name__, 'success_roll': roll, 'condition': condition}
+            for which, roll, condition in indiv.value]
+
+
+def loaded_heavy_modules() -> List[str]:
+    """List which of the heavy optional modules have been imported into this process."""
+    return [name for name in HEAVY_MODULES if name in sys.modules]
+
+
+def solve(args: argparse.Namespace) -> Dict:
+    """Run the GA for a number of generations and summarize the best result."""
+    backend = 'shared' if args.shared_memory else 'pipelined' if args.pipelined else \
+        'threaded' if args.threaded else 'basic'
+    return solve_config(assemble_config(args), args.generations, backend, stats_dir=args.stats_dir,
+                        trace_file=args.trace_file)
+
+
+def solve_config(config: Dict, generations: int, backend: str = 'basic',
+                 time_budget: Optional[float] = None,
+                 progress: Optional[Callable[[int, float], None]] = None,
+                 progress_interval: int = 10, stats_dir: Optional[str] = None,
+                 trace_file: Optional[str] = None) -> Dict:
+    """Run the GA described by a config dict and summarize the best result.
+
+    backend picks the GA implementation, one of 'basic', 'threaded', 'shared' or 'pipelined'. The
+    run stops early once time_budget seconds have passed, and every progress_interval generations
+    progress is called with the generation and the best score in the population so far. With
+    stats_dir set, the min, max and mean score of every generation as last ranked are written there
+    as the run goes, see algo/report.py. With config['trace_elites'] set the elite traces are
+    written to trace_file, see algo/trace.py.
+
+    If config['solution_cache'] names a cache file, a problem already solved with at least as many
+    generations is answered from the cache, a less searched one is warm started from the cached
+    elites, and the final population is merged back into the cache. Only the score objective is
+    cached.
+    """
+    if backend == 'shared':
+        ga = SharedMemoryGeneticAlgorithm(config)
+    elif backend == 'pipelined':
+        ga = PipelinedGeneticAlgorithm(config)
+    elif backend == 'threaded':
+        ga = ThreadedGeneticAlgorithm(config)
+    else:
+        ga = GeneticAlgorithm(config)
+
+    cache = None
+    cached = None
+    cache_info = {'hit': False, 'answered': False}
+    writer = None
+    # Shared memory blocks, worker pools and open files outlive a failed run unless they are closed
+    try:
+        if config.get('solution_cache') and config.get('objective', 'score') == 'score':
+            cache = SolutionCache(config['solution_cache'])
+            key = problem_key(ga.profile, ga.material_conditions, ga.success_rolls)
+            cached = cache.lookup(key, ga.material_conditions, ga.success_rolls)
+            if cached is not None:
+                cache_info.update(hit=True, answered=cached.generations >= generations,
+                                  cached_generations=cached.generations)
+                ga.warm_start(cached.elites)
+
+        writer = StatsWriter(stats_dir) if stats_dir is not None else None
+        generation_times = list()
+        start_time = perf_counter()
+        for generation in range(1, 0 if cache_info['answered'] else generations + 1):
+            step_start = perf_counter()
+            ga.step()
+            generation_times.append(perf_counter() - step_start)
+            if writer is not None:
+                writer.append(0, generation, *ga.generation_stats(), generation_times[-1])
+            if progress is not None and generation % progress_interval == 0 and \
+                    generation < generations:
+                progress(generation, max(map(ga.score_func, ga.population)))
+            if time_budget is not None and perf_counter() - start_time >= time_budget:
+                break
+        run_seconds = perf_counter() - start_time
+
+        if not generation_times and cached is None:
+            # Nothing ran and nothing was cached (generations=0), report the best of the
+            # starting population
+            ga.population = ga.new_population()
+            ga.rank_and_cull()
+        # Threaded GA sorts after every step, the basic GA sorts at the start of the next one
+        population = sorted(ga.population if generation_times or cached is None else cached.elites,
+                            key=ga.score_func, reverse=True)
+        best = population[0]
+        if cache is not None and generation_times:
+            cache.store(key, population, ga.score_func, len(generation_times))
+    finally:
+        if writer is not None:
+            writer.close()
+        if isinstance(ga, (SharedMemoryGeneticAlgorithm, PipelinedGeneticAlgorithm)):
+            ga.close()
+        if cache is not None:
+            cache.close()
+
+    echoed_config = {key: value for key, value in config.items()
+                     if key not in ('domain', 'profile')}
+    echoed_config['profile'] = config.get('profile', DEFAULT_PROFILE).to_dict()
+    result = {
+        'score': ga.score_func(best),
+        'individual': individual_to_json(best),
+        'generations': len(generation_times),
+        'config': echoed_config,
+        'timing': {
+            'import_seconds': IMPORT_SECONDS,
+            'run_seconds': run_seconds,
+            'mean_generation_seconds': run_seconds / max(len(generation_times), 1),
+            'max_generation_seconds': max(generation_times, default=0.0),
+        },
+        'loaded_heavy_modules': loaded_heavy_modules(),
+    }
+    if cache is not None:
+        result['solution_cache'] = cache_info
+    if ga.surrogate is not None:
+        result['surrogate'] = ga.surrogate.summary()
+    if ga.archive is not None:
+        result['archive'] = {'niches': len(ga.archive), 'comparisons': ga.archive.comparisons,
+                             'champion_scores': sorted((entry[1] for entry
+                                                        in ga.archive.champions.values()),
+                                                       reverse=True)}
+    if ga.traces is not None:
+        result['traces'] = {'count': len(ga.traces.traces), 'bytes': ga.traces.size,
+                            'dropped': ga.traces.dropped}
+        if trace_file:
+            ga.traces.write(trace_file)
+            result['traces']['path'] = trace_file
+    if isinstance(ga, PipelinedGeneticAlgorithm):
+        result['pipeline'] = {'depth': ga.depth, 'chunk': ga.chunk_size,
+                              'max_in_flight': ga.max_in_flight, 'stall_seconds': ga.stall_seconds}
+    if ga.controller is not None:
+        history = ga.controller.history
+        result['adaptive'] = {'restarts': ga.controller.restarts,
+                              'final_state': history[-1]._asdict() if history else None}
+    if config.get('objective', 'score') == 'expected':
+        result['expectation'] = dict(expected_craft(best.value, ga.profile)._asdict(),
+                                     sampled_score=score_craft(best, ga.profile))
+    if config.get('objective', 'score') == 'pareto':
+        result['front'] = [dict(indiv.objectives._asdict(), individual=individual_to_json(indiv))
+                           for indiv in pareto_front(population, ga.profile)]
+    return result
+
+
+def measure_startup(args: argparse.Namespace) -> Dict:
+    """Measure how long a fresh interpreter takes to import the headless entry point."""
+    probe = ('import sys, json; from time import perf_counter; start = perf_counter(); '
+             'import dsecffxiv.headless_runner as h; '
+             'print(json.dumps([perf_counter() - start, h.loaded_heavy_modules()]))')
+
+    wall_times = list()
+    import_times = list()
+    heavy = list()
+    for _ in range(args.runs):
+        start = perf_counter()
+        output = subprocess.run([sys.executable, '-c', probe], check=True,
+                                capture_output=True, text=True).stdout
+        wall_times.append(perf_counter() - start)
+        import_time, heavy = json.loads(output)
+        import_times.append(import_time)
+
+    return {
+        'runs': args.runs,
+        'median_wall_seconds': median(wall_times),
+        'median_import_seconds': median(import_times),
+        'max_wall_seconds': max(wall_times),
+        'loaded_heavy_modules': heavy,
+    }
+
+
+def build_parser() -> argparse.ArgumentParser:
+    """Construct the argument parser for the headless runner."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    solve_parser = commands.add_parser('solve', help='Run N generations and print the best result')
+    solve_parser.add_argument('--generations', type=int, default=100)
+    solve_parser.add_argument('--population-size', type=int, default=500)
+    solve_parser.add_argument('--individual-size', type=int, default=50)
+    solve_parser.add_argument('--selection-size', type=int, default=100)
+    solve_parser.add_argument('--tournament-size', type=int, default=50)
+    solve_parser.add_argument('--mutation-chance', type=float, default=0.01)
+    solve_parser.add_argument('--crossover-points', type=int, default=5)
+    solve_parser.add_argument('--replace-pop', action='store_true')
+    solve_parser.add_argument('--objective', choices=('score', 'expected', 'pareto'),
+                              default='score',
+                              help='Rank by the scalar score, by the expected score over success '
+                                   'rolls, or by Pareto front over quality/CP/steps/risk')
+    solve_parser.add_argument('--truncate-genomes', action='store_true',
+                              help='Drop the steps after the end of each scored craft')
+    solve_parser.add_argument('--local-search-elites', type=int, default=0,
+                              help='How many elites to polish with local search each generation')
+    solve_parser.add_argument('--local-search-budget', type=int, default=200,
+                              help='Local search neighbor evaluations per generation')
+    solve_parser.add_argument('--adaptive', action='store_true',
+                              help='Adapt mutation, crossover and tournament size online and '
+                                   'restart stalled runs')
+    solve_parser.add_argument('--surrogate', action='store_true',
+                              help='Breed more children and only simulate the ones a learned '
+                                   'surrogate ranks best, not with the pareto objective')
+    solve_parser.add_argument('--surrogate-pool-factor', type=int, default=4,
+                              help='Children bred per simulated child once the surrogate is '
+                                   'trained')
+    solve_parser.add_argument('--archive-size', type=int, default=0,
+                              help='Keep up to this many niche champions in an elite archive that '
+                                   'feeds selection, not with the pareto objective')
+    solve_parser.add_argument('--archive-radius', type=int, default=4,
+                              help='Genome distance within which two crafts share a niche')
+    solve_parser.add_argument('--archive-selection', type=float, default=0.2,
+                              help='Fraction of parents drawn from the archive')
+    solve_parser.add_argument('--trace-elites', type=int, default=0,
+                              help='Record step traces of this many elites whenever they change')
+    solve_parser.add_argument('--trace-file', default=None,
+                              help='Where to write the elite traces, read them with '
+                                   'trace_runner.py')
+    solve_parser.add_argument('--seeding', type=seeding_fraction, action='append', default=list(),
+                              metavar='NAME=FRACTION',
+                              help='Seed this fraction of new populations with a strategy: '
+                                   '{0}'.format(', '.join(SEEDING_STRATEGIES)))
+    solve_parser.add_argument('--seed', type=int, default=None, help='Seed for a reproducible run')
+    solve_parser.add_argument('--profile', type=argparse.FileType('r'), default=None,
+                              help='JSON file with {"crafter": {...}, "recipe": {...}} stats to '
+                                   'solve for')
+    solve_parser.add_argument('--solution-cache', default=None,
+                              help='SQLite file of best crafts per problem, to answer repeats and '
+                                   'warm start runs')
+    solve_parser.add_argument('--stats-dir', default=None,
+                              help='Directory to write per generation stats to, render them with '
+                                   'report_runner.py')
+    solve_parser.add_argument('--threaded', action='store_true',
+                              help='Use the ThreadedGeneticAlgorithm')
+    solve_parser.add_argument('--shared-memory', action='store_true',
+                              help='Use the SharedMemoryGeneticAlgorithm, scoring in worker '
+                                   'processes')
+    solve_parser.add_argument('--pipelined', action='store_true',
+                              help='Use the PipelinedGeneticAlgorithm, scoring children in worker '
+                                   'processes as they are bred')
+    solve_parser.add_argument('--pipeline-depth', type=int, default=None,
+                              help='Most chunks of children in flight before breeding waits, 2 per '
+                                   'worker by default')
+    solve_parser.add_argument('--pipeline-chunk', type=int, default=None,
+                              help='Children bred and scored together, {0} by '
+                                   'default'.format(DEFAULT_CHUNK))
+    solve_parser.add_argument('--workers', type=int, default=None,
+                              help='Worker threads or processes')
+    solve_parser.set_defaults(handler=solve)
+
+    startup_parser = commands.add_parser('startup',
+                                         help='Measure interpreter startup and import cost')
+    startup_parser.add_argument('--runs', type=int, default=5)
+    startup_parser.set_defaults(handler=measure_startup)
+
+    parser.add_argument('--output', type=argparse.FileType('w'), default=sys.stdout,
+                        help='Where to write the JSON result')
+    return parser
+
+
+def main(argv=None) -> int:
+    """Run the headless CLI."""
+    args = build_parser().parse_args(argv)
+    result = args.handler(args)
+    json.dump(result, args.output, indent=2)
+    args.output.write('\n')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
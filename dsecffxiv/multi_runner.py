@@ -1,21 +1,23 @@
 """Executable to run many GA's a the same time a report result."""
 
+import argparse
+import time
 from concurrent.futures import ProcessPoolExecutor, as_completed
-from typing import Any, Callable, Dict, List
-
-from matplotlib import pyplot as plt
-from tqdm import tqdm
+from typing import Any, Dict, List, Optional, Tuple
 
 from dsecffxiv.algo.genetic_algorithm import ThreadedGeneticAlgorithm
-from dsecffxiv.algo.score import Default_Score, score_individual
-from dsecffxiv.algo.stats import show_stats
+from dsecffxiv.algo.report import StatsWriter, render_summary
+from dsecffxiv.algo.score import Default_Score
 from dsecffxiv.algo.types import Individual
-from dsecffxiv.algo.types.population import Population
+from dsecffxiv.bench.profiler import DEFAULT_INTERVAL, MODES, Hotspots, Profiler
 
 GEN_LIMIT = 2500
 JOB_COUNT = 500
 WORKER_LIMIT = 32
 MAX_SCORE_LEN_CAP = 50
+MAX_RESTARTS = 3
+STATS_DIR = 'multi_run_stats'
+SUMMARY_PATH = 'multi_run_summary.png'
 
 
 def assemble_config() -> Dict:
@@ -30,91 +32,110 @@ def assemble_config() -> Dict:
     config['domain'] = list(range(1, 50 + 1))
     config['replace_pop'] = True
     config['crossover_points'] = 25
+    # Retune the operators online and restart stalled runs instead of giving up on them
+    config['adaptive'] = True
+    config['adaptive_stagnation_limit'] = MAX_SCORE_LEN_CAP
 
     return config
 
 
-def do_stat_math(input_population_history: List[Population], score_function: Callable[[Individual], int] = Default_Score):
-    """Show some stats about the population to the user."""
-    stat_min = list()
-    stat_max = list()
-    stat_avg = list()
-    max_pop = None
-
-    for generation_pop in tqdm(input_population_history, desc='Generating Stats'):
-        if max_pop is None:
-            max_pop = generation_pop[0]
-        else:
-            max_pop = max(max_pop, generation_pop[0], key=score_function)
-
-        stat_min.append(score_function(generation_pop[-1]))
-        stat_max.append(score_function(generation_pop[0]))
-        avg = 0.0
-        for _pop in generation_pop:
-            avg += score_function(_pop)
-        avg /= len(generation_pop)
-        stat_avg.append(avg)
+def do_run(job: int = 0, overrides: Optional[Dict] = None,
+           gen_limit: int = GEN_LIMIT) -> Tuple[List[Tuple], Individual]:
+    """Do multithreaded run of GA, returning its per generation stats rows and its best individual.
 
-    stat_generation_min = list(range(0, len(stat_min)))
-    stat_generation_max = list(range(0, len(stat_max)))
-    stat_generation_avg = list(range(0, len(stat_avg)))
-
-    return ((stat_generation_min, stat_min), (stat_generation_max, stat_max), (stat_generation_avg, stat_avg), max_pop)
-
-
-def do_run() -> List[Population]:
-    """Do multithreaded run of GA."""
-    ga = ThreadedGeneticAlgorithm(assemble_config())
-    pop_history = list()
+    overrides replaces any of the assemble_config() values for this run.
+    """
+    config = assemble_config()
+    config.update(overrides or dict())
+    ga = ThreadedGeneticAlgorithm(config)
+    rows = list()
     max_score = 0
     max_score_len = 0
-    for _ in range(GEN_LIMIT):
+    for generation in range(gen_limit):
+        start = time.perf_counter()
         ga.step()
-        new_max_score = max(Default_Score(ga.population[0]), max_score)
+        seconds = time.perf_counter() - start
+        min_score, new_max_score, mean_score = ga.generation_stats()
+        rows.append((job, generation, min_score, new_max_score, mean_score, seconds))
+
+        new_max_score = max(new_max_score, max_score)
         if new_max_score == max_score:
             max_score_len += 1
         else:
             max_score = new_max_score
             max_score_len = 0
 
-        pop_history.append(ga.population)
-
-        if max_score_len > MAX_SCORE_LEN_CAP:
+        if ga.controller is not None:
+            # The controller restarts after MAX_SCORE_LEN_CAP stalled generations, stop once
+            # restarts stop helping
+            if ga.controller.restarts > MAX_RESTARTS:
+                break
+        elif max_score_len > MAX_SCORE_LEN_CAP:
             break
-    return pop_history
-
-
-if __name__ == '__main__':
-    pop_history_collection = list()
-    with ProcessPoolExecutor(WORKER_LIMIT) as tp:
-        futures = {tp.submit(
-            do_run): i for i in range(JOB_COUNT)}
-
-        for future in tqdm(as_completed(futures)):
-            pop = future.result()
-            pop_history_collection.append(pop)
-
-    with ProcessPoolExecutor(WORKER_LIMIT) as tp:
-        res = tp.map(
-            do_stat_math, pop_history_collection)
-        max_pop = None
-        for r in tqdm(res):
-            (min_g, min_v), (max_g, max_v), (avg_g, avg_v), m_pop = r
+    # The best craft is sent back to the parent process, its dead tail is not worth pickling
+    best = ga.population[0]
+    best.trim()
+    return rows, best
+
+
+def profiled_run(job: int, mode: str, interval: float) -> Tuple[List[Tuple], Individual, Hotspots]:
+    """do_run under the profiler, also returning its hotspots."""
+    with Profiler(mode, interval) as profiler:
+        rows, best = do_run(job)
+    return rows, best, profiler.hotspots
+
+
+def main(argv=None) -> None:
+    """Run JOB_COUNT GA's, write their stats as they finish and render one summary of them all."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--jobs', type=int, default=JOB_COUNT, help='Number of GA runs')
+    parser.add_argument('--workers', type=int, default=WORKER_LIMIT, help='Worker processes')
+    parser.add_argument('--stats-dir', default=STATS_DIR,
+                        help='Directory to write per generation stats to')
+    parser.add_argument('--summary', default=SUMMARY_PATH,
+                        help='Image to render the percentile summary to, .png or .svg (empty to '
+                             'skip)')
+    parser.add_argument('--profile', default=None,
+                        help='Profile every job and write the merged hotspots to this prefix '
+                             '(.txt, .collapsed)')
+    parser.add_argument('--profile-mode', choices=MODES, default='sample')
+    parser.add_argument('--profile-interval', type=float, default=DEFAULT_INTERVAL,
+                        help='Seconds between samples of the sampling profiler')
+    args = parser.parse_args(argv)
+
+    from tqdm import tqdm  # pylint: disable=import-outside-toplevel
 
+    max_pop = None
+    hotspots = Hotspots(args.profile_mode)
+    with StatsWriter(args.stats_dir) as writer, ProcessPoolExecutor(args.workers) as pool:
+        if args.profile:
+            futures = [pool.submit(profiled_run, job, args.profile_mode, args.profile_interval)
+                       for job in range(args.jobs)]
+        else:
+            futures = [pool.submit(do_run, job) for job in range(args.jobs)]
+        for future in tqdm(as_completed(futures), total=len(futures)):
+            rows, best, *job_hotspots = future.result()
+            for each in job_hotspots:
+                hotspots.merge(each)
+            for row in rows:
+                writer.append(*row)
             if max_pop is None:
-                max_pop = m_pop
+                max_pop = best
             else:
-                max_pop = max(max_pop, m_pop, key=Default_Score)
-
-            # plt.plot(min_g, min_v, '-', label='Min Score')
-            plt.plot(max_g, max_v, '-', label='Max Score')
-            # plt.plot(avg_g, avg_v, ':', label='Avg Score')
+                max_pop = max(max_pop, best, key=Default_Score)
 
     print("{0} => {1}".format(str(max_pop), Default_Score(max_pop)))
+    if args.profile:
+        print(hotspots.format_table())
+        with open(args.profile + '.txt', 'w') as table:
+            table.write(hotspots.format_table() + '\n')
+        if hotspots.stacks:
+            hotspots.write_collapsed(args.profile + '.collapsed')
+        print('Hotspots written to {0}.*'.format(args.profile))
+    if args.summary:
+        render_summary(args.stats_dir, args.summary)
+        print('Summary written to {0}'.format(args.summary))
 
-    plt.xlabel('Generation')
-    plt.ylabel('Score')
 
-    plt.title('Max Score vs Generation')
-    # plt.legend()
-    plt.show()
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,27 @@
+"""Executable to render the stats written by a run to a PNG or SVG summary, without a display."""
+
+import argparse
+import sys
+
+from dsecffxiv.algo.report import COLUMNS, DEFAULT_PERCENTILES, render_summary
+
+
+def main(argv=None) -> int:
+    """Run the report CLI."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('stats_dir',
+                        help='Stats directory written by multi_runner.py or headless_runner.py')
+    parser.add_argument('output',
+                        help='Image to write, the format follows the extension (.png, .svg, ...)')
+    parser.add_argument('--column', default='max', choices=[name for name, _ in COLUMNS[2:5]],
+                        help='Score column to summarize')
+    parser.add_argument('--percentiles', type=float, nargs='+', default=DEFAULT_PERCENTILES,
+                        help='Percentiles across jobs to draw, in nested pairs around the median')
+    args = parser.parse_args(argv)
+
+    render_summary(args.stats_dir, args.output, args.column, args.percentiles)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,134 @@
+"""Executable to stress test the GA engine on synthetic problems of growing genome size.
+
+For every genome size the GA runs a few generations of a synthetic problem (see
+algo/synthetic.py) under the cProfile profiler, and the time of each subsystem (selection,
+crossover, mutation, scoring, ranking, ...) is reported per gene bred. An engine whose costs grow
+linearly with the genome keeps these numbers flat, a subsystem whose cost per gene grows by more
+than --cliff-factor from one size to the next is flagged as a scaling cliff.
+
+    python -m dsecffxiv.scaling_runner --problem planted --sizes 100 1000 10000 20000
+"""
+
+import argparse
+import json
+import sys
+from time import perf_counter
+from typing import Dict, List
+
+from dsecffxiv.algo.genetic_algorithm import GeneticAlgorithm
+from dsecffxiv.algo.synthetic import SYNTHETIC_PROBLEMS
+from dsecffxiv.bench.profiler import Profiler
+
+DEFAULT_SIZES = (100, 1000, 10000)
+DEFAULT_CLIFF_FACTOR = 2.0
+# Subsystems too small to compare between sizes, in seconds per generation
+NOISE_FLOOR = 0.001
+
+
+def scaling_config(args: argparse.Namespace, size: int) -> Dict:
+    """GA config for one genome size of the synthetic problem."""
+    return {
+        'problem': SYNTHETIC_PROBLEMS[args.problem](size, args.seed),
+        'seed': args.seed,
+        'population_size': args.population_size,
+        'individual_size': size,
+        'selection_size': args.selection_size,
+        'tournament_size': args.tournament_size,
+        'mutation_chance': args.mutation_chance,
+        'crossover_points': args.crossover_points,
+        'domain': None,
+        'replace_pop': False,
+    }
+
+
+def measure_size(args: argparse.Namespace, size: int) -> Dict:
+    """Profile a few generations at one genome size."""
+    ga = GeneticAlgorithm(scaling_config(args, size))
+    ga.step()  # The first generation also builds and scores the starting population
+    start = perf_counter()
+    with Profiler('cprofile') as profiler:
+        for _ in range(args.generations):
+            ga.step()
+    seconds = perf_counter() - start
+    genes = args.generations * 2 * args.selection_size * size
+    subsystems = {name: value / args.generations
+                  for name, value in profiler.hotspots.subsystems.items()}
+    return {
+        'size': size,
+        'generation_seconds': seconds / args.generations,
+        'nanoseconds_per_gene': 1e9 * seconds / genes,
+        'subsystem_seconds': subsystems,
+        'subsystem_nanoseconds_per_gene': {name: 1e9 * value * args.generations / genes
+                                           for name, value in subsystems.items()},
+        'best_score': max(ga.scores),
+        'legal': all(ga.problem.is_legal(indiv) for indiv in ga.population),
+    }
+
+
+def find_cliffs(rows: List[Dict], factor: float) -> List[str]:
+    """Describe every subsystem whose cost per gene grew by more than factor between two sizes."""
+    cliffs = list()
+    for before, after in zip(rows, rows[1:]):
+        for name, cost in after['subsystem_nanoseconds_per_gene'].items():
+            previous = before['subsystem_nanoseconds_per_gene'].get(name)
+            if previous and after['subsystem_seconds'][name] >= NOISE_FLOOR and \
+                    cost > previous * factor:
+                cliffs.append('{0}: {1:.1f} -> {2:.1f} ns/gene from {3} to {4} genes'.format(
+                    name, previous, cost, before['size'], after['size']))
+    return cliffs
+
+
+def format_rows(rows: List[Dict]) -> str:
+    """Cost per gene of every subsystem at every size, as a table."""
+    names = sorted({name for row in rows for name in row['subsystem_nanoseconds_per_gene']})
+    lines = ['{0:<20}'.format('ns/gene') + ''.join('{0:>12}'.format(row['size']) for row in rows)]
+    lines.append('{0:<20}'.format('total') + ''.join(
+        '{0:>12.1f}'.format(row['nanoseconds_per_gene']) for row in rows))
+    for name in names:
+        lines.append('{0:<20}'.format(name) + ''.join(
+            '{0:>12.1f}'.format(row['subsystem_nanoseconds_per_gene'].get(name, 0.0))
+            for row in rows))
+    return '\n'.join(lines)
+
+
+def main(argv=None) -> int:
+    """Run the scaling CLI, exiting non-zero if a cliff was found or a genome came out illegal."""
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--problem', choices=sorted(SYNTHETIC_PROBLEMS), default='planted')
+    parser.add_argument('--sizes', type=int, nargs='+', default=list(DEFAULT_SIZES),
+                        help='Genome sizes to run')
+    parser.add_argument('--generations', type=int, default=5, help='Profiled generations per size')
+    parser.add_argument('--population-size', type=int, default=100)
+    parser.add_argument('--selection-size', type=int, default=50)
+    parser.add_argument('--tournament-size', type=int, default=10)
+    parser.add_argument('--mutation-chance', type=float, default=0.01)
+    parser.add_argument('--crossover-points', type=int, default=25)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--cliff-factor', type=float, default=DEFAULT_CLIFF_FACTOR,
+                        help='Growth in cost per gene between consecutive sizes that counts as a '
+                             'cliff')
+    parser.add_argument('--output', help='Also write the measurements as JSON here')
+    args = parser.parse_args(argv)
+
+    rows = list()
+    for size in sorted(args.sizes):
+        rows.append(measure_size(args, size))
+        print('{0} genes: {1:.3f}s per generation'.format(size, rows[-1]['generation_seconds']),
+              file=sys.stderr)
+    cliffs = find_cliffs(rows, args.cliff_factor)
+    illegal = [row['size'] for row in rows if not row['legal']]
+
+    print(format_rows(rows))
+    for cliff in cliffs:
+        print('CLIFF {0}'.format(cliff))
+    for size in illegal:
+        print('ILLEGAL genomes in the population at {0} genes'.format(size))
+    if args.output:
+        with open(args.output, 'w') as output:
+            json.dump({'problem': args.problem, 'rows': rows, 'cliffs': cliffs}, output, indent=2)
+    return 1 if cliffs or illegal else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
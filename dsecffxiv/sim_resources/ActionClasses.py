@@ -7,14 +7,7 @@ import math
 
 class Action:
 
-    _CRAFTSMANSHIP = 2689
-    _CONTROL = 2872
-    _RLEVEL = 511
-    _CLEVEL = 420
-    _RCRAFTS = 2620
-    _RCONTROL = 2540
-    _MAX_PROGRESS = 11126
-    _MAX_QUALITY = 82400
+    # Crafter and recipe stats come from the state's profile, see Profile.py
 
     @staticmethod
     def execute(state):
@@ -23,25 +16,19 @@ class Action:
     @staticmethod
     def _calc_progress(state, efficiency):
         # Source:  https://docs.google.com/document/d/1Da48dDVPB7N4ignxGeo0UeJ_6R0kQRqzLUH-TkpSQRc/edit
-        p1 = Action._CRAFTSMANSHIP * 21 / 100 + 2
-        p2 = p1 * (Action._CRAFTSMANSHIP + 10000) / (2620 + 10000)
-        p3 = p2 * 80 / 100
         modifier = 100
         if state.muscle_memory > 0:
             modifier += 100
             state.muscle_memory = 0
         if state.veneration > 0:
             modifier += 50
-        return math.floor(math.floor(p3) * (efficiency / 100 * modifier / 100)), state
+        progress = state.constants.base_progress * (efficiency / 100 * modifier / 100)
+        return math.floor(progress), state
 
     @staticmethod
     def _calc_quality(state, efficiency):
         # Source:  https://docs.google.com/document/d/1Da48dDVPB7N4ignxGeo0UeJ_6R0kQRqzLUH-TkpSQRc/edit
-        f_iq = Action._CONTROL + Action._CONTROL * \
-            ((state.iq_stacks - 1 if state.iq_stacks > 0 else 0) * 20 / 100)
-        q1 = f_iq * 35 / 100 + 35
-        q2 = q1 * (f_iq + 10000) / (Action._RCONTROL + 10000)
-        q3 = q2 * 60 / 100
+        q3 = state.constants.base_quality[state.iq_stacks]
         modifier = 100
         if state.great_strides > 0:
             modifier += 100
@@ -70,8 +57,8 @@ class BasicSynthesis(Action):
     def execute(state):
         progress, state = BasicSynthesis._calc_progress(state, 120)
         progress += state.progress
-        if progress > BasicSynthesis._MAX_PROGRESS:
-            progress = BasicSynthesis._MAX_PROGRESS
+        if progress > state.constants.max_progress:
+            progress = state.constants.max_progress
             if state.final_appraisal > 0:
                 state.final_appraisal = 0
                 progress -= 1  # leave craft 1 progress off from completion
@@ -99,8 +86,8 @@ class RapidSynthesis(Action):
         if state.success_val <= success_threshold:
             progress, state = RapidSynthesis._calc_progress(state, 500)
             progress += state.progress
-            if progress > RapidSynthesis._MAX_PROGRESS:
-                progress = RapidSynthesis._MAX_PROGRESS
+            if progress > state.constants.max_progress:
+                progress = state.constants.max_progress
                 if state.final_appraisal > 0:
                     state.final_appraisal = 0
                     progress -= 1
@@ -124,8 +111,8 @@ class CarefulSynthesis(Action):
     def execute(state):
         progress, state = CarefulSynthesis._calc_progress(state, 150)
         progress += state.progress
-        if progress > CarefulSynthesis._MAX_PROGRESS:
-            progress = CarefulSynthesis._MAX_PROGRESS
+        if progress > state.constants.max_progress:
+            progress = state.constants.max_progress
             if state.final_appraisal > 0:
                 state.final_appraisal = 0
                 progress -= 1
@@ -162,8 +149,8 @@ class Groundwork(Action):
             efficiency = 150
         progress, state = Groundwork._calc_progress(state, efficiency)
         progress += state.progress
-        if progress > Groundwork._MAX_PROGRESS:
-            progress = Groundwork._MAX_PROGRESS
+        if progress > state.constants.max_progress:
+            progress = state.constants.max_progress
             if state.final_appraisal > 0:
                 state.final_appraisal = 0
                 progress -= 1
@@ -186,8 +173,8 @@ class IntensiveSynthesis(Action):
     def execute(state):
         progress, state = IntensiveSynthesis._calc_progress(state, 300)
         progress += state.progress
-        if progress > IntensiveSynthesis._MAX_PROGRESS:
-            progress = IntensiveSynthesis._MAX_PROGRESS
+        if progress > state.constants.max_progress:
+            progress = state.constants.max_progress
             if state.final_appraisal > 0:
                 state.final_appraisal = 0
                 progress -= 1
@@ -233,8 +220,8 @@ class BrandoftheElements(Action):
     def execute(state):
         progress, state = BrandoftheElements._calc_progress(state, 100)
         progress += state.progress
-        if progress > BrandoftheElements._MAX_PROGRESS:
-            progress = BrandoftheElements._MAX_PROGRESS
+        if progress > state.constants.max_progress:
+            progress = state.constants.max_progress
             if state.final_appraisal > 0:
                 state.final_appraisal = 0
                 progress -= 1
@@ -255,9 +242,6 @@ class BrandoftheElements(Action):
     def _calc_progress(state, efficiency):
         # Source:  https://docs.google.com/document/d/1Da48dDVPB7N4ignxGeo0UeJ_6R0kQRqzLUH-TkpSQRc/edit
         # This one works with another buff so we have to modify the progress calculation.
-        p1 = BrandoftheElements._CRAFTSMANSHIP * 21 / 100 + 2
-        p2 = p1 * (BrandoftheElements._CRAFTSMANSHIP + 10000) / (2620 + 10000)
-        p3 = p2 * 80 / 100
         modifier = 100
         if state.muscle_memory > 0:
             modifier += 100
@@ -268,8 +252,8 @@ class BrandoftheElements(Action):
         if state.name_elements > 0:
             f_efficiency = f_efficiency + 2 * \
                 math.ceil(1 - state.progress /
-                          BrandoftheElements._MAX_PROGRESS)
-        return math.floor(math.floor(p3) * f_efficiency), state
+                          state.constants.max_progress)
+        return math.floor(state.constants.base_progress * f_efficiency), state
 
 
 class NameoftheElements(Action):
@@ -330,14 +314,14 @@ class DelicateSynthesis(Action):
         progress, state = DelicateSynthesis._calc_progress(state, 100)
         quality, state = DelicateSynthesis._calc_quality(state, 100)
         progress += state.progress
-        if progress > DelicateSynthesis._MAX_PROGRESS:
-            progress = DelicateSynthesis._MAX_PROGRESS
+        if progress > state.constants.max_progress:
+            progress = state.constants.max_progress
             if state.final_appraisal > 0:
                 state.final_appraisal = 0
                 progress -= 1
         state.progress = progress
-        if quality > DelicateSynthesis._MAX_QUALITY:
-            quality = DelicateSynthesis._MAX_QUALITY
+        if quality > state.constants.max_quality:
+            quality = state.constants.max_quality
         state.quality = quality
         durability_loss = 10
         if state.waste_not > 0 and state.material_condition == "sturdy":
@@ -362,8 +346,8 @@ class BasicTouch(Action):
     def execute(state):
         quality, state = BasicTouch._calc_quality(state, 100)
         quality += state.quality
-        if quality > BasicTouch._MAX_QUALITY:
-            quality = BasicTouch._MAX_QUALITY
+        if quality > state.constants.max_quality:
+            quality = state.constants.max_quality
         state.quality = quality
         durability_loss = 10
         if state.waste_not > 0 and state.material_condition == "sturdy":
@@ -392,8 +376,8 @@ class HastyTouch(Action):
         if state.success_val <= success_threshold:
             quality, state = HastyTouch._calc_quality(state, 100)
             quality += state.quality
-            if quality > HastyTouch._MAX_QUALITY:
-                quality = HastyTouch._MAX_QUALITY
+            if quality > state.constants.max_quality:
+                quality = state.constants.max_quality
             state.quality = quality
         durability_loss = 10
         if state.waste_not > 0 and state.material_condition == "sturdy":
@@ -414,8 +398,8 @@ class StandardTouch(Action):
     def execute(state):
         quality, state = StandardTouch._calc_quality(state, 125)
         quality += state.quality
-        if quality > StandardTouch._MAX_QUALITY:
-            quality = StandardTouch._MAX_QUALITY
+        if quality > state.constants.max_quality:
+            quality = state.constants.max_quality
         state.quality = quality
         durability_loss = 10
         if state.waste_not > 0 and state.material_condition == "sturdy":
@@ -440,8 +424,8 @@ class PreparatoryTouch(Action):
     def execute(state):
         quality, state = PreparatoryTouch._calc_quality(state, 200)
         quality += state.quality
-        if quality > PreparatoryTouch._MAX_QUALITY:
-            quality = PreparatoryTouch._MAX_QUALITY
+        if quality > state.constants.max_quality:
+            quality = state.constants.max_quality
         state.quality = quality
         durability_loss = 20
         if state.waste_not > 0 and state.material_condition == "sturdy":
@@ -469,8 +453,8 @@ class PreciseTouch(Action):
     def execute(state):
         quality, state = PreciseTouch._calc_quality(state, 150)
         quality += state.quality
-        if quality > PreciseTouch._MAX_QUALITY:
-            quality = PreciseTouch._MAX_QUALITY
+        if quality > state.constants.max_quality:
+            quality = state.constants.max_quality
         state.quality = quality
         durability_loss = 10
         if state.waste_not > 0:  # Material condition must be Good; cannot be Sturdy
@@ -498,8 +482,8 @@ class PatientTouch(Action):
         if state.success_val <= success_threshold:
             quality, state = PatientTouch._calc_quality(state, 100)
             quality += state.quality
-            if quality > PatientTouch._MAX_QUALITY:
-                quality = PatientTouch._MAX_QUALITY
+            if quality > state.constants.max_quality:
+                quality = state.constants.max_quality
             state.quality = quality
             if 0 < state.iq_stacks < 11:
                 # quality function increased stacks by 1
@@ -533,8 +517,8 @@ class PrudentTouch(Action):
     def execute(state):
         quality, state = PrudentTouch._calc_quality(state, 100)
         quality += state.quality
-        if quality > PrudentTouch._MAX_QUALITY:
-            quality = PrudentTouch._MAX_QUALITY
+        if quality > state.constants.max_quality:
+            quality = state.constants.max_quality
         state.quality = quality
         durability_loss = 5
         if state.material_condition == "sturdy":  # cannot be used while waste not is active
@@ -582,8 +566,8 @@ class ByregotsBlessing(Action):
             state, 100 + 20 * (state.iq_stacks - 1))
         state.iq_stacks = 0
         quality += state.quality
-        if quality > ByregotsBlessing._MAX_QUALITY:
-            quality = ByregotsBlessing._MAX_QUALITY
+        if quality > state.constants.max_quality:
+            quality = state.constants.max_quality
         state.quality = quality
         durability_loss = 10
         if state.waste_not > 0 and state.material_condition == "sturdy":
@@ -681,8 +665,8 @@ class FocusedSynthesis(Action):
         if state.success_val <= success_threshold:
             progress, state = FocusedSynthesis._calc_progress(state, 200)
             progress += state.progress
-            if progress > FocusedSynthesis._MAX_PROGRESS:
-                progress = FocusedSynthesis._MAX_PROGRESS
+            if progress > state.constants.max_progress:
+                progress = state.constants.max_progress
                 if state.final_appraisal > 0:
                     state.final_appraisal = 0
                     progress -= 1  # leave craft 1 progress off from completion
@@ -717,8 +701,8 @@ class FocusedTouch(Action):
         if state.success_val <= success_threshold:
             quality, state = FocusedTouch._calc_quality(state, 150)
             quality += state.quality
-            if quality > FocusedTouch._MAX_QUALITY:
-                quality = FocusedTouch._MAX_QUALITY
+            if quality > state.constants.max_quality:
+                quality = state.constants.max_quality
             state.quality = quality
         durability_loss = 10
         if state.waste_not > 0 and state.material_condition == "sturdy":
@@ -742,8 +726,8 @@ class TricksoftheTrade(Action):
     @staticmethod
     def execute(state):
         state.cp += 20
-        if state.cp > 572:
-            state.cp = 572
+        if state.cp > state.constants.max_cp:
+            state.cp = state.constants.max_cp
         return state
 
 
@@ -788,8 +772,8 @@ class MastersMend(Action):
     @staticmethod
     def execute(state):
         state.durability += 30
-        if state.durability > 50:
-            state.durability = 50
+        if state.durability > state.constants.max_durability:
+            state.durability = state.constants.max_durability
         cp_loss = 88
         if state.material_condition == "pliant":
             cp_loss = 44
@@ -0,0 +1,273 @@
+# Compiled simulator. A genome is compiled into a flat program of (*opcode row, success roll,
+# condition code) steps, and the program runs in a single loop that keeps the whole craft state in
+# local variables. Each opcode row is a tuple of the action's static parameters, so most actions
+# share one table driven path and only the actions with unusual rules branch on their special code.
+# Buff decay and the end of craft check are inlined into the loop. The results are identical to
+# executing the classes in ActionClasses.py step by step, see tests/compiled_parity.py.
+
+import math
+
+import dsecffxiv.sim_resources.ActionClasses as action
+from dsecffxiv.sim_resources.State import State
+
+# Condition codes, the index of the condition in State.CONDITIONS
+NORMAL, GOOD, PLIANT, CENTERED, STURDY = range(len(State.CONDITIONS))
+# Condition ints as found in genes -> condition code. Negative ones index from the end, like
+# State.update_condition
+CONDITION_CODES = {index: index % len(State.CONDITIONS)
+                   for index in range(-len(State.CONDITIONS), len(State.CONDITIONS))}
+
+# Special codes for actions that do more than the shared path, the ones that only set a buff
+# come last
+(NONE, MUSCLE_MEMORY, REFLECT, GROUNDWORK, BRAND, DELICATE, PATIENT, EXTRA_STACK, BYREGOT, TRICKS,
+ MASTERS_MEND, NAME_ELEMENTS, VENERATION, FINAL_APPRAISAL, GREAT_STRIDES, INNOVATION, INNER_QUIET,
+ OBSERVE, WASTE_NOT, MANIPULATION) = range(20)
+
+# Durability loss indexed by (waste not active) + 2 * (condition is sturdy)
+STANDARD_10 = (10, 5, 5, 3)
+STANDARD_20 = (20, 10, 10, 5)
+GOOD_ONLY_10 = (10, 5, 10, 5)  # Actions meant for Good, only Waste Not reduces the cost
+PRUDENT_5 = (5, 5, 3, 3)  # Cannot be used with Waste Not, only Sturdy reduces the cost
+FLAT_10 = (10, 10, 10, 10)
+NO_DURABILITY = (0, 0, 0, 0)
+
+# Opcode row: (special, progress efficiency, quality efficiency,
+#              success threshold or -1 if it always succeeds, certain after Observe,
+#              durability losses, (CP cost, CP cost when pliant), buff turns)
+OPCODES = {
+    action.BasicSynthesis: (NONE, 120, 0, -1, False, STANDARD_10, (0, 0), 0),
+    action.RapidSynthesis: (NONE, 500, 0, 49, False, STANDARD_10, (0, 0), 0),
+    action.CarefulSynthesis: (NONE, 150, 0, -1, False, STANDARD_10, (7, 4), 0),
+    action.Groundwork: (GROUNDWORK, 300, 0, -1, False, STANDARD_20, (18, 9), 0),
+    action.IntensiveSynthesis: (NONE, 300, 0, -1, False, GOOD_ONLY_10, (6, 6), 0),
+    action.MuscleMemory: (MUSCLE_MEMORY, 300, 0, -1, False, FLAT_10, (6, 3), 6),
+    action.BrandoftheElements: (BRAND, 100, 0, -1, False, STANDARD_10, (6, 3), 0),
+    action.FocusedSynthesis: (NONE, 200, 0, 49, True, STANDARD_10, (5, 3), 0),
+    action.DelicateSynthesis: (DELICATE, 100, 100, -1, False, STANDARD_10, (32, 16), 0),
+    action.BasicTouch: (NONE, 0, 100, -1, False, STANDARD_10, (18, 9), 0),
+    action.HastyTouch: (NONE, 0, 100, 59, False, STANDARD_10, (0, 0), 0),
+    action.StandardTouch: (NONE, 0, 125, -1, False, STANDARD_10, (32, 16), 0),
+    action.PreparatoryTouch: (EXTRA_STACK, 0, 200, -1, False, STANDARD_20, (40, 20), 0),
+    action.PreciseTouch: (EXTRA_STACK, 0, 150, -1, False, GOOD_ONLY_10, (18, 18), 0),
+    action.PatientTouch: (PATIENT, 0, 100, 49, False, STANDARD_10, (6, 3), 0),
+    action.PrudentTouch: (NONE, 0, 100, -1, False, PRUDENT_5, (25, 13), 0),
+    action.Reflect: (REFLECT, 0, 100, -1, False, FLAT_10, (24, 12), 0),
+    action.ByregotsBlessing: (BYREGOT, 0, 100, -1, False, STANDARD_10, (24, 12), 0),
+    action.FocusedTouch: (NONE, 0, 150, 49, True, STANDARD_10, (18, 9), 0),
+    action.NameoftheElements: (NAME_ELEMENTS, 0, 0, -1, False, NO_DURABILITY, (30, 15), 4),
+    action.Veneration: (VENERATION, 0, 0, -1, False, NO_DURABILITY, (18, 9), 5),
+    action.FinalAppraisal: (FINAL_APPRAISAL, 0, 0, -1, False, NO_DURABILITY, (1, 1), 6),
+    action.GreatStrides: (GREAT_STRIDES, 0, 0, -1, False, NO_DURABILITY, (32, 16), 4),
+    action.Innovation: (INNOVATION, 0, 0, -1, False, NO_DURABILITY, (18, 9), 5),
+    action.InnerQuiet: (INNER_QUIET, 0, 0, -1, False, NO_DURABILITY, (18, 9), 0),
+    action.Observe: (OBSERVE, 0, 0, -1, False, NO_DURABILITY, (7, 4), 2),
+    action.TricksoftheTrade: (TRICKS, 0, 0, -1, False, NO_DURABILITY, (0, 0), 0),
+    action.WasteNot: (WASTE_NOT, 0, 0, -1, False, NO_DURABILITY, (56, 28), 5),
+    action.WasteNot2: (WASTE_NOT, 0, 0, -1, False, NO_DURABILITY, (98, 49), 9),
+    action.MastersMend: (MASTERS_MEND, 0, 0, -1, False, NO_DURABILITY, (88, 44), 0),
+    action.Manipulation: (MANIPULATION, 0, 0, -1, False, NO_DURABILITY, (96, 48), 9),
+}
+
+
+class _StepTable(dict):
+    # Compiled steps by gene. Only actions x rolls x conditions distinct genes exist, so every gene
+    # is compiled once per process and then only looked up.
+
+    def __missing__(self, gene):
+        compiled = self[gene] = OPCODES[gene[0]] + (gene[1], CONDITION_CODES[gene[2]])
+        return compiled
+
+
+STEPS = _StepTable()
+
+
+def compile_genome(genes):
+    # Compiles (Action, success roll, condition) genes into a program of
+    # (*opcode row, success roll, condition code) steps, for a genome that is run more than once.
+    return [STEPS[gene] for gene in genes]
+
+
+def run_program(constants, program):
+    # Runs compiled steps from a fresh craft with the given SimulationConstants. Returns the score
+    # and the number of steps used, exactly like score.simulate_craft does for a fresh State. The
+    # program can be any iterable of steps, it is only consumed up to the step that ends the craft.
+    floor = math.floor
+    max_progress = constants.max_progress
+    max_quality = constants.max_quality
+    max_cp = constants.max_cp
+    max_durability = constants.max_durability
+    base_progress = constants.base_progress
+    base_quality = constants.base_quality
+
+    cp = max_cp
+    durability = max_durability
+    progress = quality = iq_stacks = 0
+    muscle_memory = name_elements = veneration = final_appraisal = great_strides = 0
+    innovation = observe = waste_not = manipulation = 0
+
+    score = step = 0
+    for (special, progress_efficiency, quality_efficiency, threshold, after_observe,
+         durability_losses, cp_losses, buff_turns, success_val, condition) in program:
+        step += 1
+
+        success = True
+        if threshold >= 0:
+            if after_observe and observe > 0:
+                threshold = 100
+            elif condition == CENTERED:
+                threshold += 25
+            success = success_val <= threshold
+
+        durability_loss = durability_losses[(waste_not > 0) + 2 * (condition == STURDY)]
+
+        if progress_efficiency and success:
+            if special == GROUNDWORK and durability < durability_loss:
+                progress_efficiency = 150
+            modifier = 100
+            if muscle_memory > 0:
+                modifier += 100
+                muscle_memory = 0
+            if veneration > 0:
+                modifier += 50
+            efficiency = progress_efficiency / 100 * modifier / 100
+            if special == BRAND and name_elements > 0:
+                efficiency = efficiency + 2 * math.ceil(1 - progress / max_progress)
+            gained = floor(base_progress * efficiency)
+            if special == MUSCLE_MEMORY:
+                progress = gained  # First turn only, nothing to cap
+            else:
+                gained += progress
+                if gained > max_progress:
+                    gained = max_progress
+                    if final_appraisal > 0:
+                        final_appraisal = 0
+                        gained -= 1
+                progress = gained
+
+        if quality_efficiency and success:
+            if special == BYREGOT:
+                quality_efficiency = 100 + 20 * (iq_stacks - 1)
+            q3 = base_quality[iq_stacks]
+            modifier = 100
+            if great_strides > 0:
+                modifier += 100
+                great_strides = 0
+            if innovation > 0:
+                modifier += 50
+            if 0 < iq_stacks < 11:
+                iq_stacks += 1
+            gained = floor(floor(q3 * (150 if condition == GOOD else 100) / 100) *
+                           (quality_efficiency / 100 * modifier / 100))
+            if special == REFLECT:
+                quality = gained  # First turn only, nothing to cap
+            else:
+                # Delicate Synthesis sets quality to its gain, as the class does
+                if special != DELICATE:
+                    gained += quality
+                if gained > max_quality:
+                    gained = max_quality
+                quality = gained
+
+        if special != GROUNDWORK:  # Groundwork's cost only lowers its efficiency, as the class does
+            durability -= durability_loss
+        cp -= cp_losses[condition == PLIANT]
+
+        if special >= NAME_ELEMENTS:  # Buffs
+            if special == INNOVATION:
+                innovation = buff_turns
+            elif special == GREAT_STRIDES:
+                great_strides = buff_turns
+            elif special == VENERATION:
+                veneration = buff_turns
+            elif special == MANIPULATION:
+                manipulation = buff_turns
+            elif special == WASTE_NOT:
+                waste_not = buff_turns
+            elif special == OBSERVE:
+                observe = buff_turns
+            elif special == INNER_QUIET:
+                iq_stacks = 1
+            elif special == NAME_ELEMENTS:
+                name_elements = buff_turns
+            elif special == FINAL_APPRAISAL:
+                final_appraisal = buff_turns
+        elif special:
+            if special == PATIENT:
+                if success:
+                    if 0 < iq_stacks < 11:
+                        iq_stacks = (iq_stacks - 1) * 2
+                        if iq_stacks > 11:
+                            iq_stacks = 11
+                elif iq_stacks > 0:
+                    iq_stacks = math.ceil(iq_stacks / 2)
+            elif special == EXTRA_STACK:
+                if 0 < iq_stacks < 11:
+                    iq_stacks += 1
+            elif special == BYREGOT:
+                iq_stacks = 0
+            elif special == REFLECT:
+                iq_stacks = 3
+            elif special == MUSCLE_MEMORY:
+                muscle_memory = buff_turns
+            elif special == TRICKS:
+                cp += 20
+                if cp > max_cp:
+                    cp = max_cp
+            elif special == MASTERS_MEND:
+                durability += 30
+                if durability > max_durability:
+                    durability = max_durability
+
+        # Buff decay, State.step
+        if muscle_memory > 0:
+            muscle_memory -= 1
+        if name_elements > 0:
+            name_elements -= 1
+        if veneration > 0:
+            veneration -= 1
+        if final_appraisal > 0:
+            final_appraisal -= 1
+        if great_strides > 0:
+            great_strides -= 1
+        if innovation > 0:
+            innovation -= 1
+        if observe > 0:
+            observe -= 1
+        if waste_not > 0:
+            waste_not -= 1
+        if manipulation > 0:
+            manipulation -= 1
+            if durability > 0:
+                durability += 5
+                if durability > max_durability:
+                    durability = max_durability
+
+        # End of craft check, State.evaluate
+        if cp < 0 or (durability <= 0 and progress < max_progress):
+            return -1, step
+        if progress < max_progress:
+            score = 0  # Final Appraisal can pull a finished craft back under max progress
+        else:
+            score = collectable_score(constants, quality)
+            # A finished craft without quality scores 0 and carries on, as score.simulate_craft
+            # does
+            if score != 0:
+                return score, step
+    return score, step
+
+
+def collectable_score(constants, quality):
+    # Score of a finished craft, State.evaluate for a state with full progress.
+    if quality < constants.collectable_quality:
+        return quality / 1000
+    collectability = quality // 10
+    for minimum, per_point, base in reversed(constants.collectability_tiers):
+        if collectability >= minimum:
+            return per_point * (collectability - minimum) + base
+    raise Exception("You forgot a case for state evaluation.\n\nQuality: {}".format(quality))
+
+
+def simulate_genome(constants, genes):
+    # Compiles and runs a genome, returning the score and the number of steps used. Steps are
+    # compiled as they are reached, the dead tail after the end of the craft is never looked at.
+    return run_program(constants, map(STEPS.__getitem__, genes))
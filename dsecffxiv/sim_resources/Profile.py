@@ -0,0 +1,90 @@
+import math
+from functools import lru_cache
+from typing import NamedTuple, Tuple
+
+# Crafter and recipe stats used by the simulation. A StatProfile pairs one crafter with one recipe,
+# and everything the simulation derives from the stats alone is computed once per profile into
+# SimulationConstants. Formulas sourced from:
+# https://docs.google.com/document/d/1Da48dDVPB7N4ignxGeo0UeJ_6R0kQRqzLUH-TkpSQRc/edit
+
+MAX_IQ_STACKS = 11
+
+
+class CrafterStats(NamedTuple):
+    craftsmanship: int = 2689
+    control: int = 2872
+    cp: int = 572
+    level: int = 420
+
+
+class RecipeStats(NamedTuple):
+    level: int = 511
+    craftsmanship: int = 2620
+    control: int = 2540
+    progress: int = 11126
+    quality: int = 82400
+    durability: int = 50
+    # Below this quality a finished craft is not collectable and scores quality / 1000
+    collectable_quality: int = 58000
+    # (minimum collectability, score per collectability point, base score) for each Skyward
+    # reward tier
+    collectability_tiers: Tuple[Tuple[int, float, int], ...] = (
+        (5800, 0.1, 175), (6500, 0.45, 370), (7700, 0.3, 1100))
+
+
+class StatProfile(NamedTuple):
+    crafter: CrafterStats = CrafterStats()
+    recipe: RecipeStats = RecipeStats()
+
+    @staticmethod
+    def from_dict(values):
+        # Builds a profile from {"crafter": {...}, "recipe": {...}}, any missing stat keeps its
+        # default.
+        recipe = dict(values.get('recipe', {}))
+        if 'collectability_tiers' in recipe:
+            tiers = recipe['collectability_tiers']
+            recipe['collectability_tiers'] = tuple(tuple(tier) for tier in tiers)
+        return StatProfile(CrafterStats(**values.get('crafter', {})), RecipeStats(**recipe))
+
+    def to_dict(self):
+        return {'crafter': self.crafter._asdict(), 'recipe': self.recipe._asdict()}
+
+
+class SimulationConstants:
+    # Flattened stats plus the precomputed parts of the progress and quality formulas for one
+    # profile. States hold a reference to one of these so actions never recompute anything that
+    # only depends on the stats.
+
+    def __init__(self, profile):
+        crafter, recipe = profile.crafter, profile.recipe
+        self.profile = profile
+        self.max_progress = recipe.progress
+        self.max_quality = recipe.quality
+        self.max_cp = crafter.cp
+        self.max_durability = recipe.durability
+        self.collectable_quality = recipe.collectable_quality
+        self.collectability_tiers = recipe.collectability_tiers
+
+        # Progress per 100 efficiency before buffs
+        p1 = crafter.craftsmanship * 21 / 100 + 2
+        p2 = p1 * (crafter.craftsmanship + 10000) / (recipe.craftsmanship + 10000)
+        p3 = p2 * 80 / 100
+        self.base_progress = math.floor(p3)
+
+        # Quality per 100 efficiency before buffs and condition, indexed by Inner Quiet stacks
+        self.base_quality = list()
+        for iq_stacks in range(0, MAX_IQ_STACKS + 1):
+            extra_stacks = iq_stacks - 1 if iq_stacks > 0 else 0
+            f_iq = crafter.control + crafter.control * (extra_stacks * 20 / 100)
+            q1 = f_iq * 35 / 100 + 35
+            q2 = q1 * (f_iq + 10000) / (recipe.control + 10000)
+            self.base_quality.append(q2 * 60 / 100)
+
+
+@lru_cache(maxsize=None)
+def simulation_constants(profile):
+    # Returns the shared constants for a profile, computed once per process.
+    return SimulationConstants(profile)
+
+
+DEFAULT_PROFILE = StatProfile()
@@ -1,16 +1,21 @@
 # Class representing the state of a craft. Each craft parameter and buff is included as an attribute, as well as a value
-# that is used to calculate whether certain actions succeed or fail.
+# that is used to calculate whether certain actions succeed or fail. The crafter and recipe stats
+# come from a StatProfile, whose precomputed constants are shared by every state of that profile.
+
+from dsecffxiv.sim_resources.Profile import DEFAULT_PROFILE, simulation_constants
+
 
 class State:
 
     CONDITIONS = ["normal", "good", "pliant", "centered", "sturdy"]
 
-    def __init__(self):
+    def __init__(self, profile=DEFAULT_PROFILE):
         # Success is an argument 0-99 that is used to determine the success of an action that can fail
-        self.cp = 572
+        self.constants = simulation_constants(profile)
+        self.cp = self.constants.max_cp
         self.progress = 0
         self.quality = 0
-        self.durability = 50
+        self.durability = self.constants.max_durability
         self.material_condition = State.CONDITIONS[0]
         self.step_number = 1
         self.iq_stacks = 0
@@ -25,6 +30,18 @@ class State:
         self.manipulation = 0
         self.success_val = 0  # Never used on first step (Muscle Memory and Reflect are not stochastic)
 
+    def copy(self):
+        # Returns an independent snapshot of the state. Every attribute is an immutable value, so a
+        # shallow copy is enough and much cheaper than copy.deepcopy.
+        clone = State.__new__(State)
+        clone.__dict__.update(self.__dict__)
+        return clone
+
+    @property
+    def profile(self):
+        # The StatProfile this state is simulated with.
+        return self.constants.profile
+
     def update_condition(self, index):
         # Updates condition of craft by indexing array of conditions.
         self.material_condition = State.CONDITIONS[index]
@@ -56,24 +73,24 @@ class State:
             self.manipulation -= 1
             if self.durability > 0:  # Only apply if craft isn't broken
                 self.durability += 5
-                if self.durability > 50:
-                    self.durability = 50
+                if self.durability > self.constants.max_durability:
+                    self.durability = self.constants.max_durability
 
     def evaluate(self):
         # Calculates score based on craft parameters.
-        if self.cp < 0 or (self.durability <= 0 and self.progress < 11126):
+        constants = self.constants
+        if self.cp < 0 or (self.durability <= 0 and self.progress < constants.max_progress):
             return -1  # these states are undesirable and the simulation should not continue.
-        elif self.progress < 11126:
+        elif self.progress < constants.max_progress:
             return 0  # haven't finished craft
-        elif self.progress >= 11126 and self.quality < 58000:
+        elif self.progress >= constants.max_progress and \
+                self.quality < constants.collectable_quality:
             return self.quality / 1000
         collectability = self.quality // 10  # Find skyward score for craft
-        if 5800 <= collectability < 6500:
-            return 0.1 * (collectability - 5800) + 175
-        if 6500 <= collectability < 7700:
-            return 0.45 * (collectability - 6500) + 370
-        if collectability >= 7700:
-            return 0.3 * (collectability - 7700) + 1100
+        # Tiers are in increasing order, the highest one reached sets the score
+        for minimum, per_point, base in reversed(constants.collectability_tiers):
+            if collectability >= minimum:
+                return per_point * (collectability - minimum) + base
         raise Exception("You forgot a case for state evaluation.\n\n{}".format(self))
 
     def __str__(self):
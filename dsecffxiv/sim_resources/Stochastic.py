@@ -0,0 +1,38 @@
+import dsecffxiv.sim_resources.ActionClasses as action
+
+# Success chances of the actions that can fail. Each of these succeeds when state.success_val
+# (0-99) is at or below its threshold, the thresholds here mirror the ones in the execute methods
+# of ActionClasses.
+
+SUCCESS_THRESHOLDS = {
+    action.RapidSynthesis: 49,
+    action.HastyTouch: 59,
+    action.PatientTouch: 49,
+    action.FocusedSynthesis: 49,
+    action.FocusedTouch: 49,
+}
+CENTERED_BONUS = 25
+# Actions that always succeed on the turn after Observe
+OBSERVE_GUARANTEED = (action.FocusedSynthesis, action.FocusedTouch)
+
+
+def success_threshold(which, state):
+    # Returns the success_val threshold of an action given the state it is executed in (after the
+    # condition for the step has been applied), or None if the action always succeeds.
+    threshold = SUCCESS_THRESHOLDS.get(which)
+    if threshold is None:
+        return None
+    if which in OBSERVE_GUARANTEED and state.observe > 0:
+        return 100
+    if state.material_condition == "centered":
+        threshold += CENTERED_BONUS
+    return threshold
+
+
+def success_probability(which, state):
+    # Returns the chance (0-1) that an action succeeds in the given state, 1 for actions that
+    # cannot fail.
+    threshold = success_threshold(which, state)
+    if threshold is None:
+        return 1.0
+    return min(threshold + 1, 100) / 100
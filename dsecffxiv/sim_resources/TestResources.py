@@ -1,7 +1,7 @@
-import random
 from math import ceil
 
 import dsecffxiv.sim_resources.ActionClasses as action
+from dsecffxiv.utils.rng import default_rng
 
 # Contains support functions for generating test environment and handling action selection.
 
@@ -28,12 +28,11 @@ MAX_CP = 572
 MAX_DURABILITY = 50
 
 
-def generate_material_conditions(sequence_length):
+def generate_material_conditions(sequence_length, rng=None):
     # Probabilities sourced from:
     # https://docs.google.com/document/d/1Da48dDVPB7N4ignxGeo0UeJ_6R0kQRqzLUH-TkpSQRc/edit
     conditions = [0]  # First state is always normal
-    for _ in range(1, sequence_length):
-        rand_val = random.randint(0, 99)
+    for rand_val in default_rng(rng).integers(0, 100, sequence_length - 1):
         if 0 <= rand_val <= 11:
             conditions.append(1)  # Good
         elif 12 <= rand_val <= 26:
@@ -47,22 +46,21 @@ def generate_material_conditions(sequence_length):
     return conditions
 
 
-def generate_success_values(sequence_length):
+def generate_success_values(sequence_length, rng=None):
     # Generates success chance values that are used to determine the success or failure of certain actions.
-    values = []
-    for _ in range(0, sequence_length):
-        values.append(random.randint(0, 99))
-    return values
+    return default_rng(rng).integers(0, 100, sequence_length)
 
 
 def get_random_action(step_number, material_condition, waste_not, inner_quiet, name_elements, veneration, great_strides,
-                      innovation, manipulation, cp, durability):
+                      innovation, manipulation, cp, durability, rng=None, max_cp=MAX_CP):
     # Gets a random valid action based on the state. Basically all heuristics are handled here.
-    remaining_cp_ratio = cp / MAX_CP
+    # max_cp is the crafter's CP pool, so the CP ratio holds for any stat profile.
+    rng = default_rng(rng)
+    remaining_cp_ratio = min(cp / max_cp, 1)
     if step_number == 0:  # Opening actions should always be used and can only be used now
-        return first_step_actions[random.randint(0, 1)]
+        return first_step_actions[rng.randint(0, 1)]
     if durability <= 25:
-        i = random.randrange(0, 1)
+        i = rng.randrange(0, 1)
         if low_durability_actions[i].CP_COST > cp:
             i = abs(i - 1)  # gives 0 if it was 1, 1 if it was 0
             if low_durability_actions[i].CP_COST <= cp:
@@ -70,7 +68,7 @@ def get_random_action(step_number, material_condition, waste_not, inner_quiet, n
                 return low_durability_actions[i]
     if material_condition == "good":  # Good condition has exclusive actions
         # low CP ratio will result in lower CP skills being chosen
-        i = random.randrange(
+        i = rng.randrange(
             0, ceil(len(good_condition_actions) * remaining_cp_ratio))
         # Prudent Touch cannot be used while Waste Not buff is active. Inner Quiet cannot be used while user has stacks.
         # Other buffs should not be used while they are already up.
@@ -81,10 +79,10 @@ def get_random_action(step_number, material_condition, waste_not, inner_quiet, n
                 (great_strides > 0 and i == good_condition_actions.index(action.GreatStrides)) or \
                 (innovation > 0 and i == good_condition_actions.index(action.Innovation)) or \
                 (manipulation > 0 and i == good_condition_actions.index(action.Manipulation)):
-            i = random.randrange(
+            i = rng.randrange(
                 0, ceil(len(good_condition_actions) * remaining_cp_ratio))
         return good_condition_actions[i]
-    i = random.randrange(0, ceil(len(actions) * remaining_cp_ratio))
+    i = rng.randrange(0, ceil(len(actions) * remaining_cp_ratio))
     # Prudent Touch cannot be used while Waste Not buff is active. Inner Quiet cannot be used while user has stacks.
     # Other buffs should not be used while they are already up.
     while (waste_not > 0 and i == actions.index(action.PrudentTouch)) or \
@@ -94,5 +92,5 @@ def get_random_action(step_number, material_condition, waste_not, inner_quiet, n
             (great_strides > 0 and i == actions.index(action.GreatStrides)) or \
             (innovation > 0 and i == actions.index(action.Innovation)) or \
             (manipulation > 0 and i == actions.index(action.Manipulation)):
-        i = random.randrange(0, ceil(len(actions) * remaining_cp_ratio))
+        i = rng.randrange(0, ceil(len(actions) * remaining_cp_ratio))
     return actions[i]
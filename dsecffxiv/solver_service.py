@@ -0,0 +1,344 @@
+"""Local solver daemon that keeps warm worker processes and answers solve requests over a socket.
+
+Clients connect to a local TCP port and send one JSON request per line, for example
+    {"id": "a", "crafter": {...}, "recipe": {...}, "generations": 200, "time_budget": 5}
+with an optional "config" object of GA config overrides. Requests are queued and the ones that share
+a profile and backend are batched onto one task of a persistent process pool, whose workers import
+the simulator once and keep their per profile constants. While a request runs the server streams
+progress lines back, and finished answers are cached by request hash, so repeated or concurrent
+identical requests are solved only once.
+
+Every response line carries the request's id and a type of 'progress', 'result' or 'error'.
+"""
+
+import argparse
+import asyncio
+import hashlib
+import json
+import os
+import socket
+import sys
+import threading
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from multiprocessing import get_all_start_methods, get_context
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from dsecffxiv.headless_runner import assemble_config, build_parser, solve_config
+from dsecffxiv.sim_resources.Profile import StatProfile
+
+DEFAULT_HOST = '127.0.0.1'
+DEFAULT_PORT = 8765
+DEFAULT_BATCH_SIZE = 4
+DEFAULT_BATCH_WINDOW = 0.05  # Seconds to wait for compatible requests before dispatching a batch
+DEFAULT_CACHE_SIZE = 1024
+DEFAULT_GENERATIONS = 100
+
+Listener = Callable[[Dict[str, Any]], None]
+
+
+def normalize_request(request: Dict[str, Any]) -> Dict[str, Any]:
+    """Reduce a request to the fields that decide its answer, with every default filled in."""
+    profile = StatProfile.from_dict({'crafter': request.get('crafter', {}),
+                                     'recipe': request.get('recipe', {})})
+    return {
+        'profile': profile.to_dict(),
+        'generations': int(request.get('generations', DEFAULT_GENERATIONS)),
+        'time_budget': request.get('time_budget'),
+        'seed': request.get('seed'),
+        'backend': request.get('backend', 'basic'),
+        'config': request.get('config', {}),
+    }
+
+
+def request_key(normalized: Dict[str, Any]) -> str:
+    """Hash of a normalized request, used as its cache key."""
+    return hashlib.sha256(json.dumps(normalized, sort_keys=True).encode()).hexdigest()
+
+
+def _warm_worker() -> None:
+    """Pool initializer, build the default profile's constants before the first request arrives."""
+    # pylint: disable=import-outside-toplevel
+    from dsecffxiv.sim_resources.State import State
+    State()
+
+
+def solve_requests(batch: List[Tuple[str, Dict[str, Any]]], message_queue,
+                   solution_cache: Optional[str] = None) -> None:
+    """Worker entry point, solve a batch of (key, normalized request) pairs in order.
+
+    Progress and each answer are put on message_queue as (key, message) pairs as soon as they are
+    known, so a request never waits for the rest of its batch. solution_cache is the path of a
+    persistent SolutionCache shared by every worker, if any.
+    """
+    def progress(key, generation, score):
+        message_queue.put((key, {'type': 'progress', 'generation': generation, 'score': score}))
+
+    for key, normalized in batch:
+        config = assemble_config(build_parser().parse_args(['solve']))
+        config.update(normalized['config'])
+        config['profile'] = StatProfile.from_dict(normalized['profile'])
+        config['seed'] = normalized['seed']
+        if solution_cache is not None:
+            config['solution_cache'] = solution_cache
+        try:
+            solved = solve_config(config, normalized['generations'], normalized['backend'],
+                                  normalized['time_budget'], partial(progress, key))
+            result = dict(solved, type='result')
+        except Exception as error:  # pylint: disable=broad-except
+            result = {'type': 'error', 'error': '{0}: {1}'.format(type(error).__name__, error)}
+        message_queue.put((key, result))
+
+
+class SolverService():
+    """Queue, batch, cache and run solve requests on a persistent process pool."""
+
+    def __init__(self, workers: int = os.cpu_count() or 1, batch_size: int = DEFAULT_BATCH_SIZE,
+                 batch_window: float = DEFAULT_BATCH_WINDOW, cache_size: int = DEFAULT_CACHE_SIZE,
+                 solution_cache: Optional[str] = None):
+        """Start the worker processes."""
+        self.batch_size = max(batch_size, 1)
+        self.batch_window = batch_window
+        self.cache_size = cache_size
+        # Persistent cache file behind the in memory one, survives restarts and warm starts the GA
+        self.solution_cache = solution_cache
+        self.cache: 'OrderedDict[str, Dict[str, Any]]' = OrderedDict()
+        self.stats = {'requests': 0, 'cache_hits': 0, 'joined': 0, 'batches': 0, 'solved': 0}
+
+        # Forked workers would inherit the client sockets open at the time and keep those
+        # connections from ever closing, so start them from a clean forkserver where there is one
+        context = get_context('forkserver' if 'forkserver' in get_all_start_methods() else None)
+        self._manager = context.Manager()
+        self._message_queue = self._manager.Queue()
+        self._pool = ProcessPoolExecutor(max(workers, 1), mp_context=context,
+                                         initializer=_warm_worker)
+        self._pending: Optional[asyncio.Queue] = None
+        # Requests queued or running, key -> (future for the answer, listeners for its progress)
+        self._in_flight: Dict[str, Tuple[asyncio.Future, List[Listener]]] = dict()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._tasks: List[asyncio.Task] = list()
+        self._relay_thread: Optional[threading.Thread] = None
+
+    async def start(self) -> None:
+        """Start the dispatcher and the worker message relay on the running event loop."""
+        self._loop = asyncio.get_running_loop()
+        self._pending = asyncio.Queue()
+        self._tasks.append(asyncio.ensure_future(self._dispatch()))
+        self._relay_thread = threading.Thread(target=self._relay_messages, daemon=True)
+        self._relay_thread.start()
+
+    async def solve(self, request: Dict[str, Any],
+                    listener: Optional[Listener] = None) -> Dict[str, Any]:
+        """Answer a request from the cache, by joining an identical running one or by queueing."""
+        self.stats['requests'] += 1
+        normalized = normalize_request(request)
+        key = request_key(normalized)
+        cached = self.cache.get(key)
+        if cached is not None:
+            self.cache.move_to_end(key)
+            self.stats['cache_hits'] += 1
+            return dict(cached, cached=True)
+
+        if key in self._in_flight:
+            self.stats['joined'] += 1
+            future, listeners = self._in_flight[key]
+        else:
+            future, listeners = self._loop.create_future(), list()
+            self._in_flight[key] = (future, listeners)
+            self._pending.put_nowait((key, normalized))
+        if listener is not None:
+            listeners.append(listener)
+        try:
+            return dict(await asyncio.shield(future), cached=False)
+        finally:
+            if listener is not None and listener in listeners:
+                listeners.remove(listener)
+
+    async def _dispatch(self) -> None:
+        """Collect compatible requests into batches and hand each batch to the process pool."""
+        while True:
+            batches: Dict[Tuple[str, str], List[Tuple[str, Dict[str, Any]]]] = dict()
+            first = await self._pending.get()
+            self._add_to_batches(batches, first)
+            deadline = self._loop.time() + self.batch_window
+            while self._loop.time() < deadline:
+                try:
+                    item = await asyncio.wait_for(self._pending.get(), deadline - self._loop.time())
+                except asyncio.TimeoutError:
+                    break
+                self._add_to_batches(batches, item)
+            for batch in batches.values():
+                for start in range(0, len(batch), self.batch_size):
+                    chunk = batch[start:start + self.batch_size]
+                    self._tasks.append(asyncio.ensure_future(self._run_batch(chunk)))
+            self._tasks = [task for task in self._tasks if not task.done()]
+
+    @staticmethod
+    def _add_to_batches(batches, item) -> None:
+        """Group a queued request with others of the same profile and backend."""
+        normalized = item[1]
+        compatibility = (json.dumps(normalized['profile'], sort_keys=True), normalized['backend'])
+        batches.setdefault(compatibility, list()).append(item)
+
+    async def _run_batch(self, batch: List[Tuple[str, Dict[str, Any]]]) -> None:
+        """Run one batch in the pool, failing any of its requests the worker never answered."""
+        self.stats['batches'] += 1
+        failure = 'Worker stopped before answering'
+        try:
+            await self._loop.run_in_executor(self._pool, solve_requests, batch, self._message_queue,
+                                             self.solution_cache)
+        except Exception as error:  # pylint: disable=broad-except
+            failure = '{0}: {1}'.format(type(error).__name__, error)
+        # Answers are relayed through the message queue, so queue the check behind the ones
+        # already on their way
+        done = {'type': 'batch_done', 'keys': [key for key, _ in batch], 'error': failure}
+        await self._loop.run_in_executor(None, self._message_queue.put, (None, done))
+
+    def _remember(self, key: str, result: Dict[str, Any]) -> None:
+        """Cache an answer, evicting the least recently used ones past cache_size."""
+        self.cache[key] = result
+        self.cache.move_to_end(key)
+        while len(self.cache) > self.cache_size:
+            self.cache.popitem(last=False)
+
+    def _relay_messages(self) -> None:
+        """Thread that moves worker messages from the manager queue onto the event loop."""
+        while True:
+            item = self._message_queue.get()
+            if item is None:
+                return
+            self._loop.call_soon_threadsafe(self._on_message, *item)
+
+    def _on_message(self, key: str, message: Dict[str, Any]) -> None:
+        """Forward progress to everyone waiting on a request, or resolve it with its answer."""
+        if message['type'] == 'batch_done':
+            for unanswered in message['keys']:
+                self._on_message(unanswered, {'type': 'error', 'error': message['error']})
+            return
+        entry = self._in_flight.get(key)
+        if entry is None:
+            return
+        if message['type'] == 'progress':
+            for listener in list(entry[1]):
+                listener(message)
+            return
+        del self._in_flight[key]
+        if message['type'] == 'result':
+            self.stats['solved'] += 1
+            self._remember(key, message)
+        entry[0].set_result(message)
+
+    async def handle_client(self, reader: asyncio.StreamReader,
+                            writer: asyncio.StreamWriter) -> None:
+        """Serve one connection, answering each request line as soon as it is done."""
+        answering = list()
+
+        def send(request_id, message: Dict[str, Any]) -> None:
+            writer.write((json.dumps(dict(message, id=request_id)) + '\n').encode())
+
+        async def answer(request_id, request: Dict[str, Any]) -> None:
+            try:
+                result = await self.solve(request, lambda message: send(request_id, message))
+            except Exception as error:  # pylint: disable=broad-except
+                result = {'type': 'error', 'error': '{0}: {1}'.format(type(error).__name__, error)}
+            send(request_id, result)
+            await writer.drain()
+
+        count = 0
+        while True:
+            line = await reader.readline()
+            if not line:
+                break
+            count += 1
+            try:
+                request = json.loads(line)
+            except ValueError as error:
+                send(None, {'type': 'error', 'error': 'Bad request: {0}'.format(error)})
+                continue
+            if not isinstance(request, dict):
+                send(None, {'type': 'error', 'error': 'Bad request: expected a JSON object'})
+                continue
+            if request.get('command') == 'stats':
+                send(request.get('id'), dict(self.stats, type='stats', cached=len(self.cache),
+                                             in_flight=len(self._in_flight)))
+                continue
+            answering.append(asyncio.ensure_future(answer(request.get('id', count), request)))
+        await asyncio.gather(*answering)
+        writer.close()
+
+    async def close(self) -> None:
+        """Stop dispatching and shut the worker processes down."""
+        for task in self._tasks:
+            task.cancel()
+        self._message_queue.put(None)
+        self._pool.shutdown()
+        self._manager.shutdown()
+
+
+async def serve(host: str, port: int, service: SolverService) -> None:
+    """Serve solve requests until cancelled."""
+    await service.start()
+    server = await asyncio.start_server(service.handle_client, host, port)
+    print('Solver service listening on {0}:{1}'.format(host, port), file=sys.stderr)
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        await service.close()
+
+
+def request_lines(requests: List[Dict[str, Any]], host: str = DEFAULT_HOST,
+                  port: int = DEFAULT_PORT) -> Iterator[Dict[str, Any]]:
+    """Client helper, send requests to a running service and yield each response line."""
+    with socket.create_connection((host, port)) as connection:
+        for request in requests:
+            connection.sendall((json.dumps(request) + '\n').encode())
+        connection.shutdown(socket.SHUT_WR)
+        with connection.makefile('r') as responses:
+            for line in responses:
+                yield json.loads(line)
+
+
+def main(argv=None) -> int:
+    """Run the service, or send requests to a running one."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--host', default=DEFAULT_HOST)
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT)
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    serve_parser = commands.add_parser('serve', help='Run the solver service')
+    serve_parser.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                              help='Worker processes')
+    serve_parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE,
+                              help='Most compatible requests run as one pool task')
+    serve_parser.add_argument('--batch-window', type=float, default=DEFAULT_BATCH_WINDOW,
+                              help='Seconds to wait for compatible requests before dispatching')
+    serve_parser.add_argument('--cache-size', type=int, default=DEFAULT_CACHE_SIZE,
+                              help='Answers kept in the in memory cache')
+    serve_parser.add_argument('--solution-cache', default=None,
+                              help='SQLite file of best crafts per problem, shared by the workers')
+
+    commands.add_parser('request',
+                        help='Send JSON lines requests from stdin and print the responses')
+    args = parser.parse_args(argv)
+
+    if args.command == 'serve':
+        service = SolverService(args.workers, args.batch_size, args.batch_window, args.cache_size,
+                                args.solution_cache)
+        try:
+            asyncio.run(serve(args.host, args.port, service))
+        except KeyboardInterrupt:
+            pass
+        return 0
+
+    failures = 0
+    requests = [json.loads(line) for line in sys.stdin if line.strip()]
+    for response in request_lines(requests, args.host, args.port):
+        failures += response['type'] == 'error'
+        print(json.dumps(response), flush=True)
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
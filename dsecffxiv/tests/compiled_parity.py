@@ -0,0 +1,85 @@
+"""
+Parity check for the compiled simulator.
+
+Problem:
+    The compiled simulator in sim_resources/Compiled.py must score every genome exactly like
+    executing the action classes on a State, and stop at the same step.
+
+    Compare both on random genomes of every action (valid or not), on genomes built by the
+    generation heuristics, and under stat profiles other than the default one.
+
+    Run with: python -m dsecffxiv.tests.compiled_parity [genome count] [seed]
+"""
+
+import sys
+from time import perf_counter
+
+from dsecffxiv.algo.encoding import ACTIONS
+from dsecffxiv.algo.generation import generate_population_bulk
+from dsecffxiv.algo.score import simulate_craft
+from dsecffxiv.sim_resources.Compiled import simulate_genome
+from dsecffxiv.sim_resources.Profile import DEFAULT_PROFILE, StatProfile, simulation_constants
+from dsecffxiv.sim_resources.State import State
+from dsecffxiv.sim_resources.TestResources import (generate_material_conditions,
+                                                   generate_success_values)
+from dsecffxiv.utils.rng import Rng
+
+SIZE = 50
+
+
+def random_genome(rng: Rng, size: int):
+    """Genes of uniformly random actions, rolls and conditions, ignoring every heuristic."""
+    return [(rng.choice(ACTIONS), rng.randrange(100), rng.randrange(5)) for _ in range(size)]
+
+
+def random_profile(rng: Rng) -> StatProfile:
+    """A profile with stats scattered around the default ones."""
+    return StatProfile.from_dict({
+        'crafter': {'craftsmanship': rng.randrange(1500, 4000),
+                    'control': rng.randrange(1500, 4000), 'cp': rng.randrange(300, 700)},
+        'recipe': {'progress': rng.randrange(3000, 12000), 'quality': rng.randrange(20000, 90000),
+                   'durability': rng.choice((35, 40, 60, 70, 80))},
+    })
+
+
+def check(profile: StatProfile, genes) -> bool:
+    """True if both simulators agree on the genome's score and length."""
+    expected = simulate_craft(State(profile), genes, 0)
+    return simulate_genome(simulation_constants(profile), genes) == expected and \
+        type(simulate_genome(simulation_constants(profile), genes)[0]) is type(expected[0])
+
+
+if __name__ == "__main__":
+    COUNT = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    rng = Rng(int(sys.argv[2]) if len(sys.argv) > 2 else 0)
+
+    cases = list()
+    for index in range(COUNT):
+        profile = DEFAULT_PROFILE if index % 2 else random_profile(rng)
+        cases.append((profile, random_genome(rng, rng.randrange(1, SIZE + 1))))
+
+    material_conditions = generate_material_conditions(SIZE, rng)
+    success_rolls = generate_success_values(SIZE, rng)
+    for profile in (DEFAULT_PROFILE, random_profile(rng)):
+        for indiv in generate_population_bulk(COUNT // 2, SIZE, material_conditions, success_rolls,
+                                              rng, profile):
+            cases.append((profile, indiv.value))
+
+    mismatches = [(profile, genes) for profile, genes in cases if not check(profile, genes)]
+    for profile, genes in mismatches[:5]:
+        print("Mismatch: {0}\n  classes: {1}\n  compiled: {2}".format(
+            profile, simulate_craft(State(profile), genes, 0),
+            simulate_genome(simulation_constants(profile), genes)))
+
+    start = perf_counter()
+    for profile, genes in cases:
+        simulate_craft(State(profile), genes, 0)
+    class_seconds = perf_counter() - start
+    start = perf_counter()
+    for profile, genes in cases:
+        simulate_genome(simulation_constants(profile), genes)
+    compiled_seconds = perf_counter() - start
+
+    print("{0} genomes, {1} mismatches, classes {2:.3f}s, compiled {3:.3f}s".format(
+        len(cases), len(mismatches), class_seconds, compiled_seconds))
+    sys.exit(1 if mismatches else 0)
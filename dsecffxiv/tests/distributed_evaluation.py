@@ -0,0 +1,83 @@
+"""
+Check of the distributed runner on one machine.
+
+Problem:
+    evaluate_population in distributed_runner.py must return the same scores, in the same order, as
+    scoring the population locally, whatever the batch size.
+
+    Also check that a task running for longer than the coordinator's lease is not handed to another
+    worker while its worker keeps sending heartbeats.
+
+    Run with: python -m dsecffxiv.tests.distributed_evaluation [population size] [seed]
+"""
+
+import sys
+import threading
+import time
+
+from dsecffxiv import distributed_runner
+from dsecffxiv.algo.genetic_algorithm import GeneticAlgorithm
+from dsecffxiv.algo.score import score_craft
+from dsecffxiv.headless_runner import assemble_config, build_parser
+
+GENERATIONS = 10
+WORKERS = 3
+LEASE = 0.5
+HEARTBEAT = 0.1
+
+
+def slow_task(payload):
+    """Task that outlives the lease several times over."""
+    time.sleep(payload['seconds'])
+    return {'slept': payload['seconds']}
+
+
+if __name__ == "__main__":
+    SIZE = int(sys.argv[1]) if len(sys.argv) > 1 else 300
+    SEED = int(sys.argv[2]) if len(sys.argv) > 2 else 0
+
+    ga = GeneticAlgorithm(assemble_config(build_parser().parse_args(
+        ['solve', '--population-size', str(SIZE), '--selection-size', '30', '--tournament-size',
+         '10', '--seed', str(SEED)])))
+    for _ in range(GENERATIONS):
+        ga.step()
+    population = ga.population
+    local = [score_craft(indiv, ga.profile) for indiv in population]
+
+    # Workers run in threads of this process, so they see the extra task kind
+    distributed_runner.TASK_HANDLERS['sleep'] = slow_task
+    failures = 0
+    with distributed_runner.Coordinator(port=0, lease=LEASE, max_attempts=1) as coordinator:
+        host, port = coordinator.address
+        workers = [threading.Thread(target=distributed_runner.run_worker, args=(host, port),
+                                    kwargs={'heartbeat': HEARTBEAT}, daemon=True)
+                   for _ in range(WORKERS)]
+        for worker in workers:
+            worker.start()
+
+        for batch_size in (1, 7, distributed_runner.DEFAULT_EVALUATION_BATCH):
+            start = time.perf_counter()
+            remote = distributed_runner.evaluate_population(
+                coordinator, ga.profile, ga.material_conditions, ga.success_rolls, population,
+                batch_size)
+            elapsed = time.perf_counter() - start
+            mismatches = sum(1 for ours, theirs in zip(local, remote) if ours != theirs)
+            if len(remote) != len(local) or mismatches:
+                failures += 1
+                print("Batch size {0}: {1} scores for {2} genomes, {3} mismatches".format(
+                    batch_size, len(remote), len(local), mismatches))
+            print("Batch size {0:3d}: {1} genomes in {2:.3f}s".format(batch_size, len(remote),
+                                                                      elapsed))
+
+        try:
+            coordinator.submit('sleep', {'seconds': 4 * LEASE}).result()
+        except distributed_runner.RemoteTaskError as error:
+            failures += 1
+            print("Long task failed: {0}".format(error))
+        if coordinator.stats['requeued']:
+            failures += 1
+            print("Tasks were requeued while their workers were alive")
+        print("Stats: {0}".format(coordinator.stats))
+
+    print("{0} genomes, {1} failures".format(len(population), failures))
+    sys.exit(1 if failures else 0)
@@ -0,0 +1,138 @@
+"""
+Check of the exact expected score evaluator.
+
+Problem:
+    expected_craft in algo/expected.py must agree with the mean score over many sampled success
+    rolls, and with the plain simulator on genomes where nothing can fail. Half the genomes are
+    evolved from several seeds and half are fresh from the generation heuristics, all with distinct
+    effective prefixes.
+
+    Also report how far merging identical states keeps the number of live branches below the
+    2 ** (stochastic steps) of a full enumeration, and check that memetic local search under the
+    expected objective keeps the population sorted best first.
+
+    Run with: python -m dsecffxiv.tests.expected_value [genome count] [samples per genome] [seed]
+"""
+
+import sys
+from time import perf_counter
+from typing import List, Set, Tuple
+
+from dsecffxiv.algo.expected import expected_craft
+from dsecffxiv.algo.generation import generate_population_bulk
+from dsecffxiv.algo.genetic_algorithm import GeneticAlgorithm
+from dsecffxiv.algo.score import score_craft
+from dsecffxiv.algo.types import Population
+from dsecffxiv.headless_runner import assemble_config, build_parser
+from dsecffxiv.sim_resources.Compiled import simulate_genome
+from dsecffxiv.sim_resources.Profile import DEFAULT_PROFILE, simulation_constants
+from dsecffxiv.sim_resources.Stochastic import SUCCESS_THRESHOLDS
+from dsecffxiv.utils.rng import Rng
+
+GENERATIONS = 40
+RUNS = 4  # Seeds to evolve genomes from
+SIZE = 50
+FRESH_BATCHES = 20
+
+
+def sampled_mean(rng: Rng, genes, samples: int) -> Tuple[float, float]:
+    """Mean score of the genome over samples independent draws of its success rolls, and its error.
+
+    The error is the standard error of the mean, from the sample variance of the scores.
+    """
+    constants = simulation_constants(DEFAULT_PROFILE)
+    total = total_squares = 0.0
+    for _ in range(samples):
+        score = simulate_genome(constants, [(which, rng.randrange(100), condition)
+                                            for which, _, condition in genes])[0]
+        total += score
+        total_squares += score * score
+    mean = total / samples
+    variance = max(total_squares - samples * mean * mean, 0.0) / (samples - 1)
+    return mean, (variance / samples) ** 0.5
+
+
+def distinct_genomes(population: Population, count: int, seen: Set[tuple]) -> List[list]:
+    """Up to count genomes of the scored population whose effective prefixes are not in seen yet.
+
+    Prefixes are compared without their success rolls, which the exact score does not look at.
+    """
+    genomes = list()
+    for indiv in population:
+        prefix = tuple((which, condition) for which, _, condition in indiv.effective_value())
+        if prefix not in seen and len(genomes) < count:
+            seen.add(prefix)
+            genomes.append(indiv.value)
+    return genomes
+
+
+if __name__ == "__main__":
+    COUNT = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    SAMPLES = int(sys.argv[2]) if len(sys.argv) > 2 else 4000
+    SEED = int(sys.argv[3]) if len(sys.argv) > 3 else 0
+    rng = Rng(SEED)
+
+    # Random genomes almost always break, so half are evolved a little from several seeds to get
+    # crafts that finish. An evolved population converges, only genomes whose effective prefixes
+    # differ are checked, or the check covers the same craft many times over.
+    seen: Set[tuple] = set()
+    genomes = list()
+    for seed in range(SEED, SEED + RUNS):
+        ga = GeneticAlgorithm(assemble_config(build_parser().parse_args(
+            ['solve', '--population-size', str(max(COUNT, 100)), '--selection-size', '30',
+             '--tournament-size', '10', '--seed', str(seed)])))
+        for _ in range(GENERATIONS):
+            ga.step()
+        ga.rank_and_cull()
+        share = (COUNT // 2 - len(genomes)) // (SEED + RUNS - seed)
+        genomes += distinct_genomes(ga.population, share, seen)
+    # The other half are fresh genomes from the generation heuristics. Most of them surely break,
+    # only the ones that finish with their own rolls are kept, those can go either way.
+    for _ in range(FRESH_BATCHES):
+        if len(genomes) >= COUNT:
+            break
+        fresh = generate_population_bulk(50 * COUNT, SIZE, ga.material_conditions, ga.success_rolls,
+                                         rng)
+        finished = [indiv for indiv in fresh if score_craft(indiv) > 0]
+        genomes += distinct_genomes(finished, COUNT - len(genomes), seen)
+
+    failures = 0
+    exact_seconds = sampled_seconds = 0.0
+    for genes in genomes:
+        stochastic = sum(gene[0] in SUCCESS_THRESHOLDS for gene in genes)
+        start = perf_counter()
+        expectation = expected_craft(genes)
+        exact_seconds += perf_counter() - start
+        start = perf_counter()
+        mean, error = sampled_mean(rng, genes, SAMPLES)
+        sampled_seconds += perf_counter() - start
+        # Allow a few standard errors of sampling noise, and float rounding where nothing varies
+        if abs(expectation.score - mean) > 4 * error + 1e-9:
+            failures += 1
+            print("Mismatch: exact {0:.3f}, sampled {1:.3f} +- {2:.3f}".format(
+                expectation.score, mean, error))
+        print("{0:2d} stochastic steps, {1:3d} peak states, exact {2:8.3f}, sampled {3:8.3f} "
+              "+- {4:.3f}".format(stochastic, expectation.peak_states, expectation.score, mean,
+                                  error))
+
+        certain = [gene for gene in genes if gene[0] not in SUCCESS_THRESHOLDS]
+        certain_score, _ = simulate_genome(simulation_constants(DEFAULT_PROFILE), certain)
+        if expected_craft(certain).score != certain_score:
+            failures += 1
+            print("Mismatch on a genome without stochastic actions")
+
+    # Local search must climb the expected score, or polished elites drop below the rest
+    for seed in range(SEED, SEED + 6):
+        polished = GeneticAlgorithm(assemble_config(build_parser().parse_args(
+            ['solve', '--population-size', '60', '--selection-size', '20', '--tournament-size', '5',
+             '--objective', 'expected', '--local-search-elites', '3', '--seed', str(seed)])))
+        for generation in range(4):
+            polished.step()
+            if polished.scores != sorted(polished.scores, reverse=True):
+                failures += 1
+                print("Unsorted scores after local search, seed {0} generation {1}".format(
+                    seed, generation))
+
+    print("{0} genomes, {1} failures, exact {2:.3f}s, {3} samples each {4:.3f}s".format(
+        len(genomes), failures, exact_seconds, SAMPLES, sampled_seconds))
+    sys.exit(1 if failures else 0)
@@ -0,0 +1,72 @@
+"""
+Allocation check for pooled individuals.
+
+Problem:
+    Breeding children into recycled individuals (config['pool_individuals'], see
+    algo/types/individual_pool.py) must evolve exactly the same population as allocating new
+    ones, and should allocate far less per generation.
+
+    Run the GA with and without the pool from the same seed, compare the final populations and
+    report per generation: new Individuals created, bytes allocated above the generation's start
+    (tracemalloc peak), garbage collections and time.
+
+    Run with: python -m dsecffxiv.tests.pooled_individuals [generations] [seed]
+"""
+
+import gc
+import sys
+import tracemalloc
+from time import perf_counter
+
+from dsecffxiv.algo.genetic_algorithm import GeneticAlgorithm
+from dsecffxiv.headless_runner import assemble_config, build_parser
+
+
+def measure(pooled: bool, generations: int, seed: int):
+    """Run a GA, returning its final population's genes and per generation allocation averages."""
+    config = assemble_config(build_parser().parse_args(
+        ['solve', '--seed', str(seed), '--population-size', '500', '--selection-size', '250',
+         '--tournament-size', '10', '--replace-pop']))
+    config['pool_individuals'] = pooled
+    ga = GeneticAlgorithm(config)
+    ga.step()  # Warm up, the first generation allocates the starting population either way
+
+    created_before = ga.pool.created if pooled else 0
+    collections_before = sum(stats['collections'] for stats in gc.get_stats())
+    peak_total = 0
+    seconds = 0.0
+    tracemalloc.start()
+    for _ in range(generations):
+        tracemalloc.reset_peak()
+        current, _ = tracemalloc.get_traced_memory()
+        start = perf_counter()
+        ga.step()
+        seconds += perf_counter() - start
+        peak_total += tracemalloc.get_traced_memory()[1] - current
+    tracemalloc.stop()
+
+    if pooled:
+        created = ga.pool.created - created_before
+    else:
+        created = generations * 2 * config['selection_size']
+    collections = sum(stats['collections'] for stats in gc.get_stats()) - collections_before
+    genes = [[(gene[0].__name__, gene[1], gene[2]) for gene in indiv.value]
+             for indiv in ga.population]
+    return genes, {'individuals': created / generations, 'peak_bytes': peak_total / generations,
+                   'collections': collections / generations, 'seconds': seconds / generations}
+
+
+if __name__ == "__main__":
+    GENERATIONS = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+    SEED = int(sys.argv[2]) if len(sys.argv) > 2 else 0
+
+    plain_genes, plain = measure(False, GENERATIONS, SEED)
+    pooled_genes, pooled = measure(True, GENERATIONS, SEED)
+
+    print("Per generation    {0:>12} {1:>12}".format('allocating', 'pooled'))
+    for key in ('individuals', 'peak_bytes', 'collections', 'seconds'):
+        print("  {0:<15} {1:>12.4g} {2:>12.4g}".format(key, plain[key], pooled[key]))
+    if plain_genes != pooled_genes:
+        print("Pooled run evolved a different population")
+        sys.exit(1)
+    print("Pooled and allocating runs evolved the same population")
@@ -0,0 +1,85 @@
+"""
+Ranking check for the surrogate screen.
+
+Problem:
+    The surrogate in algo/surrogate.py only pays off if it ranks children the right way round. A
+    screen that ranks backwards simulates the worse children and the GA does better without it.
+
+    Run the GA with the surrogate for a number of generations, then breed a fresh held out pool of
+    children, rank it with the trained model and simulate all of it. The rank correlation of
+    predicted and true targets must be positive, and the half of the pool the model keeps must
+    score better than the half it rejects. A screen whose audited children rank backwards must not
+    grow the pool, and the pareto objective, which never scores the children, must be refused.
+
+    Run with: python -m dsecffxiv.tests.surrogate_screen [generations] [pool pairs] [seed]
+"""
+
+import sys
+
+from dsecffxiv.algo.genetic_algorithm import GeneticAlgorithm
+from dsecffxiv.algo.surrogate import genome_features, rank_correlation, score_target
+from dsecffxiv.headless_runner import assemble_config, build_parser
+from dsecffxiv.utils.rng import Rng
+
+SEEDS = 3
+
+
+def held_out(generations: int, pairs: int, seed: int):
+    """Train a screen in a GA run and rank a fresh pool with it.
+
+    Returns the rank correlation on the pool, the mean true target of the half it keeps and of the
+    half it rejects, and the rank correlation the screen measured on its audits during the run.
+    """
+    ga = GeneticAlgorithm(assemble_config(build_parser().parse_args(
+        ['solve', '--surrogate', '--seed', str(seed)])))
+    for _ in range(generations):
+        ga.step()
+    ga.rank_and_cull()
+
+    pool = ga.make_children(pairs, Rng(seed + 1))
+    predictions = [ga.surrogate.model.predict(genome_features(indiv.value, ga.surrogate.constants))
+                   for indiv in pool]
+    truths = [score_target(score) for score in ga.problem.score_batch(pool)]
+    order = sorted(range(len(pool)), key=predictions.__getitem__, reverse=True)
+    half = len(order) // 2
+    kept = sum(truths[index] for index in order[:half]) / half
+    rejected = sum(truths[index] for index in order[half:]) / (len(order) - half)
+    audited = ga.surrogate.summary()['rank_correlation']
+    return rank_correlation(predictions, truths), kept, rejected, audited
+
+
+if __name__ == "__main__":
+    GENERATIONS = int(sys.argv[1]) if len(sys.argv) > 1 else 60
+    PAIRS = int(sys.argv[2]) if len(sys.argv) > 2 else 400
+    SEED = int(sys.argv[3]) if len(sys.argv) > 3 else 3
+
+    failures = 0
+    for seed in range(SEED, SEED + SEEDS):
+        correlation, kept, rejected, audited = held_out(GENERATIONS, PAIRS, seed)
+        print("Seed {0}: held out rank correlation {1:.3f} (audited {2:.3f}), kept half {3:.3f}, "
+              "rejected half {4:.3f}".format(seed, correlation, audited, kept, rejected))
+        if correlation <= 0 or kept <= rejected:
+            failures += 1
+            print("The screen ranks the held out pool backwards")
+
+    # However well trained, a screen whose audited children rank backwards must simulate every child
+    ga = GeneticAlgorithm(assemble_config(build_parser().parse_args(
+        ['solve', '--surrogate', '--seed', str(SEED)])))
+    ga.step()
+    ga.step()
+    ga.surrogate.metrics['rank_correlation'] = -0.1
+    if ga.surrogate.pool_factor() != 1:
+        failures += 1
+        print("A screen with a negative rank correlation still grows the pool")
+
+    # The pareto objective never scores children, a screen would never learn
+    try:
+        GeneticAlgorithm(assemble_config(build_parser().parse_args(
+            ['solve', '--surrogate', '--objective', 'pareto', '--seed', str(SEED)])))
+        failures += 1
+        print("The surrogate was accepted with the pareto objective")
+    except ValueError:
+        pass
+
+    print("{0} failures".format(failures))
+    sys.exit(1 if failures else 0)
@@ -0,0 +1,49 @@
+"""Executable to read elite trace files written by the headless runner (--trace-file).
+
+    list  FILE              One line per trace: index, generation, rank, score and steps
+    show  FILE INDEX...     Step tables of traces, what every step changed in the State
+    diff  FILE LEFT RIGHT   Differences between two traces from the step where they diverge,
+                            RIGHT may come from another file with --other
+"""
+
+import argparse
+import sys
+
+from dsecffxiv.algo.trace import diff_traces, read_traces, render_trace
+
+
+def main(argv=None) -> int:
+    """Run the trace CLI."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    list_parser = subparsers.add_parser('list', help='List the traces of a file')
+    list_parser.add_argument('path')
+    show_parser = subparsers.add_parser('show', help='Render traces step by step')
+    show_parser.add_argument('path')
+    show_parser.add_argument('indices', type=int, nargs='*',
+                             help='Trace indices (default: the last one)')
+    diff_parser = subparsers.add_parser('diff', help='Diff two traces')
+    diff_parser.add_argument('path')
+    diff_parser.add_argument('left', type=int)
+    diff_parser.add_argument('right', type=int)
+    diff_parser.add_argument('--other', default=None, help='Take the right trace from this file')
+    args = parser.parse_args(argv)
+
+    traces = read_traces(args.path)
+    if args.command == 'list':
+        for index, trace in enumerate(traces):
+            print('{0:>5}  generation {1:>5}  rank {2:>3}  score {3:>10.3f}  {4:>3} steps  '
+                  '{5} bytes'.format(index, trace.generation, trace.rank, trace.score,
+                                     trace.steps, len(trace.records)))
+    elif args.command == 'show':
+        for index in args.indices or [-1]:
+            print(render_trace(traces[index]))
+            print()
+    else:
+        others = read_traces(args.other) if args.other else traces
+        print(diff_traces(traces[args.left], others[args.right]))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
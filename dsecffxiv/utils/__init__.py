@@ -1,3 +1,4 @@
 """General utility methods."""
 
 from dsecffxiv.utils.chance import chance
+from dsecffxiv.utils.rng import Rng, default_rng
@@ -4,9 +4,11 @@ Chance.
     Helper functions for probability based actions.
 """
 
-from random import uniform
+from typing import Optional
 
+from dsecffxiv.utils.rng import Rng, default_rng
 
-def chance(percent: float) -> bool:
+
+def chance(percent: float, rng: Optional[Rng] = None) -> bool:
     """Given float, return if random number is within percent."""
-    return uniform(0, 1) < percent
+    return default_rng(rng).random() < percent
@@ -0,0 +1,52 @@
+"""
+Memory.
+
+    Rough footprints of live objects, for reporting what a long running session is holding on to.
+"""
+
+import sys
+from collections import deque
+from types import FunctionType, ModuleType
+from typing import Any, Optional, Set
+
+# Shared by every object that refers to them, never counted as anyone's footprint
+_SHARED = (type, ModuleType, FunctionType)
+
+
+def deep_sizeof(obj: Any, seen: Optional[Set[int]] = None) -> int:
+    """Bytes held by obj and everything reachable from it through containers and attributes.
+
+    Objects already in seen are skipped and everything counted is added to it, so passing the same
+    set to several calls never counts a shared object twice. Classes, modules and functions count
+    as zero.
+    """
+    if seen is None:
+        seen = set()
+    total = 0
+    pending = [obj]
+    while pending:
+        current = pending.pop()
+        if id(current) in seen or isinstance(current, _SHARED):
+            continue
+        seen.add(id(current))
+        total += sys.getsizeof(current)
+        if isinstance(current, dict):
+            pending.extend(current.keys())
+            pending.extend(current.values())
+        elif isinstance(current, (list, tuple, set, frozenset, deque)):
+            pending.extend(current)
+        if hasattr(current, '__dict__') and not isinstance(current, dict):
+            pending.append(current.__dict__)
+        for name in getattr(type(current), '__slots__', ()):
+            if hasattr(current, name):
+                pending.append(getattr(current, name))
+    return total
+
+
+def format_bytes(size: float) -> str:
+    """Human readable byte count."""
+    for unit in ('B', 'KiB', 'MiB'):
+        if abs(size) < 1024:
+            return "{0:.1f} {1}".format(size, unit)
+        size /= 1024
+    return "{0:.1f} GiB".format(size)
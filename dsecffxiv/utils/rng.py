@@ -0,0 +1,87 @@
+"""
+Rng.
+
+    Seedable random streams that can be split into independent child streams, one per worker,
+    so threads never share a generator and seeded runs are reproducible.
+"""
+
+import random
+import threading
+from hashlib import blake2b
+from math import log
+from typing import List, Optional, Tuple
+
+
+class Rng(random.Random):
+    """A random stream with deterministic child streams and bulk draw helpers."""
+
+    def __init__(self, seed: Optional[int] = None, spawn_key: Tuple[int, ...] = ()):
+        """Construct a stream, drawing a fresh root seed from the OS if none is given."""
+        if seed is None:
+            seed = random.SystemRandom().getrandbits(64)
+        self.root_seed = seed
+        self.spawn_key = spawn_key
+        self._children_spawned = 0
+        super().__init__(_derive_seed(seed, spawn_key))
+
+    def spawn(self, count: int) -> List['Rng']:
+        """Create count new independent streams, never the same stream twice across calls."""
+        first = self._children_spawned
+        self._children_spawned += count
+        return [Rng(self.root_seed, self.spawn_key + (index,))
+                for index in range(first, first + count)]
+
+    def integers(self, low: int, high: int, size: int) -> List[int]:
+        """Draw size integers uniformly from [low, high).
+
+        Scales random() directly instead of going through randint, the bias is negligible for the
+        small ranges used by the GA.
+        """
+        rand = self.random
+        span = high - low
+        return [low + int(rand() * span) for _ in range(size)]
+
+    def uniforms(self, size: int) -> List[float]:
+        """Draw size floats uniformly from [0, 1)."""
+        rand = self.random
+        return [rand() for _ in range(size)]
+
+    def bernoulli_indices(self, size: int, probability: float) -> List[int]:
+        """Indices in range(size) whose independent trial with the given probability succeeded.
+
+        Skips between successes are drawn from a geometric distribution, so only about
+        size * probability draws are made instead of one per index.
+        """
+        if probability <= 0:
+            return []
+        if probability >= 1:
+            return list(range(size))
+        rand = self.random
+        log_miss = log(1 - probability)
+        indices = list()
+        index = int(log(1 - rand()) / log_miss)
+        while index < size:
+            indices.append(index)
+            index += 1 + int(log(1 - rand()) / log_miss)
+        return indices
+
+
+def _derive_seed(seed: int, spawn_key: Tuple[int, ...]) -> int:
+    """Hash a root seed and spawn path into a well mixed seed for a child stream."""
+    if not spawn_key:
+        return seed
+    digest = blake2b('{0}:{1}'.format(seed, spawn_key).encode(), digest_size=16).digest()
+    return int.from_bytes(digest, 'little')
+
+
+_THREAD_STREAMS = threading.local()
+
+
+def default_rng(rng: Optional[Rng] = None) -> Rng:
+    """Return rng if given, otherwise this thread's own unseeded stream."""
+    if rng is not None:
+        return rng
+    stream = getattr(_THREAD_STREAMS, 'rng', None)
+    if stream is None:
+        stream = _THREAD_STREAMS.rng = Rng()
+    return stream
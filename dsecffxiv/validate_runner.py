@@ -0,0 +1,83 @@
+"""Executable to validate many macros against the simulator, streaming JSON lines in and out.
+
+Each input line is one macro, either action names separated by commas
+    Muscle Memory, Veneration, Groundwork, ...
+or a JSON object {"name": "...", "actions": ["MuscleMemory", ...]}. Each output line is the
+macro's result under the chosen scenario set (see algo/validation.py), in input order. Lines are
+read, validated by worker processes and written a chunk at a time with a bounded number of chunks
+in flight, so memory stays the same whatever the size of the input.
+"""
+
+import argparse
+import json
+import os
+import sys
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+from typing import Deque, Iterable, Iterator, List, Tuple
+
+from dsecffxiv.algo.validation import DEFAULT_SAMPLES, SCENARIO_SETS, scenario_set, validate_lines
+from dsecffxiv.sim_resources.Profile import DEFAULT_PROFILE, StatProfile
+
+DEFAULT_CHUNK_SIZE = 64
+# Chunks queued per worker, enough to keep every worker busy while results are written
+CHUNKS_PER_WORKER = 2
+
+
+def numbered_chunks(lines: Iterable[str], chunk_size: int) -> Iterator[List[Tuple[int, str]]]:
+    """Lazily group the non-blank lines into chunks of (1 based line number, text) pairs."""
+    numbered = ((number, line) for number, line in enumerate(lines, start=1) if line.strip())
+    while True:
+        chunk = list(islice(numbered, chunk_size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def _write(results, output) -> int:
+    """Write a chunk's results as JSON lines, returning how many macros were invalid."""
+    for result in results:
+        output.write(json.dumps(result) + '\n')
+    output.flush()
+    return sum(not result['valid'] for result in results)
+
+
+def main(argv=None) -> int:
+    """Run the validation CLI, exiting non-zero if any macro is invalid."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--input', type=argparse.FileType('r'), default=sys.stdin,
+                        help='File of macros, one per line (default: stdin)')
+    parser.add_argument('--output', type=argparse.FileType('w'), default=sys.stdout,
+                        help='Where to write one JSON result per macro, in input order')
+    parser.add_argument('--scenarios', choices=SCENARIO_SETS, default='normal',
+                        help='Conditions and rolls to run every macro under')
+    parser.add_argument('--samples', type=int, default=DEFAULT_SAMPLES,
+                        help='Scenarios in the sampled set')
+    parser.add_argument('--seed', type=int, default=0, help='Seed of the sampled scenarios')
+    parser.add_argument('--profile', type=argparse.FileType('r'), default=None,
+                        help='JSON file of crafter/recipe stats to override, see '
+                             'sim_resources/Profile.py')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1, help='Worker processes')
+    parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE,
+                        help='Macros handed to a worker at once')
+    args = parser.parse_args(argv)
+
+    profile = StatProfile.from_dict(json.load(args.profile)) if args.profile else DEFAULT_PROFILE
+    scenarios = scenario_set(args.scenarios, args.samples, args.seed)
+    workers = max(args.workers, 1)
+    invalid = 0
+    pending: Deque = deque()
+    with ProcessPoolExecutor(workers) as pool:
+        for chunk in numbered_chunks(args.input, max(args.chunk_size, 1)):
+            pending.append(pool.submit(validate_lines, chunk, scenarios, profile))
+            # Only write the oldest chunk once enough are queued, which keeps the output in order
+            while len(pending) >= workers * CHUNKS_PER_WORKER:
+                invalid += _write(pending.popleft().result(), args.output)
+        while pending:
+            invalid += _write(pending.popleft().result(), args.output)
+    return 1 if invalid else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())